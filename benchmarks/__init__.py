@@ -0,0 +1,18 @@
+"""
+Benchmark and stress harness for the API, run by the ``benchmark_*`` and
+``stress_*`` management commands and by the query-budget tests in
+``core.tests``.
+
+Development only: it drives the API through DRF's test client and patches
+framework settings while it measures, so nothing under ``core`` imports
+it outside of those commands and tests.
+
+* ``seeding`` fills the database with representative rows;
+* ``api`` holds the per-endpoint query budgets and measures endpoints and
+  the bulk routes through the test client;
+* ``serving`` times token authentication, WSGI against ASGI and response
+  rendering;
+* ``concurrency`` runs the checkout, enrollment and database-write stress
+  tests;
+* ``scheduling`` times the counseling free-slot search.
+"""
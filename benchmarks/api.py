@@ -0,0 +1,336 @@
+"""
+Per-endpoint query and latency budgets, and their measurement.
+
+Used by ``core.tests`` to enforce the budgets and by the ``benchmark_api``
+management command to print trend tables.
+"""
+import datetime
+import statistics
+import time
+from collections import namedtuple
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.models import TimetableSlot
+
+User = get_user_model()
+
+API_ROOT = '/api/'
+
+
+# Maximum queries and p95 wall time (ms) per endpoint. Keys are
+# "<route>:<action>"; routes not listed fall back to DEFAULT_BUDGETS.
+# List and detail include the table-version lookup behind ETags; creates
+# include the version bump and any dashboard snapshot or activity feed write.
+DEFAULT_BUDGETS = {
+    'list': (3, 500),
+    'detail': (2, 500),
+    'create': (2, 500),
+}
+
+ENDPOINT_BUDGETS = {
+    'users:create': (4, 500),
+    'departments:create': (7, 500),
+    'semesters:create': (4, 500),
+    'courses:list': (4, 500),
+    'courses:detail': (3, 500),
+    # Plus the cycle check and the closure refresh of the new course
+    'courses:create': (21, 500),
+    # Version lookup, the course, its closure rows and the edges among them
+    'courses:prerequisite-tree': (4, 100),
+    # Closure rows and completions, for every student/course pair at once
+    'courses:eligibility': (2, 200),
+    'course-completions:create': (6, 500),
+    'course-enrollments:create': (7, 500),
+    'classrooms:create': (3, 500),
+    # Plus the overlap check against the semester's other slots
+    'timetable-slots:create': (4, 500),
+    'timetable-entries:create': (7, 500),
+    'faculty-profiles:create': (8, 500),
+    # Plus a locked read, at most one COUNT and an update per metrics row
+    # (faculty member, department, university)
+    'publications:create': (14, 500),
+    'research-projects:list': (4, 500),
+    'research-projects:detail': (3, 500),
+    'research-projects:create': (16, 500),
+    # Version lookups for the ETag and the cache key, then memberships and
+    # faculty on a cache miss
+    'research-projects:collaborations': (5, 200),
+    # Version lookup, the university row and one row per department
+    'publications:metrics': (3, 100),
+    'library-resources:create': (4, 500),
+    # Version lookup and one ranked full-text page; no COUNT
+    'library-resources:search': (2, 50),
+    'library-borrowings:list': (2, 500),
+    # Routed through checkout: the conditional copy decrement, the insert
+    # and a re-read of the loan with its resource and user
+    'library-borrowings:create': (9, 500),
+    'housing:create': (4, 500),
+    'housing-applications:create': (6, 500),
+    'counseling-appointments:list': (2, 500),
+    # Plus the availability-window and overlap checks, in a savepoint
+    'counseling-appointments:create': (10, 500),
+    # Availability windows once, then one bookings range scan per day range
+    'counseling-appointments:free-slots': (5, 100),
+    'counselor-availability:create': (4, 500),
+    'health-records:list': (2, 500),
+    'health-records:create': (4, 500),
+    'compliance-reports:create': (6, 500),
+    'audits:create': (4, 500),
+    'stats': (1, 500),
+    'recent-activities': (1, 500),
+}
+
+# Resources exercised by the bulk-endpoint throughput benchmark
+BULK_PREFIXES = ('housing-applications', 'fitness-classes')
+
+Endpoint = namedtuple('Endpoint', 'name method path payload')
+Measurement = namedtuple(
+    'Measurement', 'name queries rows payload_bytes p50_ms p95_ms budget_queries budget_ms'
+)
+Throughput = namedtuple('Throughput', 'name rows queries seconds')
+
+
+def get_budget(name):
+    """Return the ``(max_queries, max_p95_ms)`` budget for an endpoint name."""
+    if name in ENDPOINT_BUDGETS:
+        return ENDPOINT_BUDGETS[name]
+    action = name.rsplit(':', 1)[-1]
+    return DEFAULT_BUDGETS[action]
+
+
+def build_create_payloads(data):
+    """
+    Return a mapping of route prefix to ``payload(i)`` factories.
+
+    Each factory yields a valid create payload; ``i`` keeps unique fields
+    distinct across repeated runs.
+    """
+    today = datetime.date.today().isoformat()
+    student = data['students'][0].pk
+    faculty_user = data['faculty_users'][0].pk
+    department = data['departments'][0].pk
+
+    def faculty_profile(i):
+        user = User.objects.create(
+            username=f'new_faculty{i}', email=f'new_faculty{i}@example.edu', role='faculty'
+        )
+        return {'user': user.pk, 'department': department, 'position': 'Lecturer',
+                'office_location': 'Room 1', 'phone': '555-0100', 'joining_date': today}
+
+    def course_completion(i):
+        user = User.objects.create(username=f'new_graduate{i}', email=f'new_graduate{i}@example.edu')
+        return {'student': user.pk, 'course': data['courses'][0].pk, 'grade': 'A', 'completed_on': today}
+
+    def timetable_entry(i):
+        slot = TimetableSlot.objects.create(
+            semester=data['semesters'][-1], kind='EXAM', date=datetime.date.today() + datetime.timedelta(days=i),
+            start_time=datetime.time(9), end_time=datetime.time(12),
+        )
+        return {'semester': slot.semester_id, 'kind': 'EXAM', 'course': data['courses'][i].pk, 'slot': slot.pk}
+
+    return {
+        'users': lambda i: {'username': f'new_user{i}', 'email': f'new_user{i}@example.edu',
+                            'first_name': 'New', 'last_name': 'User'},
+        'departments': lambda i: {'name': 'New Department', 'code': f'ND{i}', 'head': faculty_user},
+        'academic-years': lambda i: {'year': '2030-2031', 'start_date': today, 'end_date': today},
+        'semesters': lambda i: {'academic_year': data['academic_years'][0].pk, 'name': 'FALL',
+                                'start_date': today, 'end_date': today},
+        'courses': lambda i: {'code': f'NC{i}', 'name': 'New Course', 'department': department,
+                              'credits': 3, 'description': 'New course',
+                              'prerequisites': [c.pk for c in data['courses'][:2]],
+                              'instructor': faculty_user},
+        'course-completions': course_completion,
+        # The last semester has no seeded enrollments or timetable
+        'course-enrollments': lambda i: {'student': student, 'course': data['courses'][i].pk,
+                                         'semester': data['semesters'][-1].pk},
+        'classrooms': lambda i: {'building': 'Block 9', 'room_number': str(i), 'capacity': 40},
+        'timetable-slots': lambda i: {'semester': data['semesters'][-1].pk, 'kind': 'CLASS', 'weekday': i % 7,
+                                      'start_time': f'{8 + i // 7:02d}:00', 'end_time': f'{8 + i // 7:02d}:50'},
+        'timetable-entries': timetable_entry,
+        'faculty-profiles': faculty_profile,
+        'publications': lambda i: {'faculty': data['faculty'][0].pk, 'title': 'New Paper',
+                                   'journal': 'Journal', 'publication_date': today},
+        'research-grants': lambda i: {'name': 'New Grant', 'description': 'Grant',
+                                      'amount': '1000.00', 'deadline': today, 'status': 'OPEN'},
+        'research-projects': lambda i: {'title': 'New Project',
+                                        'principal_investigator': data['faculty'][0].pk,
+                                        'co_investigators': [p.pk for p in data['faculty'][1:3]],
+                                        'start_date': today, 'end_date': today,
+                                        'budget': '1000.00', 'status': 'PLANNING',
+                                        'description': 'Project'},
+        'library-resources': lambda i: {'title': 'New Title', 'author': 'Author',
+                                        'resource_type': 'BOOK', 'location': 'Shelf 1'},
+        # Routed through checkout: each run takes a copy of a different resource
+        'library-borrowings': lambda i: {'resource': data['resources'][i % len(data['resources'])].pk},
+        'housing': lambda i: {'building': 'Hall 9', 'room_number': str(i), 'room_type': 'SINGLE',
+                              'capacity': 1, 'semester_fee': '1500.00'},
+        'housing-applications': lambda i: {'student': student, 'preferred_building': 'Hall 1',
+                                           'room_type': 'SINGLE',
+                                           'semester': data['semesters'][0].pk},
+        # A counselor without availability windows, a year out, one day per run
+        'counseling-appointments': lambda i: {'student': student, 'counselor': data['faculty_users'][-1].pk,
+                                              'date': (datetime.date.today()
+                                                       + datetime.timedelta(days=365 + i)).isoformat(),
+                                              'time': '10:00', 'session_type': 'VIRTUAL',
+                                              'reason': 'Check-in'},
+        'counselor-availability': lambda i: {'counselor': faculty_user, 'weekday': i % 7,
+                                             'start_time': '09:00', 'end_time': '12:00'},
+        'health-records': lambda i: {'student': student, 'visit_date': today,
+                                     'visit_type': 'Checkup'},
+        'fitness-classes': lambda i: {'name': 'New Class', 'instructor': 'Coach',
+                                      'schedule': 'Tue 09:00', 'capacity': 10},
+        'compliance-reports': lambda i: {'title': 'New Report', 'report_type': 'ANNUAL',
+                                         'generated_by': data['admin'].pk, 'start_date': today,
+                                         'end_date': today, 'status': 'DRAFT',
+                                         'file_path': 'reports/new.pdf'},
+        'audits': lambda i: {'audit_type': 'Financial', 'start_date': today, 'due_date': today,
+                             'assigned_to': department, 'status': 'PLANNED'},
+    }
+
+
+def build_endpoints(data):
+    """Return an Endpoint for every list/detail/create route plus the search and dashboard views."""
+    from core.urls import router
+
+    payloads = build_create_payloads(data)
+    endpoints = []
+    for prefix, viewset, basename in router.registry:
+        instance = viewset.queryset.model.objects.order_by('pk').first()
+        endpoints.append(Endpoint(f'{prefix}:list', 'get', f'{API_ROOT}{prefix}/', None))
+        endpoints.append(Endpoint(f'{prefix}:detail', 'get', f'{API_ROOT}{prefix}/{instance.pk}/', None))
+        endpoints.append(Endpoint(f'{prefix}:create', 'post', f'{API_ROOT}{prefix}/', payloads[prefix]))
+    endpoints.append(Endpoint('library-resources:search', 'get',
+                              f'{API_ROOT}library-resources/search/?q=title&type=BOOK', None))
+    deepest = data['courses'][-1].pk
+    endpoints.append(Endpoint('courses:prerequisite-tree', 'get',
+                              f'{API_ROOT}courses/{deepest}/prerequisite-tree/', None))
+    endpoints.append(Endpoint('courses:eligibility', 'post', f'{API_ROOT}courses/eligibility/', lambda i: {
+        'students': [student.pk for student in data['students']],
+        'courses': [course.pk for course in data['courses']],
+    }))
+    endpoints.append(Endpoint('research-projects:collaborations', 'get',
+                              f'{API_ROOT}research-projects/collaborations/', None))
+    endpoints.append(Endpoint('publications:metrics', 'get', f'{API_ROOT}publications/metrics/', None))
+    endpoints.append(Endpoint('counseling-appointments:free-slots', 'get',
+                              f'{API_ROOT}counseling-appointments/free-slots/?count=20', None))
+    endpoints.append(Endpoint('stats', 'get', f'{API_ROOT}stats/', None))
+    endpoints.append(Endpoint('recent-activities', 'get', f'{API_ROOT}recent-activities/', None))
+    return endpoints
+
+
+def count_rows(payload):
+    if isinstance(payload, dict):
+        if isinstance(payload.get('results'), list):
+            return len(payload['results'])
+        if isinstance(payload.get('activities'), list):
+            return len(payload['activities'])
+    if isinstance(payload, list):
+        return len(payload)
+    return 1
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(client, endpoint, repeat=5):
+    """
+    Call ``endpoint`` ``repeat`` times and return a Measurement.
+
+    The query count is the maximum seen across runs; the response of the
+    last run is checked for a 2xx status.
+    """
+    timings = []
+    queries = 0
+    response = None
+    for i in range(repeat):
+        payload = endpoint.payload(i) if endpoint.payload else None
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = getattr(client, endpoint.method)(endpoint.path, payload, format='json')
+            timings.append((time.perf_counter() - start) * 1000)
+        queries = max(queries, len(captured))
+        if response.status_code >= 300:
+            raise AssertionError(
+                f'{endpoint.name} returned {response.status_code}: {response.content[:500]!r}'
+            )
+    budget_queries, budget_ms = get_budget(endpoint.name)
+    return Measurement(
+        name=endpoint.name,
+        queries=queries,
+        # Responses served from core.response_cache carry only their rendered body
+        rows=count_rows(response.data if hasattr(response, 'data') else response.json()),
+        payload_bytes=len(response.content),
+        p50_ms=statistics.median(timings),
+        p95_ms=percentile(timings, 0.95),
+        budget_queries=budget_queries,
+        budget_ms=budget_ms,
+    )
+
+
+def format_table(measurements):
+    """Render measurements as a fixed-width text table."""
+    header = (f"{'endpoint':<34}{'queries':>9}{'budget':>8}{'rows':>6}"
+              f"{'bytes':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    lines = [header, '-' * len(header)]
+    for m in measurements:
+        flag = ' !' if m.queries > m.budget_queries or m.p95_ms > m.budget_ms else ''
+        lines.append(
+            f'{m.name:<34}{m.queries:>9}{m.budget_queries:>8}{m.rows:>6}'
+            f'{m.payload_bytes:>9}{m.p50_ms:>9.2f}{m.p95_ms:>9.2f}{flag}'
+        )
+    return '\n'.join(lines)
+
+
+def _timed(client, method, path, payload):
+    with CaptureQueriesContext(connection) as captured:
+        start = time.perf_counter()
+        response = getattr(client, method)(path, payload, format='json')
+        elapsed = time.perf_counter() - start
+    if response.status_code >= 300:
+        raise AssertionError(f'{method.upper()} {path} returned {response.status_code}: {response.content[:500]!r}')
+    return response, len(captured), elapsed
+
+
+def measure_bulk(client, data, prefix, size=500):
+    """
+    Compare one-request-per-row creates against the bulk create, update and
+    delete endpoints for ``prefix``; returns a list of Throughput rows.
+    """
+    factory = build_create_payloads(data)[prefix]
+    path = f'{API_ROOT}{prefix}/'
+    single_rows = max(1, size // 10)
+    results = []
+
+    queries = seconds = 0
+    for i in range(single_rows):
+        _, q, s = _timed(client, 'post', path, factory(10_000 + i))
+        queries, seconds = queries + q, seconds + s
+    results.append(Throughput(f'{prefix}:single-create', single_rows, queries, seconds))
+
+    response, queries, seconds = _timed(client, 'post', f'{path}bulk/', [factory(20_000 + i) for i in range(size)])
+    ids = [row['id'] for row in response.data['results']]
+    results.append(Throughput(f'{prefix}:bulk-create', size, queries, seconds))
+
+    field = {'housing-applications': 'special_requests', 'fitness-classes': 'capacity'}[prefix]
+    value = {'special_requests': 'Ground floor', 'capacity': 30}[field]
+    _, queries, seconds = _timed(client, 'patch', f'{path}bulk/', [{'id': pk, field: value} for pk in ids])
+    results.append(Throughput(f'{prefix}:bulk-update', size, queries, seconds))
+
+    _, queries, seconds = _timed(client, 'delete', f'{path}bulk/', {'ids': ids})
+    results.append(Throughput(f'{prefix}:bulk-delete', size, queries, seconds))
+    return results
+
+
+def format_throughput_table(results):
+    header = f"{'operation':<40}{'rows':>7}{'queries':>9}{'seconds':>10}{'rows/s':>11}"
+    lines = [header, '-' * len(header)]
+    for r in results:
+        rate = r.rows / r.seconds if r.seconds else float('inf')
+        lines.append(f'{r.name:<40}{r.rows:>7}{r.queries:>9}{r.seconds:>10.3f}{rate:>11.0f}')
+    return '\n'.join(lines)
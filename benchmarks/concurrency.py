@@ -0,0 +1,293 @@
+"""
+Concurrency stress tests: library checkouts, fitness enrollment bursts and
+raw database write throughput, each from many threads with their own
+database connections.
+"""
+import random
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import DatabaseError, OperationalError, connection, connections, transaction
+from django.db.models import Count
+
+from core import circulation, fitness
+from core.models import FitnessEnrollment, LibraryBorrowing
+
+from .api import percentile
+
+
+CheckoutStress = namedtuple(
+    'CheckoutStress', 'workers operations checkouts returns rejected retries open_loans oversold consistent seconds'
+)
+
+
+def stress_checkout(resource, users, workers=8, attempts=50, random_seed=0):
+    """
+    Run ``attempts`` checkouts or returns of ``resource`` from each of
+    ``workers`` threads, each on its own database connection, and check the
+    outcome: ``oversold`` counts open loans beyond ``total_copies`` (or a
+    negative counter) and must be zero; ``consistent`` is whether the
+    counter still equals the copies not on loan.
+
+    SQLite rejects concurrent writers with "database is locked"; those
+    attempts are retried, as a kiosk would, and counted in ``retries``.
+    """
+    resource.refresh_from_db()
+    available_before = resource.available_copies
+    open_before = LibraryBorrowing.objects.filter(resource=resource, return_date__isnull=True).count()
+    totals = Counter()
+    lock = threading.Lock()
+
+    def work(index):
+        rng = random.Random(random_seed + index)
+        counts = Counter()
+        loans = []
+        try:
+            for attempt in range(attempts):
+                while True:
+                    try:
+                        if loans and rng.random() < 0.5:
+                            circulation.return_copy(loans[-1])
+                            loans.pop()
+                            counts['returns'] += 1
+                        else:
+                            loans.append(circulation.checkout(resource.pk, users[(index + attempt) % len(users)]))
+                            counts['checkouts'] += 1
+                        break
+                    except circulation.CirculationConflict:
+                        counts['rejected'] += 1
+                        break
+                    except OperationalError as exc:
+                        if 'locked' not in str(exc):
+                            raise
+                        counts['retries'] += 1
+                        time.sleep(0.001)
+        finally:
+            connection.close()
+        with lock:
+            totals.update(counts)
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    resource.refresh_from_db()
+    open_loans = LibraryBorrowing.objects.filter(resource=resource, return_date__isnull=True).count()
+    return CheckoutStress(
+        workers=workers,
+        operations=totals['checkouts'] + totals['returns'] + totals['rejected'],
+        checkouts=totals['checkouts'],
+        returns=totals['returns'],
+        rejected=totals['rejected'],
+        retries=totals['retries'],
+        open_loans=open_loans,
+        oversold=max(0, open_loans - resource.total_copies) + max(0, -resource.available_copies),
+        consistent=resource.available_copies == available_before - (open_loans - open_before),
+        seconds=seconds,
+    )
+
+
+def format_stress(result):
+    rate = result.operations / result.seconds if result.seconds else float('inf')
+    return '\n'.join([
+        f'workers      {result.workers}',
+        f'operations   {result.operations} ({result.checkouts} checkouts, {result.returns} returns, '
+        f'{result.rejected} rejected as unavailable)',
+        f'lock retries {result.retries}',
+        f'throughput   {rate:.0f} ops/s over {result.seconds:.2f} s',
+        f'open loans   {result.open_loans}',
+        f'oversold     {result.oversold}',
+        f'counter      {"consistent" if result.consistent else "DRIFTED"}',
+    ])
+
+
+EnrollmentStress = namedtuple(
+    'EnrollmentStress',
+    'workers requests enrolled waitlisted drops retries capacity overbooked stranded consistent seconds'
+)
+
+
+def _retry_locked(operation, counts, settle=None):
+    """
+    Run ``operation`` until SQLite stops rejecting it as locked. An
+    operation whose write committed before a later step hit the lock
+    raises a 409 on retry; ``settle`` then finishes the follow-up step and
+    None is returned.
+    """
+    retried = 0
+    while True:
+        try:
+            return operation()
+        except fitness.EnrollmentConflict:
+            if settle is None or not retried:
+                raise
+            _retry_locked(settle, counts)
+            return None
+        except OperationalError as exc:
+            if 'locked' not in str(exc):
+                raise
+            # Jittered exponential backoff, so a burst does not retry in lockstep
+            time.sleep(random.uniform(0, 0.001 * 2 ** min(retried, 6)))
+            retried += 1
+            counts['retries'] += 1
+
+
+def stress_enrollment(fitness_class, students, workers=16, drop_rate=0.1, random_seed=0):
+    """
+    Release ``workers`` threads at once, each enrolling its share of
+    ``students`` in ``fitness_class`` and dropping about ``drop_rate`` of
+    its seats again, then check the result: ``overbooked`` counts seats
+    beyond capacity, ``stranded`` counts free seats left while students wait
+    (both must be zero), and ``consistent`` is whether the ``enrolled``
+    counter matches the ENROLLED rows.
+    """
+    class_id = fitness_class.pk
+    start_line = threading.Barrier(workers)
+    totals = Counter()
+    lock = threading.Lock()
+
+    def work(index):
+        rng = random.Random(random_seed + index)
+        counts = Counter()
+        mine = []
+        try:
+            start_line.wait()
+            for student in students[index::workers]:
+                counts['requests'] += 1
+                mine.append(_retry_locked(lambda: fitness.enroll(class_id, student), counts,
+                                          settle=lambda: fitness.promote(class_id)))
+                if rng.random() < drop_rate:
+                    enrollment = mine.pop(rng.randrange(len(mine)))
+                    if enrollment is not None:
+                        counts['drops'] += 1
+                        _retry_locked(lambda: fitness.drop(enrollment), counts,
+                                      settle=lambda: fitness.promote(class_id))
+        finally:
+            connection.close()
+        with lock:
+            totals.update(counts)
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    fitness_class.refresh_from_db()
+    rows = Counter(dict(FitnessEnrollment.objects.filter(fitness_class_id=class_id)
+                        .values_list('status').annotate(n=Count('pk'))))
+    free = fitness_class.capacity - rows['ENROLLED']
+    return EnrollmentStress(
+        workers=workers,
+        requests=totals['requests'],
+        enrolled=rows['ENROLLED'],
+        waitlisted=rows['WAITLISTED'],
+        drops=totals['drops'],
+        retries=totals['retries'],
+        capacity=fitness_class.capacity,
+        overbooked=max(0, -free),
+        stranded=min(max(0, free), rows['WAITLISTED']),
+        consistent=fitness_class.enrolled == rows['ENROLLED'],
+        seconds=seconds,
+    )
+
+
+def format_enrollment_stress(result):
+    rate = result.requests / result.seconds if result.seconds else float('inf')
+    return '\n'.join([
+        f'workers      {result.workers}',
+        f'requests     {result.requests} enroll, {result.drops} drop',
+        f'lock retries {result.retries}',
+        f'throughput   {rate:.0f} enrolls/s over {result.seconds:.2f} s',
+        f'seats        {result.enrolled}/{result.capacity} taken, {result.waitlisted} waitlisted',
+        f'overbooked   {result.overbooked}',
+        f'stranded     {result.stranded}',
+        f'counter      {"consistent" if result.consistent else "DRIFTED"}',
+    ])
+
+
+WriteThroughput = namedtuple('WriteThroughput', 'profile threads attempted committed errors per_second p95_ms')
+
+WRITE_BENCH_ALIAS = 'write_bench'
+
+
+def measure_write_throughput(name, config, threads=8, transactions=200, counters=16, random_seed=0):
+    """
+    Concurrent kiosk-style writes against ``config`` (a DATABASES entry):
+    each of ``threads`` threads runs ``transactions`` transactions that read
+    a counter row, write it back incremented and append an event row, the
+    shape of a checkout. Failed transactions are counted, not retried.
+    The tables are created and dropped around the run.
+    """
+    connections.settings[WRITE_BENCH_ALIAS] = connections.configure_settings(
+        {'default': connections.settings['default'], WRITE_BENCH_ALIAS: dict(config)}
+    )[WRITE_BENCH_ALIAS]
+    setup = connections[WRITE_BENCH_ALIAS]
+    with setup.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS bench_event')
+        cursor.execute('DROP TABLE IF EXISTS bench_counter')
+        cursor.execute('CREATE TABLE bench_counter (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)')
+        cursor.execute('CREATE TABLE bench_event (id INTEGER PRIMARY KEY, counter_id INTEGER NOT NULL, '
+                       'thread INTEGER NOT NULL, sequence INTEGER NOT NULL)')
+        for pk in range(counters):
+            cursor.execute('INSERT INTO bench_counter (id, value) VALUES (%s, 0)', [pk])
+
+    def work(thread):
+        rng = random.Random(random_seed + thread)
+        timings, errors = [], 0
+        try:
+            for sequence in range(transactions):
+                counter = rng.randrange(counters)
+                start = time.perf_counter()
+                try:
+                    with transaction.atomic(using=WRITE_BENCH_ALIAS):
+                        with connections[WRITE_BENCH_ALIAS].cursor() as cursor:
+                            cursor.execute('SELECT value FROM bench_counter WHERE id = %s', [counter])
+                            value = cursor.fetchone()[0]
+                            cursor.execute('UPDATE bench_counter SET value = %s WHERE id = %s', [value + 1, counter])
+                            cursor.execute('INSERT INTO bench_event (counter_id, thread, sequence) '
+                                           'VALUES (%s, %s, %s)', [counter, thread, sequence])
+                except DatabaseError:
+                    errors += 1
+                    continue
+                timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            connections[WRITE_BENCH_ALIAS].close()
+        return timings, errors
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            outcomes = list(pool.map(work, range(threads)))
+        elapsed = time.perf_counter() - started
+        with setup.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*), (SELECT SUM(value) FROM bench_counter) FROM bench_event')
+            committed, total = cursor.fetchone()
+            # Every committed increment must have survived: no lost updates
+            assert committed == total, (committed, total)
+            cursor.execute('DROP TABLE bench_event')
+            cursor.execute('DROP TABLE bench_counter')
+    finally:
+        setup.close()
+        del connections[WRITE_BENCH_ALIAS]
+        del connections.settings[WRITE_BENCH_ALIAS]
+    timings = [ms for thread_timings, _ in outcomes for ms in thread_timings]
+    return WriteThroughput(name, threads, threads * transactions, committed, sum(errors for _, errors in outcomes),
+                           committed / elapsed, percentile(timings, 0.95) if timings else 0)
+
+
+def format_write_table(results):
+    header = f"{'profile':<24}{'threads':>9}{'attempted':>11}{'committed':>11}{'errors':>8}{'tx/s':>9}{'p95 ms':>10}"
+    lines = [header, '-' * len(header)]
+    for r in results:
+        lines.append(f'{r.profile:<24}{r.threads:>9}{r.attempted:>11}{r.committed:>11}{r.errors:>8}'
+                     f'{r.per_second:>9.0f}{r.p95_ms:>10.2f}')
+    return '\n'.join(lines)
@@ -0,0 +1,61 @@
+"""
+Timings of the counseling free-slot search and overlap check, against the
+data set built by ``seeding.seed_schedule()``.
+"""
+import datetime
+import random
+import statistics
+import time
+from collections import namedtuple
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core import scheduling
+from core.models import CounselorAvailability
+
+from .api import percentile
+
+
+SlotTiming = namedtuple('SlotTiming', 'name queries p50_ms p95_ms')
+
+
+def measure_scheduling(repeat=20, count=10, random_seed=0):
+    """Time the free-slot search and the single-counselor overlap check."""
+    rng = random.Random(random_seed)
+    counselors = list(CounselorAvailability.objects.values_list('counselor_id', flat=True).distinct())
+    now = timezone.now()
+
+    def check_random_slot():
+        start, end = scheduling.slot_bounds(now.date() + datetime.timedelta(days=rng.randrange(60)),
+                                            datetime.time(9 + rng.randrange(8)))
+        return scheduling.overlapping(rng.choice(counselors), start, end).exists()
+
+    cases = [
+        ('free_slots (next %d, all counselors)' % count, lambda: scheduling.free_slots(count=count)),
+        ('free_slots (next %d, one counselor)' % count,
+         lambda: scheduling.free_slots(count=count, counselor_ids=[rng.choice(counselors)])),
+        ('free_slots (next %d, a month out)' % count,
+         lambda: scheduling.free_slots(after=now + datetime.timedelta(days=30), count=count)),
+        ('overlap check (one counselor, one slot)', check_random_slot),
+    ]
+    results = []
+    for name, run in cases:
+        timings, queries = [], 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - start) * 1000)
+            queries = max(queries, len(captured))
+        results.append(SlotTiming(name, queries, statistics.median(timings), percentile(timings, 0.95)))
+    return results
+
+
+def format_scheduling_table(results):
+    header = f"{'operation':<44}{'queries':>9}{'p50 ms':>10}{'p95 ms':>10}"
+    lines = [header, '-' * len(header)]
+    for r in results:
+        lines.append(f'{r.name:<44}{r.queries:>9}{r.p50_ms:>10.2f}{r.p95_ms:>10.2f}')
+    return '\n'.join(lines)
@@ -0,0 +1,350 @@
+"""
+Seed data for the query-budget suite and the benchmarks.
+
+``seed()`` fills every routed model through ``bulk_create`` and then
+rebuilds what the model signals would have maintained; ``seed_schedule()``
+and ``seed_timetable()`` build the larger data sets of the scheduling and
+timetable benchmarks.
+"""
+import datetime
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+
+from core import activity, bibliometrics, prerequisites, scheduling, stats, versioning
+from core.models import (
+    Department, AcademicYear, Semester, Course, CourseCompletion, CourseEnrollment, Classroom,
+    TimetableSlot, TimetableEntry, FacultyProfile, Publication, ResearchGrant, ResearchProject,
+    LibraryResource, LibraryBorrowing,
+    Housing, HousingApplication, CounselingAppointment, CounselorAvailability, HealthRecord,
+    FitnessClass, ComplianceReport, Audit
+)
+
+User = get_user_model()
+
+# Rows created per unit of ``scale``; scale=1 gives at least two pages of
+# every list endpoint so per-row queries show up as budget overruns.
+SEED_VOLUMES = {
+    'students': 40,
+    'faculty': 12,
+    'departments': 4,
+    'courses': 30,
+    'classrooms': 10,
+    'exam_slots': 10,
+    'publications_per_faculty': 3,
+    'grants': 20,
+    'projects': 20,
+    'library_resources': 40,
+    'library_borrowings': 80,
+    'housing': 20,
+    'housing_applications': 40,
+    'counseling_appointments': 40,
+    'health_records': 40,
+    'fitness_classes': 12,
+    'compliance_reports': 20,
+    'audits': 20,
+}
+
+
+def seed(scale=1, random_seed=42):
+    """
+    Populate every routed model with ``SEED_VOLUMES * scale`` rows.
+
+    Returns a dict of representative objects used to build endpoint payloads.
+    """
+    rng = random.Random(random_seed)
+    today = datetime.date.today()
+
+    def volume(key):
+        return SEED_VOLUMES[key] * scale
+
+    students_group, _ = Group.objects.get_or_create(name='Students')
+    students = User.objects.bulk_create([
+        User(username=f'student{i}', email=f'student{i}@example.edu',
+             first_name='Student', last_name=str(i), role='student')
+        for i in range(volume('students'))
+    ])
+    students_group.user_set.add(*students)
+    faculty_users = User.objects.bulk_create([
+        User(username=f'faculty{i}', email=f'faculty{i}@example.edu',
+             first_name='Faculty', last_name=str(i), role='faculty')
+        for i in range(volume('faculty'))
+    ])
+    admin = User.objects.create_user(
+        username='bench_admin', email='bench_admin@example.edu',
+        password='bench-pass', role='admin'
+    )
+
+    departments = Department.objects.bulk_create([
+        Department(name=f'Department {i}', code=f'D{i:03d}', head=rng.choice(faculty_users))
+        for i in range(volume('departments'))
+    ])
+
+    academic_years = AcademicYear.objects.bulk_create([
+        AcademicYear(year=f'{2022 + i}-{2023 + i}', is_active=(i == 2),
+                     start_date=datetime.date(2022 + i, 9, 1),
+                     end_date=datetime.date(2023 + i, 8, 31))
+        for i in range(3)
+    ])
+    semesters = Semester.objects.bulk_create([
+        Semester(academic_year=year, name=name,
+                 start_date=year.start_date, end_date=year.end_date,
+                 is_active=(year.is_active and name == 'FALL'))
+        for year in academic_years
+        for name in ('FALL', 'SPRING', 'SUMMER')
+    ])
+
+    courses = Course.objects.bulk_create([
+        Course(code=f'C{i:04d}', name=f'Course {i}', department=rng.choice(departments),
+               credits=rng.choice([2, 3, 4]), description='Seeded course',
+               instructor=rng.choice(faculty_users))
+        for i in range(volume('courses'))
+    ])
+    prerequisite_links = [
+        Course.prerequisites.through(from_course_id=course.pk, to_course_id=prereq.pk)
+        for index, course in enumerate(courses[1:], start=1)
+        for prereq in rng.sample(courses[:index], min(index, 2))
+    ]
+    Course.prerequisites.through.objects.bulk_create(prerequisite_links)
+    CourseCompletion.objects.bulk_create([
+        CourseCompletion(student=student, course=course, grade='B', completed_on=today)
+        for student in students for course in rng.sample(courses, min(len(courses), 5))
+    ])
+
+    # Enrollments and an exam timetable for the first semester
+    teaching = semesters[0]
+    CourseEnrollment.objects.bulk_create([
+        CourseEnrollment(student=student, course=course, semester=teaching)
+        for student in students for course in rng.sample(courses, min(len(courses), 4))
+    ])
+    classrooms = Classroom.objects.bulk_create([
+        Classroom(building=f'Block {i % 3}', room_number=str(200 + i), capacity=rng.choice([30, 60, 120]))
+        for i in range(volume('classrooms'))
+    ])
+    exam_slots = TimetableSlot.objects.bulk_create([
+        TimetableSlot(semester=teaching, kind='EXAM', date=teaching.end_date - datetime.timedelta(days=day),
+                      start_time=datetime.time(9), end_time=datetime.time(12))
+        for day in range(volume('exam_slots'))
+    ])
+    TimetableEntry.objects.bulk_create([
+        TimetableEntry(semester=teaching, kind='EXAM', course=course, slot=exam_slots[i % len(exam_slots)],
+                       classroom=classrooms[i // len(exam_slots)])
+        for i, course in enumerate(courses)
+    ])
+
+    faculty = FacultyProfile.objects.bulk_create([
+        FacultyProfile(user=user, department=rng.choice(departments),
+                       position='Lecturer', office_location=f'Room {i}',
+                       phone='555-0100', joining_date=today - datetime.timedelta(days=365 * 3))
+        for i, user in enumerate(faculty_users)
+    ])
+
+    Publication.objects.bulk_create([
+        Publication(faculty=profile, title=f'Paper {profile.pk}-{j}', journal='Journal of Seeds',
+                    publication_date=today - datetime.timedelta(days=30 * j),
+                    citation_count=rng.randint(0, 200))
+        for profile in faculty
+        for j in range(SEED_VOLUMES['publications_per_faculty'])
+    ])
+
+    ResearchGrant.objects.bulk_create([
+        ResearchGrant(name=f'Grant {i}', description='Seeded grant',
+                      amount=Decimal('10000.00') * (i + 1), deadline=today,
+                      status=rng.choice(ResearchGrant.GRANT_STATUS)[0])
+        for i in range(volume('grants'))
+    ])
+
+    projects = ResearchProject.objects.bulk_create([
+        ResearchProject(title=f'Project {i}', principal_investigator=rng.choice(faculty),
+                        start_date=today, end_date=today + datetime.timedelta(days=365),
+                        budget=Decimal('50000.00'), status=rng.choice(ResearchProject.PROJECT_STATUS)[0],
+                        description='Seeded project')
+        for i in range(volume('projects'))
+    ])
+    ResearchProject.co_investigators.through.objects.bulk_create([
+        ResearchProject.co_investigators.through(researchproject_id=project.pk, facultyprofile_id=member.pk)
+        for project in projects
+        for member in rng.sample(faculty, 3)
+    ])
+
+    resources = LibraryResource.objects.bulk_create([
+        LibraryResource(title=f'Title {i}', author=f'Author {i % 25}',
+                        resource_type=rng.choice(LibraryResource.RESOURCE_TYPE)[0],
+                        isbn=f'978{i:010d}', location=f'Shelf {i % 10}',
+                        available_copies=3, total_copies=3)
+        for i in range(volume('library_resources'))
+    ])
+    LibraryBorrowing.objects.bulk_create([
+        LibraryBorrowing(resource=rng.choice(resources), user=rng.choice(students),
+                         borrow_date=today - datetime.timedelta(days=i % 60),
+                         due_date=today + datetime.timedelta(days=14),
+                         return_date=None if i % 3 else today)
+        for i in range(volume('library_borrowings'))
+    ])
+
+    Housing.objects.bulk_create([
+        Housing(building=f'Hall {i % 4}', room_number=str(100 + i),
+                room_type=rng.choice(Housing.ROOM_TYPE)[0], capacity=2,
+                occupied=rng.randint(0, 2), semester_fee=Decimal('1500.00'))
+        for i in range(volume('housing'))
+    ])
+    HousingApplication.objects.bulk_create([
+        HousingApplication(student=rng.choice(students), preferred_building=f'Hall {i % 4}',
+                           room_type=rng.choice(Housing.ROOM_TYPE)[0],
+                           semester=rng.choice(semesters),
+                           status=rng.choice(HousingApplication.STATUS_CHOICES)[0])
+        for i in range(volume('housing_applications'))
+    ])
+
+    appointments = []
+    for i in range(volume('counseling_appointments')):
+        date, time_ = today + datetime.timedelta(days=i // 8), datetime.time(9 + i % 8)
+        start, end = scheduling.slot_bounds(date, time_)
+        appointments.append(CounselingAppointment(
+            student=rng.choice(students), counselor=rng.choice(faculty_users), date=date, time=time_,
+            start=start, end=end, session_type='IN_PERSON', reason='Seeded appointment',
+        ))
+    CounselingAppointment.objects.bulk_create(appointments)
+    CounselorAvailability.objects.bulk_create([
+        CounselorAvailability(counselor=counselor, weekday=weekday, start_time=datetime.time(9),
+                              end_time=datetime.time(17))
+        for counselor in faculty_users[:3] for weekday in range(5)
+    ])
+    HealthRecord.objects.bulk_create([
+        HealthRecord(student=rng.choice(students), visit_date=today - datetime.timedelta(days=i),
+                     visit_type='Checkup')
+        for i in range(volume('health_records'))
+    ])
+    FitnessClass.objects.bulk_create([
+        FitnessClass(name=f'Class {i}', instructor=f'Coach {i % 3}', schedule='Mon 10:00',
+                     capacity=20, enrolled=rng.randint(0, 20))
+        for i in range(volume('fitness_classes'))
+    ])
+    ComplianceReport.objects.bulk_create([
+        ComplianceReport(title=f'Report {i}', report_type='ANNUAL', generated_by=admin,
+                         start_date=today, end_date=today,
+                         status=rng.choice(ComplianceReport.REPORT_STATUS)[0],
+                         file_path=f'reports/{i}.pdf')
+        for i in range(volume('compliance_reports'))
+    ])
+    Audit.objects.bulk_create([
+        Audit(audit_type='Financial', start_date=today, due_date=today,
+              assigned_to=rng.choice(departments), status=rng.choice(Audit.AUDIT_STATUS)[0])
+        for i in range(volume('audits'))
+    ])
+
+    # bulk_create bypasses the model signals, as any bulk load would
+    stats.refresh_snapshot()
+    activity.backfill()
+    prerequisites.rebuild()
+    bibliometrics.rebuild()
+    versioning.bump(*versioning.VERSIONED_MODELS)
+
+    return {
+        'admin': admin,
+        'students': students,
+        'faculty_users': faculty_users,
+        'faculty': faculty,
+        'departments': departments,
+        'academic_years': academic_years,
+        'semesters': semesters,
+        'courses': courses,
+        'resources': resources,
+    }
+
+
+def seed_schedule(counselors=300, days=100, fill=0.9, random_seed=42):
+    """
+    Give ``counselors`` new counselors weekday 09:00-17:00 availability and
+    book ``fill`` of their slots for the next ``days`` days. Returns the
+    number of appointments created.
+    """
+    rng = random.Random(random_seed)
+    student = User.objects.create(username='schedule_student', email='schedule_student@example.edu')
+    staff = User.objects.bulk_create([
+        User(username=f'counselor{i}', email=f'counselor{i}@example.edu', role='faculty')
+        for i in range(counselors)
+    ])
+    CounselorAvailability.objects.bulk_create([
+        CounselorAvailability(counselor=counselor, weekday=weekday, start_time=datetime.time(9),
+                              end_time=datetime.time(17))
+        for counselor in staff for weekday in range(5)
+    ])
+    today = datetime.date.today()
+    booked = 0
+    for offset in range(days):
+        date = today + datetime.timedelta(days=offset)
+        if date.weekday() >= 5:
+            continue
+        appointments = []
+        for counselor in staff:
+            for start in scheduling.window_slots(date, datetime.time(9), datetime.time(17)):
+                if rng.random() < fill:
+                    appointments.append(CounselingAppointment(
+                        student=student, counselor=counselor, date=date, time=start.time(),
+                        start=start, end=start + scheduling.SLOT_LENGTH, session_type='IN_PERSON',
+                        reason='Seeded appointment',
+                    ))
+        CounselingAppointment.objects.bulk_create(appointments, batch_size=1000)
+        booked += len(appointments)
+    return booked
+
+
+def seed_timetable(courses=3000, students=25000, per_student=5, programme_size=50, rooms=120, random_seed=42):
+    """
+    A synthetic semester for the timetable solver. Courses form programmes
+    of ``programme_size``; each student takes ``per_student`` courses, all
+    but one from their own programme, with popular courses more likely.
+    Lecturers teach three courses each. The semester gets 45 class slots
+    (weekdays, 09:00-18:00 hourly), 45 exam sittings (15 days, three a day)
+    and ``rooms`` classrooms of 30 to 600 seats. Returns the semester.
+    """
+    rng = random.Random(random_seed)
+    year = AcademicYear.objects.create(year='2040-2041', start_date=datetime.date(2040, 9, 1),
+                                       end_date=datetime.date(2041, 8, 31))
+    semester = Semester.objects.create(academic_year=year, name='FALL', start_date=year.start_date,
+                                       end_date=datetime.date(2040, 12, 20))
+    department = Department.objects.create(name='Timetabling', code='TT')
+    lecturers = User.objects.bulk_create([
+        User(username=f'lecturer{i}', email=f'lecturer{i}@example.edu', role='faculty')
+        for i in range(-(-courses // 3))
+    ])
+    catalogue = Course.objects.bulk_create([
+        Course(code=f'T{i:05d}', name=f'Timetabled {i}', department=department, credits=3,
+               description='Seeded course', instructor=lecturers[i // 3])
+        for i in range(courses)
+    ], batch_size=1000)
+    learners = User.objects.bulk_create([
+        User(username=f'learner{i}', email=f'learner{i}@example.edu', role='student')
+        for i in range(students)
+    ], batch_size=1000)
+
+    programmes = [catalogue[i:i + programme_size] for i in range(0, courses, programme_size)]
+    # Earlier courses of a programme are its core courses and draw more students
+    weights = [1 / (rank + 1) for rank in range(programme_size)]
+    enrollments = []
+    for student in learners:
+        programme = rng.choice(programmes)
+        chosen = set()
+        while len(chosen) < min(per_student - 1, len(programme)):
+            chosen.add(rng.choices(programme, weights[:len(programme)])[0])
+        chosen.add(rng.choice(catalogue))
+        enrollments.extend(CourseEnrollment(student=student, course=course, semester=semester) for course in chosen)
+    CourseEnrollment.objects.bulk_create(enrollments, batch_size=2000)
+
+    TimetableSlot.objects.bulk_create([
+        TimetableSlot(semester=semester, kind='CLASS', weekday=weekday,
+                      start_time=datetime.time(hour), end_time=datetime.time(hour, 50))
+        for weekday in range(5) for hour in range(9, 18)
+    ] + [
+        TimetableSlot(semester=semester, kind='EXAM', date=datetime.date(2040, 12, 1) + datetime.timedelta(days=day),
+                      start_time=datetime.time(hour), end_time=datetime.time(hour + 2))
+        for day in range(15) for hour in (9, 13, 16)
+    ])
+    Classroom.objects.bulk_create([
+        Classroom(building=f'Block {i % 6}', room_number=str(100 + i), capacity=rng.choice([30, 60, 120, 300, 600]))
+        for i in range(rooms)
+    ])
+    return semester
@@ -0,0 +1,257 @@
+"""
+Serving-path benchmarks: token authentication with and without the cache,
+the WSGI and ASGI entry points under concurrent load, and JSON rendering
+and compression of the API's responses.
+"""
+import asyncio
+import gzip
+import statistics
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from wsgiref.util import setup_testing_defaults
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from core import authentication, fastjson, middleware, parallel, response_cache
+
+from .api import API_ROOT, count_rows, percentile
+
+User = get_user_model()
+
+
+AuthTiming = namedtuple('AuthTiming', 'name requests queries_per_request p50_ms p95_ms')
+
+
+def measure_token_auth(requests=500, users=20, path=f'{API_ROOT}departments/'):
+    """
+    Send ``requests`` token-authenticated GETs to ``path``, round-robin over
+    ``users`` tokens, with DRF's TokenAuthentication and then with
+    CachedTokenAuthentication, and report queries and latency per request.
+    """
+    keys = [
+        Token.objects.create(user=User.objects.create_user(
+            f'token-bench-{i}', email=f'token-bench-{i}@uni.example', role='student'
+        )).key
+        for i in range(users)
+    ]
+    results = []
+    for name, authenticator in (('TokenAuthentication', TokenAuthentication),
+                                ('CachedTokenAuthentication', authentication.CachedTokenAuthentication)):
+        authentication.token_cache.clear()
+        client = APIClient()
+        timings, queries = [], 0
+        with mock.patch.object(APIView, 'authentication_classes', [authenticator]):
+            for i in range(requests):
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = client.get(path, HTTP_AUTHORIZATION=f'Token {keys[i % users]}')
+                    timings.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.status_code
+                queries += len(captured)
+        results.append(AuthTiming(name, requests, queries / requests,
+                                  statistics.median(timings), percentile(timings, 0.95)))
+    return results
+
+
+def format_auth_table(results):
+    header = f"{'authentication':<28}{'requests':>10}{'queries/req':>13}{'p50 ms':>10}{'p95 ms':>10}"
+    lines = [header, '-' * len(header)]
+    for r in results:
+        lines.append(f'{r.name:<28}{r.requests:>10}{r.queries_per_request:>13.2f}{r.p50_ms:>10.2f}{r.p95_ms:>10.2f}')
+    return '\n'.join(lines)
+
+
+LoadResult = namedtuple('LoadResult', 'endpoint entry_point fan_out requests concurrency p50_ms p95_ms per_second errors')
+
+
+def _wsgi_get(application, path, token):
+    environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'HTTP_AUTHORIZATION': f'Token {token}',
+               'SERVER_NAME': 'testserver'}
+    setup_testing_defaults(environ)
+    statuses = []
+    b''.join(application(environ, lambda status, headers, exc_info=None: statuses.append(status)))
+    return int(statuses[0].split()[0])
+
+
+async def _asgi_get(application, path, token):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'authorization', f'Token {token}'.encode())],
+        'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+    body_sent = False
+    messages = []
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # No disconnect: the handler's listener waits until the response is done
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    return messages[0]['status']
+
+
+def _summarise(endpoint, entry_point, fan_out, outcomes, concurrency, elapsed):
+    timings = [ms for ms, _ in outcomes]
+    return LoadResult(endpoint, entry_point, fan_out, len(outcomes), concurrency, statistics.median(timings),
+                      percentile(timings, 0.95), len(outcomes) / elapsed,
+                      sum(1 for _, status in outcomes if status != 200))
+
+
+def load_wsgi(target, requests, concurrency):
+    """``requests`` GETs of ``target(i) -> (path, token)`` through the WSGI handler from ``concurrency`` threads."""
+    from erp4uni.wsgi import application
+
+    def one(i):
+        path, token = target(i)
+        start = time.perf_counter()
+        status = _wsgi_get(application, path, token)
+        return (time.perf_counter() - start) * 1000, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, range(requests)))
+    return outcomes, time.perf_counter() - started
+
+
+def load_asgi(target, requests, concurrency):
+    """The same load through the ASGI handler, with ``concurrency`` requests in flight on one event loop."""
+    from erp4uni.asgi import application
+
+    async def run():
+        in_flight = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            path, token = target(i)
+            async with in_flight:
+                start = time.perf_counter()
+                status = await _asgi_get(application, path, token)
+                return (time.perf_counter() - start) * 1000, status
+
+        return await asyncio.gather(*(one(i) for i in range(requests)))
+
+    started = time.perf_counter()
+    outcomes = asyncio.run(run())
+    return outcomes, time.perf_counter() - started
+
+
+def measure_entry_points(data, requests=400, concurrency=16):
+    """
+    WSGI against ASGI latency and throughput under ``concurrency``
+    simultaneous clients, for the student overview (with its queries run
+    one after another and side by side) and the dashboard feeds.
+    """
+    students = data['students']
+    tokens = [Token.objects.get_or_create(user=student)[0].key for student in students]
+    targets = [
+        ('users/<id>/overview/', True,
+         lambda i: (f'{API_ROOT}users/{students[i % len(students)].pk}/overview/', tokens[i % len(students)])),
+        ('stats/', False, lambda i: (f'{API_ROOT}stats/', tokens[i % len(students)])),
+        ('recent-activities/', False, lambda i: (f'{API_ROOT}recent-activities/', tokens[i % len(students)])),
+    ]
+    results = []
+    for endpoint, fans_out, target in targets:
+        for fan_out in ((False, True) if fans_out else (False,)):
+            with mock.patch.object(parallel, 'WORKERS', parallel.WORKERS if fan_out else 1):
+                for entry_point, load in (('wsgi', load_wsgi), ('asgi', load_asgi)):
+                    outcomes, elapsed = load(target, requests, concurrency)
+                    results.append(_summarise(endpoint, entry_point, fan_out, outcomes, concurrency, elapsed))
+    return results
+
+
+def format_load_table(results):
+    header = (f"{'endpoint':<24}{'entry':>7}{'fan-out':>9}{'requests':>10}{'clients':>9}"
+              f"{'p50 ms':>10}{'p95 ms':>10}{'req/s':>9}{'errors':>8}")
+    lines = [header, '-' * len(header)]
+    for r in results:
+        lines.append(f"{r.endpoint:<24}{r.entry_point:>7}{'yes' if r.fan_out else 'no':>9}{r.requests:>10}"
+                     f"{r.concurrency:>9}{r.p50_ms:>10.2f}{r.p95_ms:>10.2f}{r.per_second:>9.0f}{r.errors:>8}")
+    return '\n'.join(lines)
+
+
+RenderTiming = namedtuple(
+    'RenderTiming', 'endpoint rows stdlib_ms fast_ms identical raw_bytes gzip_bytes brotli_bytes wire_bytes'
+)
+
+
+def _encode_ms(render, data, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render(data)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def measure_rendering(client, endpoints, repeat=20, page_size=100):
+    """
+    For each GET endpoint, the median time to encode its response data with
+    DRF's stdlib JSONRenderer and with FastJSONRenderer, whether the bytes
+    match, and the body size raw, gzipped, brotli-compressed (when the
+    package is installed) and as CompressionMiddleware would send it to a
+    client accepting both. Lists are fetched ``page_size`` rows at a time.
+    """
+    stdlib, fast = JSONRenderer(), fastjson.FastJSONRenderer()
+    results = []
+    for endpoint in endpoints:
+        if endpoint.method != 'get':
+            continue
+        path = endpoint.path
+        if endpoint.name.endswith(':list'):
+            path = f'{path}?page_size={page_size}'
+        # Cached responses carry only their rendered body
+        caches[response_cache.response_cache.alias].clear()
+        response = client.get(path, HTTP_ACCEPT='application/json')
+        assert response.status_code == 200, (endpoint.name, response.status_code)
+        data = response.data
+        body = stdlib.render(data)
+        gzipped = len(gzip.compress(body, compresslevel=6))
+        brotli_bytes = None
+        if middleware.brotli is not None:
+            brotli_bytes = len(middleware.brotli.compress(body, quality=middleware.CompressionMiddleware.brotli_quality))
+        if len(body) < middleware.CompressionMiddleware.min_length:
+            wire = len(body)
+        else:
+            wire = min(len(body), brotli_bytes or gzipped)
+        results.append(RenderTiming(
+            endpoint=endpoint.name,
+            rows=count_rows(data),
+            stdlib_ms=_encode_ms(stdlib.render, data, repeat),
+            fast_ms=_encode_ms(fast.render, data, repeat),
+            identical=fast.render(data) == body,
+            raw_bytes=len(body),
+            gzip_bytes=gzipped,
+            brotli_bytes=brotli_bytes,
+            wire_bytes=wire,
+        ))
+    return results
+
+
+def format_render_table(results):
+    header = (f"{'endpoint':<36}{'rows':>6}{'stdlib ms':>11}{'orjson ms':>11}{'speedup':>9}{'same':>6}"
+              f"{'bytes':>9}{'gzip':>8}{'br':>8}{'wire':>8}")
+    lines = [header, '-' * len(header)]
+    for r in results:
+        speedup = r.stdlib_ms / r.fast_ms if r.fast_ms else 0
+        brotli_bytes = '-' if r.brotli_bytes is None else r.brotli_bytes
+        lines.append(f"{r.endpoint:<36}{r.rows:>6}{r.stdlib_ms:>11.3f}{r.fast_ms:>11.3f}{speedup:>8.1f}x"
+                     f"{'yes' if r.identical else 'NO':>6}{r.raw_bytes:>9}{r.gzip_bytes:>8}{brotli_bytes:>8}"
+                     f"{r.wire_bytes:>8}")
+    return '\n'.join(lines)
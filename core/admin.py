@@ -1,10 +1,11 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from .models import (
-    User, Department, AcademicYear, Semester, Course, FacultyProfile,
+    User, Department, AcademicYear, Semester, Course, CourseCompletion, CourseEnrollment, Classroom,
+    TimetableSlot, TimetableEntry, FacultyProfile,
     Publication, ResearchGrant, ResearchProject, LibraryResource,
     LibraryBorrowing, Housing, HousingApplication, CounselingAppointment,
-    HealthRecord, FitnessClass, ComplianceReport, Audit
+    CounselorAvailability, HealthRecord, FitnessClass, FitnessEnrollment, ComplianceReport, Audit
 )
 
 @admin.register(User)
@@ -40,6 +41,35 @@ class CourseAdmin(admin.ModelAdmin):
     search_fields = ('code', 'name')
     filter_horizontal = ('prerequisites',)
 
+@admin.register(CourseCompletion)
+class CourseCompletionAdmin(admin.ModelAdmin):
+    list_display = ('student', 'course', 'grade', 'completed_on')
+    list_filter = ('grade',)
+    search_fields = ('student__username', 'course__code')
+
+@admin.register(CourseEnrollment)
+class CourseEnrollmentAdmin(admin.ModelAdmin):
+    list_display = ('student', 'course', 'semester', 'created_at')
+    list_filter = ('semester',)
+    search_fields = ('student__username', 'course__code')
+
+@admin.register(Classroom)
+class ClassroomAdmin(admin.ModelAdmin):
+    list_display = ('building', 'room_number', 'capacity')
+    list_filter = ('building',)
+    search_fields = ('building', 'room_number')
+
+@admin.register(TimetableSlot)
+class TimetableSlotAdmin(admin.ModelAdmin):
+    list_display = ('semester', 'kind', 'weekday', 'date', 'start_time', 'end_time')
+    list_filter = ('semester', 'kind')
+
+@admin.register(TimetableEntry)
+class TimetableEntryAdmin(admin.ModelAdmin):
+    list_display = ('course', 'semester', 'kind', 'slot', 'classroom')
+    list_filter = ('semester', 'kind')
+    search_fields = ('course__code',)
+
 @admin.register(FacultyProfile)
 class FacultyProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'department', 'position', 'joining_date')
@@ -95,6 +125,12 @@ class CounselingAppointmentAdmin(admin.ModelAdmin):
     list_filter = ('session_type', 'status', 'date')
     search_fields = ('student__username', 'counselor__username')
 
+@admin.register(CounselorAvailability)
+class CounselorAvailabilityAdmin(admin.ModelAdmin):
+    list_display = ('counselor', 'weekday', 'start_time', 'end_time', 'valid_from', 'valid_until')
+    list_filter = ('weekday',)
+    search_fields = ('counselor__username',)
+
 @admin.register(HealthRecord)
 class HealthRecordAdmin(admin.ModelAdmin):
     list_display = ('student', 'visit_date', 'visit_type')
@@ -107,6 +143,12 @@ class FitnessClassAdmin(admin.ModelAdmin):
     list_filter = ('instructor',)
     search_fields = ('name', 'instructor')
 
+@admin.register(FitnessEnrollment)
+class FitnessEnrollmentAdmin(admin.ModelAdmin):
+    list_display = ('student', 'fitness_class', 'status', 'created_at')
+    list_filter = ('status', 'fitness_class')
+    search_fields = ('student__username', 'fitness_class__name')
+
 @admin.register(ComplianceReport)
 class ComplianceReportAdmin(admin.ModelAdmin):
     list_display = ('title', 'report_type', 'generated_by', 'generated_on', 'status')
@@ -1,6 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        from . import search, signals  # noqa: F401
+        post_migrate.connect(search.repair_index, sender=self, dispatch_uid='library_search_repair')
@@ -0,0 +1,94 @@
+"""
+Token authentication with an in-process cache of token -> user lookups.
+
+DRF's TokenAuthentication joins Token and User on every request.
+CachedTokenAuthentication keeps the resolved token in a bounded LRU for
+``API_TOKEN_CACHE_SECONDS``, so repeat requests with the same token skip
+the database. core.signals evicts a token when it is deleted and every
+token of a user when the user is saved (deactivated, role changed) or
+deleted.
+
+The cache lives in each worker process, so a change made through another
+process, or through ``QuerySet.update()``, is seen there once the entry
+expires; keep the TTL short. A TTL or size of 0 turns caching off.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenCache:
+    """Least-recently-used token key -> Token entries, each expiring ``ttl`` seconds after it was stored."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = self.misses = 0
+        # Bumped by every eviction, so a lookup that raced one is not stored
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, token, generation):
+        """Store ``token`` unless an eviction happened since ``generation`` was read."""
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (token, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self.generation += 1
+            self._entries.pop(key, None)
+
+    def discard_user(self, user_id):
+        with self._lock:
+            self.generation += 1
+            for key in [key for key, (token, _) in self._entries.items() if token.user_id == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+token_cache = TokenCache(settings.API_TOKEN_CACHE_SIZE, settings.API_TOKEN_CACHE_SECONDS)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that answers repeat tokens from ``token_cache``."""
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is None:
+            generation = token_cache.generation
+            _, token = super().authenticate_credentials(key)
+            token_cache.set(key, token, generation)
+        # Each request gets its own user object to set attributes on
+        return copy.copy(token.user), token
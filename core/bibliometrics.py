@@ -0,0 +1,237 @@
+"""
+Publication metrics per faculty member, per department and for the whole
+university: publication count, total citations, h-index and publications
+per year, kept in PublicationMetrics so ``publications/metrics/`` reads
+stored rows instead of every publication.
+
+A save or delete of one Publication moves that publication's contribution
+(its citations and year) out of the scopes it was counted in and into the
+scopes it belongs to now, via ``apply()``. Counts and sums shift by the
+contribution. One publication arriving, leaving or changing its citation
+count moves an h-index by at most one, and only when its citations cross
+the current value, so the new value is settled with at most one indexed
+COUNT per scope, and usually none.
+
+Writes that bypass the model signals (bulk endpoints), faculty moving
+department and the backfill recompute the affected scopes from their
+publications with ``refresh()`` and ``rebuild()``.
+"""
+from collections import Counter, defaultdict, namedtuple
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from . import signals
+from .models import Department, FacultyProfile, Publication, PublicationMetrics
+
+FACULTY, DEPARTMENT, UNIVERSITY = PublicationMetrics.FACULTY, PublicationMetrics.DEPARTMENT, PublicationMetrics.UNIVERSITY
+
+BATCH_SIZE = 1000
+
+# What one publication adds to the scopes it is counted in
+Contribution = namedtuple('Contribution', 'faculty_id department_id citations year')
+
+FIELDS = ('faculty_id', 'faculty__department_id', 'citation_count', 'publication_date')
+
+
+def contribution(faculty_id, department_id, citations, publication_date):
+    return Contribution(faculty_id, department_id, citations, publication_date.year)
+
+
+def stored_contribution(publication_id):
+    """The contribution of the publication as currently saved, or None."""
+    row = Publication.objects.filter(pk=publication_id).values_list(*FIELDS).first()
+    return contribution(*row) if row else None
+
+
+def _scopes(item):
+    if item is None:
+        return []
+    scopes = [(FACULTY, item.faculty_id)]
+    if item.department_id is not None:
+        scopes.append((DEPARTMENT, item.department_id))
+    scopes.append((UNIVERSITY, None))
+    return scopes
+
+
+def _lookup(scope, key):
+    if scope == FACULTY:
+        return {'scope': scope, 'faculty_id': key}
+    if scope == DEPARTMENT:
+        return {'scope': scope, 'department_id': key}
+    return {'scope': scope}
+
+
+def _publications(scope, key):
+    if scope == FACULTY:
+        return Publication.objects.filter(faculty_id=key)
+    if scope == DEPARTMENT:
+        return Publication.objects.filter(faculty__department_id=key)
+    return Publication.objects.all()
+
+
+def settle_h_index(publications, h, leaving=None, arriving=None):
+    """
+    The h-index of ``publications`` given that it was ``h`` before
+    ``leaving`` went and ``arriving`` came (one publication, or the old and
+    new state of one). Only a change that crosses ``h`` needs a COUNT.
+    """
+    def at_least(item, cited):
+        return item is not None and item.citations >= cited
+
+    if at_least(arriving, h + 1) and not at_least(leaving, h + 1):
+        if publications.filter(citation_count__gte=h + 1)[:h + 1].count() == h + 1:
+            return h + 1
+    elif h and at_least(leaving, h) and not at_least(arriving, h):
+        if publications.filter(citation_count__gte=h)[:h].count() < h:
+            return h - 1
+    return h
+
+
+def h_index(citations):
+    """The largest h such that h of ``citations`` are at least h."""
+    ranked = sorted(citations, reverse=True)
+    return sum(1 for rank, cited in enumerate(ranked, 1) if cited >= rank)
+
+
+def apply(old, new):
+    """
+    Move one publication's contribution from ``old`` to ``new``: None for
+    a publication being created or deleted.
+    """
+    if old == new:
+        return
+    before, after = _scopes(old), _scopes(new)
+    with transaction.atomic(), signals.coalesce_writes():
+        for scope in dict.fromkeys(before + after):
+            _shift(*scope, old if scope in before else None, new if scope in after else None)
+        signals.tables_written((PublicationMetrics,))
+
+
+def _shift(scope, key, leaving, arriving):
+    lookup = _lookup(scope, key)
+    row = PublicationMetrics.objects.select_for_update().filter(**lookup).first()
+    if row is None:
+        if arriving is None:
+            # Nothing recorded for the scope, e.g. its row went first in a cascading delete
+            return
+        row, _ = PublicationMetrics.objects.get_or_create(**lookup)
+    per_year = Counter(row.per_year)
+    for item, sign in ((leaving, -1), (arriving, 1)):
+        if item is not None:
+            row.publications += sign
+            row.citations += sign * item.citations
+            per_year[str(item.year)] += sign
+    PublicationMetrics.objects.filter(pk=row.pk).update(
+        publications=row.publications,
+        citations=row.citations,
+        h_index=settle_h_index(_publications(scope, key), row.h_index, leaving, arriving),
+        per_year={year: count for year, count in sorted(per_year.items()) if count},
+        updated_at=timezone.now(),
+    )
+
+
+def _summaries(rows):
+    """Metric field values per scope from ``(scope, citations, year)`` rows."""
+    citations = defaultdict(list)
+    years = defaultdict(Counter)
+    for scope, cited, year in rows:
+        citations[scope].append(cited)
+        years[scope][str(year)] += 1
+    return {
+        scope: {
+            'publications': len(cited),
+            'citations': sum(cited),
+            'h_index': h_index(cited),
+            'per_year': dict(sorted(years[scope].items())),
+        }
+        for scope, cited in citations.items()
+    }
+
+
+def _university_summary():
+    """The university row from aggregates; the h-index walks the citation index only as far as h."""
+    totals = Publication.objects.aggregate(publications=Count('pk'), citations=Sum('citation_count'))
+    h = 0
+    ranked = Publication.objects.order_by('-citation_count').values_list('citation_count', flat=True)
+    for rank, cited in enumerate(ranked.iterator(chunk_size=BATCH_SIZE), 1):
+        if cited < rank:
+            break
+        h = rank
+    per_year = Publication.objects.order_by().values_list('publication_date__year').annotate(count=Count('pk'))
+    return {
+        'publications': totals['publications'],
+        'citations': totals['citations'] or 0,
+        'h_index': h,
+        'per_year': {str(year): count for year, count in sorted(per_year)},
+    }
+
+
+def _write(scopes, summaries, existing):
+    """Replace the ``existing`` rows with one per scope in ``scopes``; scopes without publications get zeros."""
+    existing.delete()
+    PublicationMetrics.objects.bulk_create([
+        PublicationMetrics(**_lookup(scope, key), **summaries.get((scope, key), {}))
+        for scope, key in scopes
+    ], batch_size=BATCH_SIZE)
+    signals.tables_written((PublicationMetrics,))
+    return len(scopes)
+
+
+@transaction.atomic
+def refresh(faculty_ids=(), department_ids=()):
+    """
+    Recompute the given faculty members, their departments, the given
+    departments and the university from their publications. Returns the
+    number of rows written.
+    """
+    faculty_ids = set(FacultyProfile.objects.filter(pk__in=set(faculty_ids)).values_list('pk', flat=True))
+    department_ids = set(department_ids) | set(FacultyProfile.objects.filter(
+        pk__in=faculty_ids, department__isnull=False
+    ).values_list('department_id', flat=True))
+    # Departments deleted meanwhile have no row to keep
+    department_ids = set(Department.objects.filter(pk__in=department_ids - {None}).values_list('pk', flat=True))
+
+    rows = []
+    if faculty_ids:
+        for faculty_id, _, cited, date in Publication.objects.filter(faculty_id__in=faculty_ids).values_list(*FIELDS):
+            rows.append(((FACULTY, faculty_id), cited, date.year))
+    if department_ids:
+        for _, department_id, cited, date in Publication.objects.filter(
+            faculty__department_id__in=department_ids
+        ).values_list(*FIELDS):
+            rows.append(((DEPARTMENT, department_id), cited, date.year))
+    summaries = _summaries(rows)
+    summaries[UNIVERSITY, None] = _university_summary()
+    scopes = ([(FACULTY, pk) for pk in sorted(faculty_ids)]
+              + [(DEPARTMENT, pk) for pk in sorted(department_ids)]
+              + [(UNIVERSITY, None)])
+    existing = PublicationMetrics.objects.filter(
+        Q(scope=FACULTY, faculty_id__in=faculty_ids) | Q(scope=DEPARTMENT, department_id__in=department_ids)
+        | Q(scope=UNIVERSITY)
+    )
+    with signals.coalesce_writes():
+        return _write(scopes, summaries, existing)
+
+
+@transaction.atomic
+def rebuild():
+    """
+    Recompute every faculty member, department and the university in one
+    pass over the publications. Returns the number of rows written.
+    """
+    rows = []
+    for faculty_id, department_id, cited, date in Publication.objects.values_list(*FIELDS).iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        rows.append(((FACULTY, faculty_id), cited, date.year))
+        if department_id is not None:
+            rows.append(((DEPARTMENT, department_id), cited, date.year))
+    summaries = _summaries(rows)
+    summaries[UNIVERSITY, None] = _university_summary()
+    scopes = ([(FACULTY, pk) for pk in FacultyProfile.objects.order_by('pk').values_list('pk', flat=True)]
+              + [(DEPARTMENT, pk) for pk in Department.objects.order_by('pk').values_list('pk', flat=True)]
+              + [(UNIVERSITY, None)])
+    with signals.coalesce_writes():
+        return _write(scopes, summaries, PublicationMetrics.objects.all())
@@ -0,0 +1,304 @@
+"""
+List-payload bulk create, partial update and delete for ModelViewSets.
+
+A batch is validated in one pass (primary-key relations for the whole
+batch are resolved with one query per related model, and unique fields
+and unique-together sets are checked within the batch and then with one
+query each) and written with ``bulk_create``/``bulk_update`` in a single
+transaction. Any invalid item
+rejects the batch; the response lists errors per item, in payload order.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import ManyToManyField, Model
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ErrorDetail, ValidationError
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
+
+from . import activity, stats
+from .signals import coalesce_writes, tables_written
+
+
+def _relations(serializer):
+    """Yield ``(name, relation, many)`` for each writable primary-key relation."""
+    for name, field in serializer.fields.items():
+        if field.read_only:
+            continue
+        if isinstance(field, ManyRelatedField) and isinstance(field.child_relation, PrimaryKeyRelatedField):
+            yield name, field.child_relation, True
+        elif isinstance(field, PrimaryKeyRelatedField):
+            yield name, field, False
+
+
+def preload_relations(serializer, items):
+    """
+    Resolve every primary key referenced by ``items`` up front so
+    validating the batch does not query once per item and relation.
+    """
+    for name, relation, many in _relations(serializer):
+        queryset = relation.get_queryset()
+        to_python = queryset.model._meta.pk.to_python
+        wanted = set()
+        for item in items:
+            if not isinstance(item, dict) or item.get(name) is None:
+                continue
+            for value in (item[name] if many and isinstance(item[name], list) else [item[name]]):
+                try:
+                    wanted.add(to_python(value))
+                except Exception:
+                    pass
+        found = queryset.in_bulk(wanted)
+        relation.to_internal_value = _cached_lookup(relation, found, to_python)
+
+
+def _cached_lookup(relation, found, to_python):
+    def to_internal_value(data):
+        if isinstance(data, bool):
+            relation.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            instance = found.get(to_python(data))
+        except Exception:
+            relation.fail('incorrect_type', data_type=type(data).__name__)
+        if instance is None:
+            relation.fail('does_not_exist', pk_value=data)
+        return instance
+    return to_internal_value
+
+
+def _unique_checks(serializer):
+    """
+    Yield ``(error_key, sources, validator)`` for each unique field and each
+    unconditional unique-together set of the serializer, removing the
+    validators so items are not each checked with their own query.
+    """
+    for name, field in serializer.fields.items():
+        if field.read_only:
+            continue
+        for validator in field.validators:
+            if isinstance(validator, UniqueValidator) and validator.lookup == 'exact':
+                field.validators = [v for v in field.validators if v is not validator]
+                yield name, (field.source_attrs[-1],), validator
+                break
+    kept = []
+    for validator in serializer.validators:
+        if (isinstance(validator, UniqueTogetherValidator)
+                and not validator.condition_fields and validator.condition is None):
+            sources = tuple(serializer.fields[name].source for name in validator.fields)
+            yield api_settings.NON_FIELD_ERRORS_KEY, sources, validator
+        else:
+            kept.append(validator)
+    serializer.validators = kept
+
+
+def _identity(value):
+    return value.pk if isinstance(value, Model) else value
+
+
+def check_unique(unique, validated, errors, instances):
+    """
+    Add an error to each item whose unique value (or set of values) repeats
+    an earlier item's or belongs to a stored row other than the one the item
+    updates. ``instances`` holds the row each item updates, None for
+    creates; values an update leaves out are taken from its row.
+    """
+    for key, sources, validator in unique:
+        if isinstance(validator, UniqueTogetherValidator):
+            message = validator.message.format(field_names=', '.join(validator.fields))
+        else:
+            message = validator.message
+        first = {}
+        for index, data in enumerate(validated):
+            if data is None:
+                continue
+            value = tuple(_identity(data[source] if source in data else getattr(instances[index], source, None))
+                          for source in sources)
+            if None in value:
+                continue
+            if value in first:
+                errors[index] = {**errors[index], key: [
+                    ErrorDetail(f'Repeats the value of item {first[value]}.', code='unique')
+                ]}
+            else:
+                first[value] = index
+        if not first:
+            continue
+        # One query per check: narrow by each column, then match whole tuples
+        rows = validator.queryset.filter(**{
+            f'{source}__in': {value[position] for value in first} for position, source in enumerate(sources)
+        }).values_list(*sources, 'pk')
+        taken = {row[:-1]: row[-1] for row in rows}
+        for value, index in first.items():
+            instance = instances[index]
+            if value in taken and (instance is None or instance.pk != taken[value]):
+                errors[index] = {**errors[index], key: [ErrorDetail(message, code='unique')]}
+
+
+class BulkModelMixin:
+    """
+    Adds ``<prefix>/bulk/`` to a ModelViewSet:
+
+    * ``POST`` a list of objects to create them;
+    * ``PATCH`` a list of objects carrying ``id`` to partially update them;
+    * ``DELETE`` with ``{"ids": [...]}`` to delete them.
+    """
+    bulk_max_items = settings.API_BULK_MAX_ITEMS
+    bulk_batch_size = 500
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+    def bulk(self, request, *args, **kwargs):
+        if request.method == 'DELETE':
+            return self.bulk_destroy(request)
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError({'non_field_errors': ['Expected a non-empty list of items.']})
+        if len(items) > self.bulk_max_items:
+            raise ValidationError({'non_field_errors': [
+                f'At most {self.bulk_max_items} items may be sent in one request.'
+            ]})
+        if request.method == 'POST':
+            return self.bulk_create(items)
+        return self.bulk_update(items)
+
+    def bulk_validate(self, items, instances=None):
+        """Validate ``items``; returns validated data or raises with per-item errors."""
+        serializer = self.get_serializer(partial=instances is not None)
+        preload_relations(serializer, items)
+        unique = list(_unique_checks(serializer))
+        validated, errors, targets = [], [], []
+        for item in items:
+            if instances is not None:
+                pk = self._clean_ids(self.queryset.model, [item.get('id')]) if isinstance(item, dict) else []
+                serializer.instance = instances.get(pk[0]) if pk else None
+                targets.append(serializer.instance)
+                if serializer.instance is None:
+                    validated.append(None)
+                    errors.append({'id': ['Not found.']})
+                    continue
+            else:
+                targets.append(None)
+            try:
+                validated.append(serializer.run_validation(item))
+                errors.append({})
+            except ValidationError as exc:
+                validated.append(None)
+                errors.append(exc.detail)
+        check_unique(unique, validated, errors, targets)
+        if any(errors):
+            raise ValidationError({'errors': errors})
+        return validated
+
+    def bulk_create(self, items):
+        model = self.queryset.model
+        validated = self.bulk_validate(items)
+        m2m_fields = self._m2m_fields(model)
+        objects = []
+        m2m_values = []
+        for data in validated:
+            related = {name: data.pop(name) for name in m2m_fields if name in data}
+            objects.append(model(**data))
+            m2m_values.append(related)
+        with transaction.atomic(), coalesce_writes():
+            model.objects.bulk_create(objects, batch_size=self.bulk_batch_size)
+            self._bulk_set_m2m(model, objects, m2m_values)
+            if model in activity.ACTIVITY_SOURCES:
+                activity.record_many(objects)
+            tables_written((model,), stats.delta(after=objects))
+        return Response(self._bulk_results(model, objects), status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, items):
+        model = self.queryset.model
+        instances = self.get_queryset().in_bulk(self._clean_ids(model, [
+            item.get('id') for item in items if isinstance(item, dict)
+        ]))
+        validated = self.bulk_validate(items, instances)
+        m2m_fields = self._m2m_fields(model)
+        fields = set()
+        objects = []
+        m2m_values = []
+        before = Counter()
+        for item, data in zip(items, validated):
+            instance = instances[self._clean_ids(model, [item['id']])[0]]
+            # Taken before the changes below, for the dashboard counters
+            before.update(stats.contributions([instance]))
+            m2m_values.append({name: data.pop(name) for name in m2m_fields if name in data})
+            for name, value in data.items():
+                setattr(instance, name, value)
+                fields.add(name)
+            objects.append(instance)
+        auto_now = [f.name for f in model._meta.concrete_fields if getattr(f, 'auto_now', False)]
+        now = timezone.now()
+        for instance in objects:
+            for name in auto_now:
+                setattr(instance, name, now)
+        fields = {model._meta.get_field(name).name for name in fields} | set(auto_now)
+        with transaction.atomic(), coalesce_writes():
+            if fields:
+                model.objects.bulk_update(objects, sorted(fields), batch_size=self.bulk_batch_size)
+            self._bulk_set_m2m(model, objects, m2m_values, replace=True)
+            changes = stats.contributions(objects)
+            changes.subtract(before)
+            tables_written((model,), changes)
+        return Response(self._bulk_results(model, objects))
+
+    def bulk_destroy(self, request):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or not ids:
+            raise ValidationError({'ids': ['Expected a non-empty list of ids.']})
+        if len(ids) > self.bulk_max_items:
+            raise ValidationError({'ids': [f'At most {self.bulk_max_items} ids may be sent in one request.']})
+        model = self.queryset.model
+        queryset = model.objects.filter(pk__in=self._clean_ids(model, ids))
+        return Response({'deleted': self.perform_bulk_destroy(queryset)})
+
+    def perform_bulk_destroy(self, queryset):
+        """Delete ``queryset``; returns the number of rows of the viewset's model deleted."""
+        with transaction.atomic(), coalesce_writes():
+            _, per_model = queryset.delete()
+        return per_model.get(queryset.model._meta.label, 0)
+
+    @staticmethod
+    def _clean_ids(model, ids):
+        """Coerce ``ids`` to primary-key values, dropping anything malformed."""
+        to_python = model._meta.pk.to_python
+        cleaned = []
+        for pk in ids:
+            try:
+                cleaned.append(to_python(pk))
+            except Exception:
+                continue
+        return [pk for pk in cleaned if pk is not None]
+
+    @staticmethod
+    def _m2m_fields(model):
+        return [f.name for f in model._meta.get_fields() if isinstance(f, ManyToManyField)]
+
+    def _bulk_set_m2m(self, model, objects, m2m_values, replace=False):
+        for name in self._m2m_fields(model):
+            field = model._meta.get_field(name)
+            through = field.remote_field.through
+            source = field.m2m_field_name()
+            target = field.m2m_reverse_field_name()
+            changed = [(obj, values[name]) for obj, values in zip(objects, m2m_values) if name in values]
+            if not changed:
+                continue
+            if replace:
+                through.objects.filter(**{f'{source}__in': [obj.pk for obj, _ in changed]}).delete()
+            through.objects.bulk_create([
+                through(**{f'{source}_id': obj.pk, f'{target}_id': related.pk})
+                for obj, related_objects in changed
+                for related in related_objects
+            ], batch_size=self.bulk_batch_size)
+            tables_written((model, field.related_model))
+
+    def _bulk_results(self, model, objects):
+        # Re-read with the declared relations so serializing the batch is a constant number of queries
+        queryset = self.load_relations(model.objects.filter(pk__in=[obj.pk for obj in objects]))
+        by_pk = queryset.in_bulk()
+        return {'results': self.get_serializer([by_pk[obj.pk] for obj in objects], many=True).data}
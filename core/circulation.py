@@ -0,0 +1,113 @@
+"""
+Library checkout, return and renewal, and the deletion of loans.
+
+Each operation is a conditional UPDATE that only succeeds while the rule it
+enforces still holds (a copy is on the shelf, the loan is still open, the
+loan has not changed since it was read), run in the same transaction as the
+LibraryBorrowing write. Concurrent requests for the last copy therefore
+serialize on the resource row: one wins, the others get a 409, and
+``available_copies`` never goes negative or above ``total_copies``.
+"""
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Least
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+
+from .models import LibraryBorrowing, LibraryResource
+from .signals import coalesce_writes, tables_written
+
+LOAN_PERIOD = datetime.timedelta(days=settings.LIBRARY_LOAN_DAYS)
+MAX_RENEWALS = settings.LIBRARY_MAX_RENEWALS
+
+
+class CirculationConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The request conflicts with the current state of the loan.'
+    default_code = 'conflict'
+
+
+def checkout(resource_id, user, today=None):
+    """Lend one copy of ``resource_id`` to ``user``; returns the new LibraryBorrowing."""
+    today = today or timezone.localdate()
+    with transaction.atomic(), coalesce_writes():
+        taken = LibraryResource.objects.filter(pk=resource_id, available_copies__gt=0).update(
+            available_copies=F('available_copies') - 1
+        )
+        if not taken:
+            if not LibraryResource.objects.filter(pk=resource_id).exists():
+                raise NotFound('Library resource not found.')
+            raise CirculationConflict('No copies of this resource are available.')
+        borrowing = LibraryBorrowing.objects.create(
+            resource_id=resource_id, user=user, borrow_date=today, due_date=today + LOAN_PERIOD,
+        )
+        tables_written((LibraryResource,))
+    return borrowing
+
+
+def return_copy(borrowing, today=None):
+    """Close ``borrowing`` and put its copy back on the shelf."""
+    today = today or timezone.localdate()
+    with transaction.atomic(), coalesce_writes():
+        closed = LibraryBorrowing.objects.filter(pk=borrowing.pk, return_date__isnull=True).update(
+            return_date=today
+        )
+        if not closed:
+            raise CirculationConflict('This loan has already been returned.')
+        LibraryResource.objects.filter(
+            pk=borrowing.resource_id, available_copies__lt=F('total_copies')
+        ).update(available_copies=F('available_copies') + 1)
+        tables_written((LibraryBorrowing, LibraryResource))
+
+
+def discard(borrowings, today=None):
+    """
+    Delete the LibraryBorrowing rows of ``borrowings``, first putting the
+    copies of loans that are still open back on the shelf. Each resource's
+    open loans are closed with one conditional UPDATE, so a loan returned
+    concurrently is restocked once. Returns the number of loans deleted.
+    """
+    today = today or timezone.localdate()
+    with transaction.atomic(), coalesce_writes():
+        by_resource = defaultdict(list)
+        for pk, resource_id in borrowings.filter(return_date__isnull=True).values_list('pk', 'resource_id'):
+            by_resource[resource_id].append(pk)
+        for resource_id, pks in by_resource.items():
+            closed = LibraryBorrowing.objects.filter(pk__in=pks, return_date__isnull=True).update(
+                return_date=today
+            )
+            if closed:
+                LibraryResource.objects.filter(pk=resource_id).update(
+                    available_copies=Least(F('available_copies') + closed, F('total_copies'))
+                )
+        if by_resource:
+            tables_written((LibraryResource,))
+        _, per_model = borrowings.delete()
+    return per_model.get(LibraryBorrowing._meta.label, 0)
+
+
+def renew(borrowing, today=None):
+    """
+    Extend ``borrowing`` by one loan period from its due date (or from
+    today, if overdue). The update is conditional on the loan being
+    unchanged since it was read, so concurrent renewals count once.
+    """
+    today = today or timezone.localdate()
+    if borrowing.return_date is not None:
+        raise CirculationConflict('This loan has already been returned.')
+    if borrowing.renewals >= MAX_RENEWALS:
+        raise CirculationConflict(f'This loan has reached the limit of {MAX_RENEWALS} renewals.')
+    due_date = max(borrowing.due_date, today) + LOAN_PERIOD
+    with transaction.atomic(), coalesce_writes():
+        renewed = LibraryBorrowing.objects.filter(
+            pk=borrowing.pk, return_date__isnull=True,
+            renewals=borrowing.renewals, due_date=borrowing.due_date,
+        ).update(renewals=F('renewals') + 1, due_date=due_date)
+        if not renewed:
+            raise CirculationConflict('This loan changed while it was being renewed; try again.')
+        tables_written((LibraryBorrowing,))
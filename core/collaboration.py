@@ -0,0 +1,155 @@
+"""
+Research collaboration graph.
+
+Faculty are vertices; two faculty share an edge when they work on a
+project together, as principal investigator or co-investigator, weighted
+by the number of projects they share. ``build()`` reads the memberships
+and the faculty in three queries and computes, per faculty member, degree,
+strength (weighted degree), degree centrality and eigenvector centrality,
+plus the same graph folded onto departments.
+
+``collaboration_graph()`` caches the result under the version counters of
+the tables it reads. Any change to project membership bumps those counters
+(see core.signals), so the next request misses and rebuilds; entries left
+behind simply expire.
+"""
+from collections import defaultdict
+from itertools import combinations
+
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+
+from . import versioning
+from .models import Department, FacultyProfile, ResearchProject
+
+User = get_user_model()
+
+Membership = ResearchProject.co_investigators.through
+
+SOURCE_MODELS = (ResearchProject, FacultyProfile, User, Department)
+CACHE_TIMEOUT = settings.RESEARCH_GRAPH_CACHE_SECONDS
+
+EIGENVECTOR_ITERATIONS = 100
+EIGENVECTOR_TOLERANCE = 1e-6
+
+
+def collaboration_graph():
+    """The graph of ``build()``, from the cache while its source tables are unchanged."""
+    etag, _ = versioning.get_validators(SOURCE_MODELS)
+    key = f'research-collaborations:{etag}'
+    graph = cache.get(key)
+    if graph is None:
+        graph = build()
+        cache.set(key, graph, CACHE_TIMEOUT)
+    return graph
+
+
+def build():
+    """
+    Return ``{'results': edges, 'faculty': [...], 'departments': [...],
+    'department_links': [...]}``. Edges are heaviest first; faculty who are
+    on no project are left out.
+    """
+    members = defaultdict(set)
+    for project_id, faculty_id in ResearchProject.objects.values_list('pk', 'principal_investigator_id'):
+        members[project_id].add(faculty_id)
+    for project_id, faculty_id in Membership.objects.values_list('researchproject_id', 'facultyprofile_id'):
+        members[project_id].add(faculty_id)
+
+    projects_of = defaultdict(set)
+    weights = defaultdict(int)
+    for project_id, faculty_ids in members.items():
+        for faculty_id in faculty_ids:
+            projects_of[faculty_id].add(project_id)
+        for pair in combinations(sorted(faculty_ids), 2):
+            weights[pair] += 1
+
+    profiles = {profile.pk: profile for profile in FacultyProfile.objects.filter(
+        pk__in=list(projects_of)
+    ).select_related('user', 'department')}
+    adjacency = defaultdict(dict)
+    for (a, b), weight in weights.items():
+        adjacency[a][b] = adjacency[b][a] = weight
+    eigenvector = eigenvector_centrality(adjacency, list(projects_of))
+
+    def name(faculty_id):
+        return profiles[faculty_id].user.get_full_name()
+
+    edges = [
+        {'source': a, 'source_name': name(a), 'target': b, 'target_name': name(b), 'weight': weight}
+        for (a, b), weight in sorted(weights.items(), key=lambda item: (-item[1], item[0]))
+    ]
+    others = max(len(projects_of) - 1, 1)
+    faculty = sorted((
+        {
+            'id': faculty_id,
+            'name': name(faculty_id),
+            'department': profiles[faculty_id].department_id,
+            'projects': len(projects),
+            'degree': len(adjacency[faculty_id]),
+            'strength': sum(adjacency[faculty_id].values()),
+            'degree_centrality': round(len(adjacency[faculty_id]) / others, 4),
+            'eigenvector_centrality': round(eigenvector[faculty_id], 4),
+        }
+        for faculty_id, projects in projects_of.items()
+    ), key=lambda row: (-row['strength'], row['id']))
+
+    return {
+        'results': edges,
+        'faculty': faculty,
+        **_departments(profiles, projects_of, weights),
+    }
+
+
+def _departments(profiles, projects_of, weights):
+    """Faculty, projects and collaboration weight per department, and between departments."""
+    department_of = {faculty_id: profile.department_id for faculty_id, profile in profiles.items()}
+    names = {profile.department_id: profile.department.name if profile.department else 'Unassigned'
+             for profile in profiles.values()}
+    totals = defaultdict(lambda: {'faculty': 0, 'projects': set(), 'internal_weight': 0, 'external_weight': 0})
+    for faculty_id, projects in projects_of.items():
+        department = totals[department_of[faculty_id]]
+        department['faculty'] += 1
+        department['projects'] |= projects
+    links = defaultdict(int)
+    for (a, b), weight in weights.items():
+        first, second = department_of[a], department_of[b]
+        if first == second:
+            totals[first]['internal_weight'] += weight
+        else:
+            totals[first]['external_weight'] += weight
+            totals[second]['external_weight'] += weight
+            links[tuple(sorted((first, second), key=lambda pk: (pk is None, pk)))] += weight
+    return {
+        'departments': sorted((
+            {'id': pk, 'name': names[pk], 'faculty': row['faculty'], 'projects': len(row['projects']),
+             'internal_weight': row['internal_weight'], 'external_weight': row['external_weight']}
+            for pk, row in totals.items()
+        ), key=lambda row: (row['id'] is None, row['id'])),
+        'department_links': [
+            {'source': a, 'target': b, 'weight': weight}
+            for (a, b), weight in sorted(links.items(), key=lambda item: -item[1])
+        ],
+    }
+
+
+def eigenvector_centrality(adjacency, vertices):
+    """
+    Power iteration on the weighted adjacency matrix plus the identity
+    (which keeps bipartite graphs from oscillating), scaled so the most
+    central vertex scores 1.
+    """
+    scores = dict.fromkeys(vertices, 1.0)
+    for _ in range(EIGENVECTOR_ITERATIONS):
+        updated = {
+            vertex: scores[vertex] + sum(weight * scores[other] for other, weight in adjacency[vertex].items())
+            for vertex in vertices
+        }
+        top = max(updated.values(), default=0) or 1
+        updated = {vertex: score / top for vertex, score in updated.items()}
+        converged = all(abs(updated[vertex] - scores[vertex]) < EIGENVECTOR_TOLERANCE for vertex in vertices)
+        scores = updated
+        if converged:
+            break
+    return scores
@@ -0,0 +1,67 @@
+"""
+JSON rendering and parsing with orjson.
+
+FastJSONRenderer and FastJSONParser are the API defaults (see
+``REST_FRAMEWORK`` in settings). Output matches DRF's JSONRenderer byte for
+byte for the compact UTF-8 style the API uses: values orjson does not
+encode the same way (datetimes, Decimals, lazy strings, querysets) are
+handed to DRF's JSONEncoder, and U+2028/U+2029 are escaped. Requests for
+indented output (``Accept: application/json; indent=4``) go through DRF.
+
+orjson is pinned in requirements.txt; where it is missing both classes
+behave as DRF's.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# DRF's encoder for what orjson would otherwise encode differently or reject
+_default = JSONEncoder().default
+
+if orjson is not None:
+    OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+def dumps(data):
+    """``data`` as compact UTF-8 JSON bytes, encoded as DRF's JSONRenderer would."""
+    if orjson is None:
+        return JSONRenderer().render(data)
+    try:
+        encoded = orjson.dumps(data, default=_default, option=OPTIONS)
+    except orjson.JSONEncodeError:
+        # Integers beyond 64 bits, and the like
+        return JSONRenderer().render(data)
+    # Line and paragraph separators are valid JSON but not valid JavaScript
+    if b'\xe2\x80\xa8' in encoded or b'\xe2\x80\xa9' in encoded:
+        encoded = encoded.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return encoded
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class FastJSONParser(JSONParser):
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            # orjson rejects NaN and Infinity, as DRF's strict parser does
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
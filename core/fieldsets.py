@@ -0,0 +1,116 @@
+"""
+Sparse fieldsets: ``?fields=`` and ``?expand=`` on read requests.
+
+``?fields=id,title`` limits each object to the named fields. Nested
+objects a serializer lists in ``Meta.expandable_fields`` (a borrowing's
+resource, a faculty member's user) are left out unless named in
+``?expand=``. See SparseFieldsMixin in core.serializers.
+
+The selection also narrows the query. ``narrow()`` keeps only the joins
+and prefetches the remaining fields read and loads only their columns
+with ``only()``. Serializers describe what their computed fields read in
+``Meta.field_sources``, as ORM paths: a column (``capacity``), a column
+across a relation (``faculty__user__last_name``) or a relation whose
+whole row is used (``semester``). A selected computed field without a
+description keeps the full query, so a missing entry costs speed, never
+extra queries per row.
+"""
+from collections import namedtuple
+
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+FieldSelection = namedtuple('FieldSelection', 'fields expand')
+
+
+def full_name(relation):
+    """The columns ``get_full_name()`` reads on the user at ``relation``."""
+    return (f'{relation}__first_name', f'{relation}__last_name')
+
+
+def _names(value):
+    return frozenset(name.strip() for name in value.split(',') if name.strip())
+
+
+def parse(query_params):
+    """The FieldSelection of ``query_params``; ``fields`` is None when every field is wanted."""
+    fields = _names(query_params.get('fields', ''))
+    return FieldSelection(fields or None, _names(query_params.get('expand', '')))
+
+
+def _resolve(model, path):
+    """
+    Split ``path`` into ``(column, join)``: the part ``only()`` can load
+    and the relation path whose rows it reads, either possibly None.
+    """
+    parts = path.split('__')
+    for depth, part in enumerate(parts):
+        field = model._meta.get_field(part)
+        if field.many_to_many or field.one_to_many:
+            # Loaded by a prefetch, which only() cannot narrow
+            return None, '__'.join(parts[:depth + 1])
+        if not field.is_relation:
+            return path, '__'.join(parts[:depth]) or None
+        model = field.related_model
+    return path, path
+
+
+def requirements(serializer):
+    """
+    ``(columns, joins)`` read by the fields of ``serializer``, or None when
+    a computed field does not say what it reads.
+    """
+    model = serializer.Meta.model
+    sources = getattr(serializer.Meta, 'field_sources', {})
+    columns, joins = set(), set()
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in sources:
+            paths = sources[name]
+        elif isinstance(field, serializers.SerializerMethodField) or field.source == '*':
+            return None
+        elif isinstance(field, (serializers.RelatedField, serializers.ManyRelatedField)):
+            # The key alone, or the keys of a prefetched relation
+            if isinstance(field, serializers.ManyRelatedField):
+                joins.add(field.source)
+            else:
+                columns.add(field.source)
+            continue
+        else:
+            paths = [field.source.replace('.', '__')]
+        for path in paths:
+            column, join = _resolve(model, path)
+            if column:
+                columns.add(column)
+            if join:
+                joins.add(join)
+    return columns, joins
+
+
+def _needed(relation, joins):
+    return any(relation == join or relation.startswith(f'{join}__') or join.startswith(f'{relation}__')
+               for join in joins)
+
+
+def narrow(serializer, select_related, prefetch_related, ordering=()):
+    """
+    Return ``(select_related, prefetch_related, only)`` cut down to what
+    ``serializer``'s fields read; ``only`` is None to load every column.
+    ``ordering`` fields are always loaded, for pagination cursors.
+    """
+    found = requirements(serializer)
+    if found is None:
+        return select_related, prefetch_related, None
+    columns, joins = found
+    select_related = tuple(path for path in select_related if _needed(path, joins))
+    prefetch_related = tuple(
+        lookup for lookup in prefetch_related
+        if _needed((lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup).split('__')[0], joins)
+    )
+    columns.update(field.lstrip('-') for field in ordering)
+    # Each join needs at least its own key loaded
+    columns.update(path for path in select_related if not any(
+        column == path or column.startswith(f'{path}__') for column in columns
+    ))
+    return select_related, prefetch_related, sorted(columns)
@@ -0,0 +1,121 @@
+"""
+Fitness class enrollment with a first-come, first-served waitlist.
+
+A seat is taken by a conditional UPDATE of ``FitnessClass.enrolled`` that
+only succeeds while ``enrolled < capacity``; a student who loses that race
+is waitlisted instead. Dropping a seat hands it to the oldest waitlisted
+student. Promotion is itself conditional on the waitlist row still being
+WAITLISTED, so two concurrent drops never promote the same student, and no
+row of ``FitnessClass`` is ever locked for longer than one UPDATE.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+
+from .models import FitnessClass, FitnessEnrollment
+from .signals import coalesce_writes, tables_written
+
+
+class EnrollmentConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The request conflicts with the current state of the enrollment.'
+    default_code = 'conflict'
+
+
+def _reserve_seat(class_id):
+    return FitnessClass.objects.filter(pk=class_id, enrolled__lt=F('capacity')).update(
+        enrolled=F('enrolled') + 1
+    )
+
+
+def _release_seat(class_id):
+    FitnessClass.objects.filter(pk=class_id, enrolled__gt=0).update(enrolled=F('enrolled') - 1)
+
+
+def waitlist(class_id):
+    """The class's waitlisted enrollments, oldest first."""
+    return FitnessEnrollment.objects.filter(fitness_class_id=class_id, status='WAITLISTED').order_by('created_at', 'id')
+
+
+def waitlist_position(enrollment):
+    """1-based place of ``enrollment`` on its class's waitlist, or None if it is not waitlisted."""
+    if enrollment.status != 'WAITLISTED':
+        return None
+    ahead = waitlist(enrollment.fitness_class_id).filter(created_at__lte=enrollment.created_at).exclude(
+        created_at=enrollment.created_at, id__gt=enrollment.id
+    )
+    return ahead.count()
+
+
+def enroll(class_id, student):
+    """
+    Give ``student`` a seat in ``class_id``, or a waitlist place when the
+    class is full. Returns the FitnessEnrollment.
+    """
+    try:
+        with transaction.atomic(), coalesce_writes():
+            seated = _reserve_seat(class_id)
+            if not seated and not FitnessClass.objects.filter(pk=class_id).exists():
+                raise NotFound('Fitness class not found.')
+            enrollment = FitnessEnrollment.objects.create(
+                fitness_class_id=class_id, student=student, status='ENROLLED' if seated else 'WAITLISTED',
+            )
+            tables_written((FitnessClass,))
+    except IntegrityError:
+        raise EnrollmentConflict('You are already enrolled or waitlisted for this class.')
+    if not seated:
+        # A seat may have been released between our failed reservation and
+        # the waitlist insert; make sure it does not stay empty
+        promote(class_id)
+        enrollment.refresh_from_db(fields=['status', 'updated_at'])
+    return enrollment
+
+
+def drop(enrollment):
+    """Withdraw ``enrollment``; a freed seat goes to the head of the waitlist."""
+    with transaction.atomic(), coalesce_writes():
+        # The row may be promoted between two attempts, hence ENROLLED twice
+        for current in ('ENROLLED', 'WAITLISTED', 'ENROLLED'):
+            if FitnessEnrollment.objects.filter(pk=enrollment.pk, status=current).update(
+                status='DROPPED', updated_at=timezone.now()
+            ):
+                break
+        else:
+            raise EnrollmentConflict('This enrollment has already been dropped.')
+        if current == 'ENROLLED':
+            _release_seat(enrollment.fitness_class_id)
+        tables_written((FitnessEnrollment, FitnessClass))
+    enrollment.status = 'DROPPED'
+    if current == 'ENROLLED':
+        promote(enrollment.fitness_class_id)
+
+
+def promote(class_id):
+    """
+    Move waitlisted students into free seats, oldest first, until the class
+    is full or the waitlist is empty. Returns the number promoted.
+    """
+    promoted = 0
+    with coalesce_writes():
+        while True:
+            with transaction.atomic():
+                # Seat first: on a full class this is the only query
+                if not _reserve_seat(class_id):
+                    break
+                head = waitlist(class_id).values_list('pk', flat=True).first()
+                if head is None:
+                    transaction.set_rollback(True)
+                    break
+                if not FitnessEnrollment.objects.filter(pk=head, status='WAITLISTED').update(
+                    status='ENROLLED', updated_at=timezone.now()
+                ):
+                    # Someone else promoted or dropped the head first; give
+                    # the seat back and look again
+                    transaction.set_rollback(True)
+                    continue
+            promoted += 1
+        if promoted:
+            tables_written((FitnessEnrollment, FitnessClass))
+    return promoted
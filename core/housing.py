@@ -0,0 +1,230 @@
+"""
+Batch allocation of pending housing applications to rooms.
+
+``allocate()`` loads a semester's pending applications and every room with
+free beds, matches them in memory and writes the approvals and occupancy
+changes in one transaction. Applications are served in submission order:
+
+1. Students who name each other in ``roommate_preference`` (username or
+   email) and want the same room type form a group, split to the largest
+   free room of that type, and are placed together.
+2. Every group is first offered its preferred building. Rooms are picked
+   best-fit (fewest free beds that still hold the group) so larger rooms
+   stay free for larger groups.
+3. Groups that did not fit their preferred building then go to any
+   building with that room type; a group that fits nowhere whole is split
+   and its members are placed one at a time.
+
+Each pass is linear in the number of applications. Applications left
+without a room stay PENDING.
+"""
+import re
+import time
+from collections import defaultdict, namedtuple
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from .models import Housing, HousingApplication
+from .signals import coalesce_writes, tables_written
+
+Allocation = namedtuple('Allocation', 'application housing preferred')
+AllocationResult = namedtuple('AllocationResult', 'assignments unplaced skipped timings dry_run')
+
+BATCH_SIZE = 500
+ROOM_BATCH_SIZE = 200
+
+_NAME_SEPARATORS = re.compile(r'[\s,;]+')
+
+
+def _building_key(name):
+    return (name or '').strip().casefold()
+
+
+class RoomPool:
+    """Free beds per (room type, building), bucketed by free-bed count for best-fit picks."""
+
+    def __init__(self, rooms):
+        self.buckets = defaultdict(lambda: defaultdict(list))
+        self.buildings = defaultdict(set)
+        self.largest = defaultdict(int)
+        self.taken = defaultdict(int)
+        for room in rooms:
+            free = room.capacity - room.occupied
+            if free <= 0:
+                continue
+            building = _building_key(room.building)
+            self.buckets[room.room_type, building][free].append(room)
+            self.buildings[room.room_type].add(building)
+            self.largest[room.room_type] = max(self.largest[room.room_type], free)
+        self.buildings = {room_type: sorted(names) for room_type, names in self.buildings.items()}
+
+    def take(self, room_type, size, building=None):
+        """Reserve ``size`` beds in one room; returns the room or None."""
+        buildings = [building] if building is not None else self.buildings.get(room_type, ())
+        best = None
+        for name in buildings:
+            buckets = self.buckets.get((room_type, name))
+            if not buckets:
+                continue
+            for free in range(size, self.largest[room_type] + 1):
+                if buckets.get(free):
+                    if best is None or free < best[0]:
+                        best = (free, name)
+                    break
+        if best is None:
+            return None
+        free, name = best
+        buckets = self.buckets[room_type, name]
+        room = buckets[free].pop()
+        if free > size:
+            buckets[free - size].append(room)
+        self.taken[room] += size
+        return room
+
+
+def roommate_groups(applications, largest):
+    """
+    Group ``applications`` (in submission order) whose students name each
+    other and want the same room type. Groups are capped at
+    ``largest[room_type]`` members and returned in submission order.
+    """
+    by_name = {}
+    for application in applications:
+        by_name.setdefault(application.student.username.casefold(), application)
+        if application.student.email:
+            by_name.setdefault(application.student.email.casefold(), application)
+    wanted = {
+        application.pk: {
+            by_name[name].pk
+            for name in _NAME_SEPARATORS.split(application.roommate_preference.casefold())
+            if name in by_name and by_name[name].pk != application.pk
+        }
+        for application in applications
+    }
+
+    parent = {application.pk: application.pk for application in applications}
+
+    def find(pk):
+        while parent[pk] != pk:
+            parent[pk] = parent[parent[pk]]
+            pk = parent[pk]
+        return pk
+
+    by_pk = {application.pk: application for application in applications}
+    for application in applications:
+        for other in wanted[application.pk]:
+            if application.pk in wanted[other] and by_pk[other].room_type == application.room_type:
+                parent[find(other)] = find(application.pk)
+
+    members = defaultdict(list)
+    for application in applications:
+        members[find(application.pk)].append(application)
+    groups = []
+    for group in members.values():
+        limit = max(largest.get(group[0].room_type, 1), 1)
+        groups.extend(group[i:i + limit] for i in range(0, len(group), limit))
+    order = {application.pk: i for i, application in enumerate(applications)}
+    groups.sort(key=lambda group: order[group[0].pk])
+    return groups
+
+
+def _allocation(application, room):
+    preferred = _building_key(room.building) == _building_key(application.preferred_building)
+    return Allocation(application, room, preferred)
+
+
+def match(applications, rooms):
+    """Return ``(assignments, unplaced, pool)`` for applications in submission order."""
+    pool = RoomPool(rooms)
+    assignments = []
+    deferred = []
+    for group in roommate_groups(applications, pool.largest):
+        room = pool.take(group[0].room_type, len(group), _building_key(group[0].preferred_building))
+        if room is None:
+            deferred.append(group)
+        else:
+            assignments.extend(_allocation(application, room) for application in group)
+
+    unplaced = []
+    for group in deferred:
+        room = pool.take(group[0].room_type, len(group))
+        if room is not None:
+            assignments.extend(_allocation(application, room) for application in group)
+        elif len(group) == 1:
+            unplaced.extend(group)
+        else:
+            # No room holds the group whole; place its members one at a time
+            for application in group:
+                room = pool.take(application.room_type, 1)
+                if room is None:
+                    unplaced.append(application)
+                else:
+                    assignments.append(_allocation(application, room))
+    return assignments, unplaced, pool
+
+
+def allocate(semester, dry_run=False):
+    """
+    Allocate rooms to the pending applications of ``semester``.
+
+    Students who already hold an approved application for the semester, and
+    later duplicates of a student's pending application, are skipped. With
+    ``dry_run`` nothing is written. ``timings`` holds milliseconds per phase.
+    """
+    timings = {}
+    with transaction.atomic():
+        started = time.perf_counter()
+        pending = HousingApplication.objects.filter(semester=semester, status='PENDING')
+        rooms = Housing.objects.filter(occupied__lt=F('capacity')).order_by('pk')
+        if not dry_run:
+            pending = pending.select_for_update(of=('self',))
+            rooms = rooms.select_for_update()
+        housed = set(HousingApplication.objects.filter(
+            semester=semester, status='APPROVED'
+        ).values_list('student_id', flat=True))
+        applications, skipped = [], []
+        for application in pending.select_related('student').order_by('created_at', 'pk'):
+            if application.student_id in housed:
+                skipped.append(application)
+            else:
+                housed.add(application.student_id)
+                applications.append(application)
+        rooms = list(rooms)
+        timings['load'] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        assignments, unplaced, pool = match(applications, rooms)
+        timings['match'] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        if not dry_run and assignments:
+            _commit(assignments, pool)
+        timings['commit'] = (time.perf_counter() - started) * 1000
+    return AllocationResult(assignments, unplaced, skipped, timings, dry_run)
+
+
+def _commit(assignments, pool):
+    by_room = defaultdict(list)
+    for allocation in assignments:
+        allocation.application.status = 'APPROVED'
+        allocation.application.assigned_housing = allocation.housing
+        by_room[allocation.housing.pk].append(allocation.application.pk)
+    rooms = list(by_room.items())
+    # Occupancy moves by a relative amount, one UPDATE per distinct increment
+    by_increment = defaultdict(list)
+    for room, beds in pool.taken.items():
+        by_increment[beds].append(room.pk)
+    with coalesce_writes():
+        # One CASE branch per room rather than per application (as bulk_update
+        # would build) keeps the statements small enough for a 15k intake
+        for i in range(0, len(rooms), ROOM_BATCH_SIZE):
+            batch = rooms[i:i + ROOM_BATCH_SIZE]
+            HousingApplication.objects.filter(pk__in=[pk for _, pks in batch for pk in pks]).update(
+                status='APPROVED',
+                assigned_housing=Case(*[When(pk__in=pks, then=Value(room)) for room, pks in batch]),
+            )
+        for beds, room_ids in by_increment.items():
+            for i in range(0, len(room_ids), BATCH_SIZE):
+                Housing.objects.filter(pk__in=room_ids[i:i + BATCH_SIZE]).update(occupied=F('occupied') + beds)
+        tables_written((HousingApplication, Housing), {'housing_occupied': sum(pool.taken.values())})
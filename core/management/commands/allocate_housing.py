@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import housing
+from core.models import Semester
+
+
+class Command(BaseCommand):
+    help = "Match a semester's pending housing applications to rooms and approve them in one transaction"
+
+    def add_arguments(self, parser):
+        parser.add_argument('semester', type=int, help='Semester id')
+        parser.add_argument('--dry-run', action='store_true', help='Report the allocation without saving it')
+
+    def handle(self, *args, **options):
+        try:
+            semester = Semester.objects.get(pk=options['semester'])
+        except Semester.DoesNotExist:
+            raise CommandError(f"Semester {options['semester']} does not exist")
+        result = housing.allocate(semester, dry_run=options['dry_run'])
+
+        preferred = sum(1 for allocation in result.assignments if allocation.preferred)
+        self.stdout.write(f'Placed:      {len(result.assignments)} ({preferred} in their preferred building)')
+        self.stdout.write(f'Unplaced:    {len(result.unplaced)}')
+        self.stdout.write(f'Skipped:     {len(result.skipped)} (already housed or duplicate)')
+        for phase, ms in result.timings.items():
+            self.stdout.write(f'{phase + ":":<12} {ms:.1f} ms')
+        if result.dry_run:
+            self.stdout.write(self.style.WARNING('Dry run: nothing was saved'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Approved {len(result.assignments)} applications'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core import bibliometrics
+
+
+class Command(BaseCommand):
+    help = 'Recompute publication metrics for every faculty member, department and the university'
+
+    def handle(self, *args, **options):
+        rows = bibliometrics.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Publication metrics rebuilt: {rows} rows'))
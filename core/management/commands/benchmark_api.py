@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+
+from benchmarks import api, seeding
+
+
+class Command(BaseCommand):
+    help = 'Seed a throwaway test database and print per-endpoint query, size and latency figures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=5, help='Multiplier for seeded row volumes')
+        parser.add_argument('--repeat', type=int, default=20, help='Requests per endpoint')
+        parser.add_argument('--bulk-size', type=int, default=500,
+                            help='Rows per bulk request in the throughput section (0 to skip)')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            data = seeding.seed(scale=options['scale'])
+            client = APIClient()
+            client.force_authenticate(data['admin'])
+            measurements = [
+                api.measure(client, endpoint, repeat=options['repeat'])
+                for endpoint in api.build_endpoints(data)
+            ]
+            throughput = []
+            if options['bulk_size']:
+                for prefix in api.BULK_PREFIXES:
+                    throughput.extend(api.measure_bulk(client, data, prefix, options['bulk_size']))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(api.format_table(measurements))
+        if throughput:
+            self.stdout.write('')
+            self.stdout.write(api.format_throughput_table(throughput))
+        over_budget = [m.name for m in measurements
+                       if m.queries > m.budget_queries or m.p95_ms > m.budget_ms]
+        if over_budget:
+            self.stdout.write(self.style.ERROR(f"Over budget: {', '.join(over_budget)}"))
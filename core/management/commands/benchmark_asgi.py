@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from benchmarks import seeding, serving
+
+
+class Command(BaseCommand):
+    help = 'Compare the WSGI and ASGI entry points under concurrent load on a throwaway test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=5, help='Multiplier for seeded row volumes')
+        parser.add_argument('--requests', type=int, default=400, help='Requests per endpoint and entry point')
+        parser.add_argument('--concurrency', type=int, default=16, help='Simultaneous clients')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            data = seeding.seed(scale=options['scale'])
+            results = serving.measure_entry_points(data, options['requests'], options['concurrency'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(serving.format_load_table(results))
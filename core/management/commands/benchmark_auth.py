@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from benchmarks import seeding, serving
+
+
+class Command(BaseCommand):
+    help = 'Compare queries and latency per request with and without the token lookup cache, on a throwaway test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per authentication class')
+        parser.add_argument('--users', type=int, default=20, help='Distinct tokens the requests rotate through')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            seeding.seed(scale=1)
+            results = serving.measure_token_auth(requests=options['requests'], users=options['users'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(serving.format_auth_table(results))
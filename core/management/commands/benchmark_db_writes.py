@@ -0,0 +1,39 @@
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from benchmarks import concurrency
+from erp4uni import database
+
+
+class Command(BaseCommand):
+    help = ('Measure concurrent write throughput for SQLite with its default journal, SQLite in WAL mode and, '
+            'when the default database is PostgreSQL, that server')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent writers')
+        parser.add_argument('--transactions', type=int, default=200, help='Transactions per writer')
+        parser.add_argument('--busy-timeout', type=float, default=5, help='SQLite lock wait in seconds')
+
+    def handle(self, *args, **options):
+        results = []
+        with tempfile.TemporaryDirectory() as directory:
+            profiles = [
+                ('sqlite (rollback journal)',
+                 database.sqlite_config(os.path.join(directory, 'journal.sqlite3'), wal=False,
+                                        busy_timeout=options['busy_timeout'])),
+                ('sqlite (WAL, tuned)',
+                 database.sqlite_config(os.path.join(directory, 'wal.sqlite3'), wal=True,
+                                        busy_timeout=options['busy_timeout'])),
+            ]
+            if connection.vendor == 'postgresql':
+                profiles.append(('postgresql', dict(connection.settings_dict)))
+            for name, config in profiles:
+                results.append(concurrency.measure_write_throughput(
+                    name, config, threads=options['threads'], transactions=options['transactions']
+                ))
+        self.stdout.write(concurrency.format_write_table(results))
+        if connection.vendor != 'postgresql':
+            self.stdout.write('PostgreSQL skipped: set DB_ENGINE=postgresql (see erp4uni/database.py) to include it')
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+
+from benchmarks import api, seeding, serving
+from core import fastjson, middleware
+
+
+class Command(BaseCommand):
+    help = ('Compare JSON encode time (stdlib against orjson) and response bytes raw, gzipped and brotli-compressed '
+            'for every GET endpoint, on a throwaway test database')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=1, help='Multiplier for seeded row volumes')
+        parser.add_argument('--repeat', type=int, default=20, help='Encodings per endpoint and renderer')
+        parser.add_argument('--page-size', type=int, default=100, help='Rows per list page')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            data = seeding.seed(scale=options['scale'])
+            client = APIClient()
+            client.force_authenticate(data['admin'])
+            results = serving.measure_rendering(
+                client, api.build_endpoints(data), repeat=options['repeat'], page_size=options['page_size']
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(serving.format_render_table(results))
+        if fastjson.orjson is None:
+            self.stdout.write('orjson is not installed: both columns use the stdlib encoder')
+        if middleware.brotli is None:
+            self.stdout.write('brotli is not installed: responses are gzip-compressed')
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from benchmarks import scheduling, seeding
+
+
+class Command(BaseCommand):
+    help = 'Book a semester for many counselors on a throwaway test database and time the slot searches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--counselors', type=int, default=300, help='Counselors with weekday availability')
+        parser.add_argument('--days', type=int, default=100, help='Days ahead to book')
+        parser.add_argument('--fill', type=float, default=0.9, help='Share of slots already booked')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per measurement')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            started = time.perf_counter()
+            booked = seeding.seed_schedule(options['counselors'], options['days'], options['fill'])
+            seeded = time.perf_counter() - started
+            results = scheduling.measure_scheduling(repeat=options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"{booked} appointments for {options['counselors']} counselors seeded in {seeded:.1f} s")
+        self.stdout.write(scheduling.format_scheduling_table(results))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from benchmarks import seeding
+from core import timetabling
+
+
+class Command(BaseCommand):
+    help = 'Timetable a synthetic semester on a throwaway test database and report clashes and solve time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=3000, help='Courses with enrollments')
+        parser.add_argument('--students', type=int, default=25000, help='Students in the semester')
+        parser.add_argument('--per-student', type=int, default=5, help='Courses per student')
+        parser.add_argument('--rooms', type=int, default=120, help='Classrooms')
+        parser.add_argument('--kind', choices=['CLASS', 'EXAM'], default='EXAM', help='Timetable to build')
+        parser.add_argument('--restarts', type=int, default=timetabling.RESTARTS, help='Randomised solver attempts')
+        parser.add_argument('--workers', type=int, default=timetabling.WORKERS, help='Processes running attempts')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            started = time.perf_counter()
+            semester = seeding.seed_timetable(options['courses'], options['students'],
+                                                 options['per_student'], rooms=options['rooms'])
+            seeded = time.perf_counter() - started
+            started = time.perf_counter()
+            result = timetabling.build(semester, kind=options['kind'], restarts=options['restarts'],
+                                       workers=options['workers'])
+            elapsed = time.perf_counter() - started
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f'Semester seeded in {seeded:.1f} s')
+        self.stdout.write(timetabling.format_result(result))
+        self.stdout.write(f'total        {elapsed:.1f} s')
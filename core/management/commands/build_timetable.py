@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import timetabling
+from core.models import Semester
+
+
+class Command(BaseCommand):
+    help = "Timetable a semester's enrolled courses into its class or exam slots and rooms"
+
+    def add_arguments(self, parser):
+        parser.add_argument('semester', type=int, help='Semester id')
+        parser.add_argument('--kind', choices=['CLASS', 'EXAM'], default='EXAM', help='Timetable to build')
+        parser.add_argument('--restarts', type=int, default=timetabling.RESTARTS, help='Randomised solver attempts')
+        parser.add_argument('--workers', type=int, default=timetabling.WORKERS, help='Processes running attempts')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the first attempt')
+        parser.add_argument('--dry-run', action='store_true', help='Report the timetable without saving it')
+
+    def handle(self, *args, **options):
+        try:
+            semester = Semester.objects.get(pk=options['semester'])
+        except Semester.DoesNotExist:
+            raise CommandError(f"Semester {options['semester']} does not exist")
+        result = timetabling.build(semester, kind=options['kind'], restarts=options['restarts'],
+                                   workers=options['workers'], seed=options['seed'], dry_run=options['dry_run'])
+
+        self.stdout.write(timetabling.format_result(result))
+        if result.dry_run:
+            self.stdout.write(self.style.WARNING('Dry run: nothing was saved'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Saved {len(result.entries)} timetable entries'))
+        if result.clashes or result.unplaced:
+            self.stdout.write(self.style.ERROR('The timetable has clashes or unplaced courses'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import prerequisites
+
+
+class Command(BaseCommand):
+    help = 'Recompute the course prerequisite closure table; run after loading prerequisites in bulk'
+
+    def handle(self, *args, **options):
+        try:
+            rows = prerequisites.rebuild()
+        except prerequisites.PrerequisiteCycle as exc:
+            raise CommandError(exc.detail[0])
+        self.stdout.write(self.style.SUCCESS(f'Prerequisite closure rebuilt: {rows} rows'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core import stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the dashboard statistics snapshot; schedule periodically to catch bulk writes'
+
+    def handle(self, *args, **options):
+        snapshot = stats.get_snapshot(force_refresh=True)
+        self.stdout.write(self.style.SUCCESS(f'Dashboard statistics refreshed at {snapshot.refreshed_at}'))
@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from benchmarks import concurrency
+from core.models import LibraryResource
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Hammer one library title with concurrent checkouts and returns on a throwaway test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--copies', type=int, default=5, help='Copies of the contested title')
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent threads')
+        parser.add_argument('--attempts', type=int, default=200, help='Operations per thread')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            resource = LibraryResource.objects.create(
+                title='Contested Title', author='Author', resource_type='BOOK', location='Desk',
+                available_copies=options['copies'], total_copies=options['copies'],
+            )
+            users = User.objects.bulk_create([User(username=f'kiosk{i}', email=f'kiosk{i}@example.edu') for i in range(options['workers'])])
+            result = concurrency.stress_checkout(resource, users, options['workers'], options['attempts'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(concurrency.format_stress(result))
+        if result.oversold or not result.consistent:
+            self.stdout.write(self.style.ERROR('Oversold or drifted copy counter'))
@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from benchmarks import concurrency
+from core.models import FitnessClass
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Burst concurrent enroll requests at one fitness class on a throwaway test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=2000, help='Enroll requests in the burst')
+        parser.add_argument('--capacity', type=int, default=30, help='Seats in the class')
+        parser.add_argument('--workers', type=int, default=16, help='Concurrent threads')
+        parser.add_argument('--drop-rate', type=float, default=0.1, help='Share of requests followed by a drop')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            fitness_class = FitnessClass.objects.create(name='Spin', instructor='Coach', schedule='Mon 07:00',
+                                                        capacity=options['capacity'])
+            students = User.objects.bulk_create([
+                User(username=f'athlete{i}', email=f'athlete{i}@example.edu') for i in range(options['students'])
+            ])
+            result = concurrency.stress_enrollment(fitness_class, students, options['workers'], options['drop_rate'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(concurrency.format_enrollment_stress(result))
+        if result.overbooked or result.stranded or not result.consistent:
+            self.stdout.write(self.style.ERROR('Overbooked, stranded seats or drifted counter'))
@@ -0,0 +1,29 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = ('Copy the SQLite primary database onto the SQLite read replica (SQLITE_REPLICA_PATH), '
+            'for exercising replica routing locally; rerun to let the replica catch up')
+
+    def handle(self, *args, **options):
+        if settings.DB_READ_ALIAS == DEFAULT_DB_ALIAS:
+            raise CommandError('No read replica configured; set SQLITE_REPLICA_PATH (see erp4uni/database.py)')
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[settings.DB_READ_ALIAS]
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError('Only SQLite replicas are copied here; PostgreSQL replicas are fed by the server')
+        replica.close()
+        source = sqlite3.connect(primary.settings_dict['NAME'])
+        target = sqlite3.connect(replica.settings_dict['NAME'])
+        try:
+            # The online backup API copies a consistent snapshot while the primary stays writable
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        self.stdout.write(self.style.SUCCESS(
+            f"Copied {primary.settings_dict['NAME']} to {replica.settings_dict['NAME']}"
+        ))
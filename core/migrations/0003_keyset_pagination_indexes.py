@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_fitnessclass_housing_libraryresource_researchgrant_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='counselingappointment',
+            index=models.Index(fields=['date', 'id'], name='counseling_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthrecord',
+            index=models.Index(fields=['visit_date', 'id'], name='health_visit_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='libraryborrowing',
+            index=models.Index(fields=['borrow_date', 'id'], name='borrowing_date_id_idx'),
+        ),
+    ]
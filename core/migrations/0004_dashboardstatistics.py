@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_students', models.IntegerField(default=0)),
+                ('total_faculty', models.IntegerField(default=0)),
+                ('total_departments', models.IntegerField(default=0)),
+                ('active_courses', models.IntegerField(default=0)),
+                ('library_resources', models.IntegerField(default=0)),
+                ('housing_capacity', models.IntegerField(default=0)),
+                ('housing_occupied', models.IntegerField(default=0)),
+                ('research_projects', models.IntegerField(default=0)),
+                ('compliance_score', models.IntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'dashboard statistics',
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:49
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_dashboardstatistics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('library', 'Library'), ('housing', 'Housing'), ('counseling', 'Counseling')], max_length=20)),
+                ('description', models.CharField(max_length=255)),
+                ('object_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-created_at', '-id'], name='activity_created_idx'), models.Index(fields=['event_type', '-created_at', '-id'], name='activity_type_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_tableversion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='audit',
+            index=models.Index(fields=['status', 'assigned_to'], name='audit_status_dept_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='compliancereport',
+            index=models.Index(fields=['report_type', 'status'], name='compliance_type_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='compliancereport',
+            index=models.Index(fields=['status'], name='compliance_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='counselingappointment',
+            index=models.Index(fields=['counselor', 'date'], name='counseling_counselor_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthrecord',
+            index=models.Index(fields=['student', 'visit_date'], name='health_student_visit_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='housing',
+            index=models.Index(fields=['room_type'], name='housing_room_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='housingapplication',
+            index=models.Index(fields=['status', 'student'], name='housing_app_status_student_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='libraryborrowing',
+            index=models.Index(fields=['user', 'return_date'], name='borrowing_user_return_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='libraryresource',
+            index=models.Index(fields=['resource_type', 'available_copies'], name='resource_type_avail_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='researchgrant',
+            index=models.Index(fields=['status'], name='grant_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='researchproject',
+            index=models.Index(fields=['status'], name='project_status_idx'),
+        ),
+    ]
@@ -0,0 +1,123 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:00
+
+import re
+
+from django.db import migrations, models
+
+# Frozen copy of core.search as of this migration: the ISBN normalization
+# and the full-text index it installed
+
+TABLE = 'core_libraryresource'
+FTS_TABLE = 'core_libraryresource_fts'
+SEARCH_INDEX = 'core_libraryresource_search_idx'
+
+_SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_insert': (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON {TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, title, author, isbn) VALUES (new.id, new.title, new.author, new.isbn); END"
+    ),
+    f'{FTS_TABLE}_delete': (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON {TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author, isbn) "
+        f"VALUES ('delete', old.id, old.title, old.author, old.isbn); END"
+    ),
+    f'{FTS_TABLE}_update': (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF title, author, isbn ON {TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author, isbn) "
+        f"VALUES ('delete', old.id, old.title, old.author, old.isbn); "
+        f"INSERT INTO {FTS_TABLE}(rowid, title, author, isbn) VALUES (new.id, new.title, new.author, new.isbn); END"
+    ),
+}
+
+_PG_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce({prefix}title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce({prefix}author, '')), 'B')"
+)
+
+_MYSQL_INDEXES = {
+    SEARCH_INDEX: '(title, author)',
+    f'{TABLE}_title_ft': '(title)',
+    f'{TABLE}_author_ft': '(author)',
+}
+
+
+def normalize_isbn(value):
+    return re.sub(r'[^0-9Xx]', '', value or '').upper()
+
+
+def install(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"title, author, isbn, content='{TABLE}', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2', prefix='3')"
+            )
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [TABLE])
+            existing = {row[0] for row in cursor.fetchall()}
+            missing = [name for name in _SQLITE_TRIGGERS if name not in existing]
+            for name in missing:
+                cursor.execute(_SQLITE_TRIGGERS[name])
+            if missing:
+                # Rows written while the triggers were absent are not indexed yet
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {SEARCH_INDEX} ON {TABLE} "
+                f"USING GIN (({_PG_VECTOR.format(prefix='')}))"
+            )
+        elif connection.vendor == 'mysql':
+            existing = connection.introspection.get_constraints(cursor, TABLE)
+            for name, columns in _MYSQL_INDEXES.items():
+                if name not in existing:
+                    cursor.execute(f'CREATE FULLTEXT INDEX {name} ON {TABLE} {columns}')
+
+
+def uninstall(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for name in _SQLITE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {SEARCH_INDEX}')
+        elif connection.vendor == 'mysql':
+            existing = connection.introspection.get_constraints(cursor, TABLE)
+            for name in _MYSQL_INDEXES:
+                if name in existing:
+                    cursor.execute(f'DROP INDEX {name} ON {TABLE}')
+
+
+def normalize_isbns(apps, schema_editor):
+    LibraryResource = apps.get_model('core', 'LibraryResource')
+    changed = []
+    for resource in LibraryResource.objects.exclude(isbn='').only('pk', 'isbn').iterator():
+        isbn = normalize_isbn(resource.isbn)
+        if isbn != resource.isbn:
+            resource.isbn = isbn
+            changed.append(resource)
+    LibraryResource.objects.bulk_update(changed, ['isbn'], batch_size=500)
+
+
+def install_search_index(apps, schema_editor):
+    install(schema_editor.connection)
+
+
+def uninstall_search_index(apps, schema_editor):
+    uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_isbns, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='libraryresource',
+            index=models.Index(fields=['isbn'], name='resource_isbn_idx'),
+        ),
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
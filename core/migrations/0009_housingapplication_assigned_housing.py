@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_library_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='housingapplication',
+            name='assigned_housing',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assignments', to='core.housing'),
+        ),
+    ]
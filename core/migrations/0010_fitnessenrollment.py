@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_housingapplication_assigned_housing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FitnessEnrollment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('ENROLLED', 'Enrolled'), ('WAITLISTED', 'Waitlisted'), ('DROPPED', 'Dropped')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('fitness_class', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to='core.fitnessclass')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fitness_enrollments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['fitness_class', 'status', 'created_at', 'id'], name='fitness_enrollment_queue_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'DROPPED'), _negated=True), fields=('fitness_class', 'student'), name='fitness_enrollment_active_uniq')],
+            },
+        ),
+    ]
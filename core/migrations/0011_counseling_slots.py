@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:00
+
+import datetime
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def slot_bounds(date, time):
+    # Frozen copy of core.scheduling.slot_bounds as of this migration
+    start = timezone.make_aware(datetime.datetime.combine(date, time), timezone.get_default_timezone())
+    return start, start + datetime.timedelta(minutes=settings.COUNSELING_SLOT_MINUTES)
+
+
+def fill_spans(apps, schema_editor):
+    CounselingAppointment = apps.get_model('core', 'CounselingAppointment')
+    changed = []
+    for appointment in CounselingAppointment.objects.only('pk', 'date', 'time').iterator():
+        appointment.start, appointment.end = slot_bounds(appointment.date, appointment.time)
+        changed.append(appointment)
+    CounselingAppointment.objects.bulk_update(changed, ['start', 'end'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_fitnessenrollment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='counselingappointment',
+            name='start',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='counselingappointment',
+            name='end',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_spans, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='counselingappointment',
+            name='start',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name='counselingappointment',
+            name='end',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='counselingappointment',
+            index=models.Index(fields=['counselor', 'start', 'end'], name='counseling_counselor_span_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='counselingappointment',
+            index=models.Index(fields=['start', 'end'], name='counseling_span_idx'),
+        ),
+        migrations.CreateModel(
+            name='CounselorAvailability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.IntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('valid_from', models.DateField(blank=True, null=True)),
+                ('valid_until', models.DateField(blank=True, null=True)),
+                ('counselor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'counselor availability',
+                'indexes': [models.Index(fields=['counselor', 'weekday'], name='availability_counselor_day_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:38
+
+import django.db.models.deletion
+from django.conf import settings
+from collections import defaultdict, deque
+
+from django.db import migrations, models
+
+
+def build_closure(apps, schema_editor):
+    Course = apps.get_model('core', 'Course')
+    PrerequisiteClosure = apps.get_model('core', 'PrerequisiteClosure')
+    direct = defaultdict(list)
+    for course_id, prerequisite_id in Course.prerequisites.through.objects.values_list('from_course_id', 'to_course_id'):
+        direct[course_id].append(prerequisite_id)
+    rows = []
+    for course_id in list(direct):
+        # Breadth-first, so the first visit is the shortest chain; existing
+        # cycles are cut where they return to the course
+        depths = {}
+        queue = deque((prerequisite_id, 1) for prerequisite_id in direct[course_id])
+        while queue:
+            prerequisite_id, depth = queue.popleft()
+            if prerequisite_id in depths or prerequisite_id == course_id:
+                continue
+            depths[prerequisite_id] = depth
+            queue.extend((ancestor, depth + 1) for ancestor in direct[prerequisite_id])
+        rows.extend(PrerequisiteClosure(course_id=course_id, prerequisite_id=prerequisite_id, depth=depth)
+                    for prerequisite_id, depth in depths.items())
+    PrerequisiteClosure.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_counseling_slots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseCompletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade', models.CharField(blank=True, max_length=2)),
+                ('completed_on', models.DateField()),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='completions', to='core.course')),
+                ('semester', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.semester')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='course_completions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['course', 'student'], name='completion_course_student_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'course'), name='course_completion_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PrerequisiteClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prerequisite_closure', to='core.course')),
+                ('prerequisite', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='required_by_closure', to='core.course')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['prerequisite', 'course'], name='prerequisite_closure_rev_idx')],
+                'constraints': [models.UniqueConstraint(fields=('course', 'prerequisite'), name='prerequisite_closure_uniq')],
+            },
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
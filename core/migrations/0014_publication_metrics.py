@@ -0,0 +1,90 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:59
+
+import django.db.models.deletion
+from collections import Counter, defaultdict
+
+from django.db import migrations, models
+
+
+def backfill_metrics(apps, schema_editor):
+    Department = apps.get_model('core', 'Department')
+    FacultyProfile = apps.get_model('core', 'FacultyProfile')
+    Publication = apps.get_model('core', 'Publication')
+    PublicationMetrics = apps.get_model('core', 'PublicationMetrics')
+    citations = defaultdict(list)
+    years = defaultdict(Counter)
+    for faculty_id, department_id, cited, date in Publication.objects.values_list(
+        'faculty_id', 'faculty__department_id', 'citation_count', 'publication_date'
+    ):
+        scopes = [('FACULTY', faculty_id), ('UNIVERSITY', None)]
+        if department_id is not None:
+            scopes.append(('DEPARTMENT', department_id))
+        for scope in scopes:
+            citations[scope].append(cited)
+            years[scope][str(date.year)] += 1
+
+    def row(scope, key):
+        cited = sorted(citations[scope, key], reverse=True)
+        return PublicationMetrics(
+            scope=scope,
+            faculty_id=key if scope == 'FACULTY' else None,
+            department_id=key if scope == 'DEPARTMENT' else None,
+            publications=len(cited),
+            citations=sum(cited),
+            h_index=sum(1 for rank, count in enumerate(cited, 1) if count >= rank),
+            per_year=dict(sorted(years[scope, key].items())),
+        )
+
+    rows = [row('FACULTY', pk) for pk in FacultyProfile.objects.values_list('pk', flat=True)]
+    rows += [row('DEPARTMENT', pk) for pk in Department.objects.values_list('pk', flat=True)]
+    rows.append(row('UNIVERSITY', None))
+    PublicationMetrics.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_timetabling'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublicationMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('FACULTY', 'Faculty'), ('DEPARTMENT', 'Department'), ('UNIVERSITY', 'University')], max_length=10)),
+                ('publications', models.PositiveIntegerField(default=0)),
+                ('citations', models.BigIntegerField(default=0)),
+                ('h_index', models.PositiveIntegerField(default=0)),
+                ('per_year', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='publication',
+            index=models.Index(fields=['faculty', 'citation_count'], name='publication_faculty_cites_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='publication',
+            index=models.Index(fields=['citation_count'], name='publication_cites_idx'),
+        ),
+        migrations.AddField(
+            model_name='publicationmetrics',
+            name='department',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='publication_metrics', to='core.department'),
+        ),
+        migrations.AddField(
+            model_name='publicationmetrics',
+            name='faculty',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='publication_metrics', to='core.facultyprofile'),
+        ),
+        migrations.AddConstraint(
+            model_name='publicationmetrics',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('department__isnull', True), ('faculty__isnull', False), ('scope', 'FACULTY')), models.Q(('department__isnull', False), ('faculty__isnull', True), ('scope', 'DEPARTMENT')), models.Q(('department__isnull', True), ('faculty__isnull', True), ('scope', 'UNIVERSITY')), _connector='OR'), name='publication_metrics_scope'),
+        ),
+        migrations.AddConstraint(
+            model_name='publicationmetrics',
+            constraint=models.UniqueConstraint(condition=models.Q(('scope', 'UNIVERSITY')), fields=('scope',), name='publication_metrics_university_uniq'),
+        ),
+        migrations.RunPython(backfill_metrics, migrations.RunPython.noop),
+    ]
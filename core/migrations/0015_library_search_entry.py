@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:34
+
+import core.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_publication_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LibraryResourceSearchEntry',
+            fields=[
+                ('resource', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='core.libraryresource')),
+                ('document', core.search.FullTextField(db_column='core_libraryresource_fts')),
+            ],
+            options={
+                'db_table': 'core_libraryresource_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -1,10 +1,14 @@
 from django.db import models
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 import datetime
 
+from .search import FullTextField, normalize_isbn
+
 class TimeStampedModel(models.Model):
     """
     An abstract base class model that provides self-updating
@@ -87,6 +91,121 @@ class Course(models.Model):
     def __str__(self):
         return f"{self.code} - {self.name}"
 
+class PrerequisiteClosure(models.Model):
+    """
+    One row per (course, direct or indirect prerequisite), with the length
+    of the shortest prerequisite chain between them. Maintained by
+    core.prerequisites; never written directly.
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='prerequisite_closure')
+    prerequisite = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='required_by_closure')
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'prerequisite'], name='prerequisite_closure_uniq'),
+        ]
+        indexes = [
+            # Courses that depend on a given course
+            models.Index(fields=['prerequisite', 'course'], name='prerequisite_closure_rev_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.course_id} requires {self.prerequisite_id} (depth {self.depth})"
+
+class CourseCompletion(models.Model):
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='course_completions')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='completions')
+    semester = models.ForeignKey(Semester, on_delete=models.SET_NULL, null=True, blank=True)
+    grade = models.CharField(max_length=2, blank=True)
+    completed_on = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'course'], name='course_completion_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['course', 'student'], name='completion_course_student_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.username} - {self.course.code}"
+
+class CourseEnrollment(models.Model):
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='course_enrollments')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='enrollments')
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['semester', 'course', 'student'], name='course_enrollment_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['student', 'semester'], name='course_enrollment_student_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.username} - {self.course.code} ({self.semester})"
+
+class Classroom(models.Model):
+    building = models.CharField(max_length=100)
+    room_number = models.CharField(max_length=10)
+    capacity = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['building', 'room_number'], name='classroom_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.building} - {self.room_number}"
+
+class TimetableSlot(models.Model):
+    """
+    A teaching period (``CLASS``, on a weekday, repeating every week) or an
+    exam sitting (``EXAM``, on a date). Slots of one semester and kind do
+    not overlap.
+    """
+    KIND_CHOICES = [
+        ('CLASS', 'Class'),
+        ('EXAM', 'Exam'),
+    ]
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE, related_name='timetable_slots')
+    kind = models.CharField(max_length=5, choices=KIND_CHOICES)
+    weekday = models.IntegerField(null=True, blank=True, validators=[MinValueValidator(0), MaxValueValidator(6)])
+    date = models.DateField(null=True, blank=True)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['semester', 'kind'], name='timetable_slot_kind_idx'),
+        ]
+
+    def __str__(self):
+        day = self.date if self.kind == 'EXAM' else f'weekday {self.weekday}'
+        return f"{self.get_kind_display()} {day} {self.start_time}-{self.end_time}"
+
+class TimetableEntry(models.Model):
+    """A course's slot and room in a semester's class or exam timetable; written by core.timetabling."""
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=5, choices=TimetableSlot.KIND_CHOICES)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='timetable_entries')
+    slot = models.ForeignKey(TimetableSlot, on_delete=models.CASCADE, related_name='entries')
+    classroom = models.ForeignKey(Classroom, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = 'timetable entries'
+        constraints = [
+            models.UniqueConstraint(fields=['semester', 'kind', 'course'], name='timetable_entry_course_uniq'),
+            models.UniqueConstraint(fields=['slot', 'classroom'], name='timetable_entry_room_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.course.code} - {self.slot}"
+
 class FacultyProfile(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True)
@@ -106,10 +225,62 @@ class Publication(models.Model):
     publication_date = models.DateField()
     doi = models.CharField(max_length=100, blank=True)
     citation_count = models.IntegerField(default=0)
-    
+
+    class Meta:
+        indexes = [
+            # Counts of a faculty member's (or everyone's) papers cited at least n times, for h-index upkeep
+            models.Index(fields=['faculty', 'citation_count'], name='publication_faculty_cites_idx'),
+            models.Index(fields=['citation_count'], name='publication_cites_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
+class PublicationMetrics(models.Model):
+    """
+    Publication count, total citations, h-index and publications per year
+    for one faculty member, one department, or the whole university.
+    Maintained by core.bibliometrics; never written directly.
+    """
+    FACULTY = 'FACULTY'
+    DEPARTMENT = 'DEPARTMENT'
+    UNIVERSITY = 'UNIVERSITY'
+    SCOPES = [
+        (FACULTY, 'Faculty'),
+        (DEPARTMENT, 'Department'),
+        (UNIVERSITY, 'University'),
+    ]
+    scope = models.CharField(max_length=10, choices=SCOPES)
+    faculty = models.OneToOneField(FacultyProfile, on_delete=models.CASCADE, null=True, blank=True,
+                                   related_name='publication_metrics')
+    department = models.OneToOneField(Department, on_delete=models.CASCADE, null=True, blank=True,
+                                      related_name='publication_metrics')
+    publications = models.PositiveIntegerField(default=0)
+    citations = models.BigIntegerField(default=0)
+    h_index = models.PositiveIntegerField(default=0)
+    # {"2024": 3, ...}, years in ascending order
+    per_year = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    models.Q(scope='FACULTY', faculty__isnull=False, department__isnull=True)
+                    | models.Q(scope='DEPARTMENT', faculty__isnull=True, department__isnull=False)
+                    | models.Q(scope='UNIVERSITY', faculty__isnull=True, department__isnull=True)
+                ),
+                name='publication_metrics_scope',
+            ),
+            models.UniqueConstraint(fields=['scope'], condition=models.Q(scope='UNIVERSITY'),
+                                    name='publication_metrics_university_uniq'),
+        ]
+
+    def __str__(self):
+        if self.scope == self.UNIVERSITY:
+            return f"University: h={self.h_index}"
+        return f"{self.get_scope_display()} {self.faculty_id or self.department_id}: h={self.h_index}"
+
 class ResearchGrant(models.Model):
     GRANT_STATUS = [
         ('OPEN', 'Open'),
@@ -124,6 +295,11 @@ class ResearchGrant(models.Model):
     status = models.CharField(max_length=12, choices=GRANT_STATUS)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['status'], name='grant_status_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -143,6 +319,11 @@ class ResearchProject(models.Model):
     status = models.CharField(max_length=12, choices=PROJECT_STATUS)
     description = models.TextField()
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['status'], name='project_status_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -162,9 +343,33 @@ class LibraryResource(models.Model):
     available_copies = models.IntegerField(default=1)
     total_copies = models.IntegerField(default=1)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['resource_type', 'available_copies'], name='resource_type_avail_idx'),
+            models.Index(fields=['isbn'], name='resource_isbn_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.isbn = normalize_isbn(self.isbn)
+        super().save(*args, **kwargs)
+
+class LibraryResourceSearchEntry(models.Model):
+    """
+    A LibraryResource's row in the SQLite full-text index, which triggers
+    keep in step (see core.search). The table exists on SQLite only and
+    is read through ``LibraryResource.search_entry``, never written.
+    """
+    resource = models.OneToOneField(LibraryResource, primary_key=True, db_column='rowid', db_constraint=False,
+                                    on_delete=models.DO_NOTHING, related_name='search_entry')
+    document = FullTextField(db_column='core_libraryresource_fts')
+
+    class Meta:
+        managed = False
+        db_table = 'core_libraryresource_fts'
+
 class LibraryBorrowing(models.Model):
     resource = models.ForeignKey(LibraryResource, on_delete=models.CASCADE)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -173,6 +378,13 @@ class LibraryBorrowing(models.Model):
     return_date = models.DateField(null=True, blank=True)
     renewals = models.IntegerField(default=0)
     
+    class Meta:
+        indexes = [
+            # Keyset pagination order
+            models.Index(fields=['borrow_date', 'id'], name='borrowing_date_id_idx'),
+            models.Index(fields=['user', 'return_date'], name='borrowing_user_return_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.resource.title}"
 
@@ -189,6 +401,11 @@ class Housing(models.Model):
     occupied = models.IntegerField(default=0)
     semester_fee = models.DecimalField(max_digits=8, decimal_places=2)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['room_type'], name='housing_room_type_idx'),
+        ]
+
     def __str__(self):
         return f"{self.building} - {self.room_number}"
 
@@ -205,8 +422,15 @@ class HousingApplication(models.Model):
     roommate_preference = models.CharField(max_length=200, blank=True)
     special_requests = models.TextField(blank=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    assigned_housing = models.ForeignKey(Housing, on_delete=models.SET_NULL, null=True, blank=True,
+                                         related_name='assignments')
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'student'], name='housing_app_status_student_idx'),
+        ]
+
     def __str__(self):
         return f"{self.student.username} - {self.semester}"
 
@@ -222,10 +446,70 @@ class CounselingAppointment(models.Model):
     session_type = models.CharField(max_length=10, choices=SESSION_TYPE)
     reason = models.TextField()
     status = models.CharField(max_length=20, default='SCHEDULED')
+    # Derived from date/time and the slot length on save; see core.scheduling
+    start = models.DateTimeField(editable=False)
+    end = models.DateTimeField(editable=False)
     
+    class Meta:
+        indexes = [
+            # Keyset pagination order
+            models.Index(fields=['date', 'id'], name='counseling_date_id_idx'),
+            models.Index(fields=['counselor', 'date'], name='counseling_counselor_date_idx'),
+            # Overlap check for one counselor, and the free-slot search range scan
+            models.Index(fields=['counselor', 'start', 'end'], name='counseling_counselor_span_idx'),
+            models.Index(fields=['start', 'end'], name='counseling_span_idx'),
+        ]
+
     def __str__(self):
         return f"{self.student.username} - {self.date}"
 
+    def set_span(self):
+        from .scheduling import slot_bounds
+        self.start, self.end = slot_bounds(self.date, self.time)
+
+    def clean(self):
+        from .scheduling import SlotConflict, check_booking
+        if self.date is None or self.time is None or self.counselor_id is None:
+            return
+        previous = CounselingAppointment.objects.filter(pk=self.pk).first() if self.pk else None
+        try:
+            check_booking(self, previous)
+        except SlotConflict as exc:
+            raise ValidationError({'time': [str(exc.detail)]})
+
+    def save(self, *args, **kwargs):
+        self.set_span()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'date', 'time'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'start', 'end'}
+        super().save(*args, **kwargs)
+
+class CounselorAvailability(models.Model):
+    WEEKDAYS = [
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    ]
+    counselor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='availability')
+    weekday = models.IntegerField(choices=WEEKDAYS)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    valid_from = models.DateField(null=True, blank=True)
+    valid_until = models.DateField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = 'counselor availability'
+        indexes = [
+            models.Index(fields=['counselor', 'weekday'], name='availability_counselor_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.counselor.username} - {self.get_weekday_display()} {self.start_time}-{self.end_time}"
+
 class HealthRecord(models.Model):
     student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     visit_date = models.DateField()
@@ -234,6 +518,13 @@ class HealthRecord(models.Model):
     prescription = models.TextField(blank=True)
     notes = models.TextField(blank=True)
     
+    class Meta:
+        indexes = [
+            # Keyset pagination order
+            models.Index(fields=['visit_date', 'id'], name='health_visit_date_id_idx'),
+            models.Index(fields=['student', 'visit_date'], name='health_student_visit_idx'),
+        ]
+
     def __str__(self):
         return f"{self.student.username} - {self.visit_date}"
 
@@ -248,6 +539,33 @@ class FitnessClass(models.Model):
     def __str__(self):
         return self.name
 
+class FitnessEnrollment(models.Model):
+    STATUS_CHOICES = [
+        ('ENROLLED', 'Enrolled'),
+        ('WAITLISTED', 'Waitlisted'),
+        ('DROPPED', 'Dropped'),
+    ]
+    fitness_class = models.ForeignKey(FitnessClass, on_delete=models.CASCADE, related_name='enrollments')
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                related_name='fitness_enrollments')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # One live enrollment or waitlist place per student and class
+            models.UniqueConstraint(fields=['fitness_class', 'student'], condition=~models.Q(status='DROPPED'),
+                                    name='fitness_enrollment_active_uniq'),
+        ]
+        indexes = [
+            # Waitlist head: the class's oldest WAITLISTED row
+            models.Index(fields=['fitness_class', 'status', 'created_at', 'id'], name='fitness_enrollment_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.username} - {self.fitness_class} ({self.status})"
+
 class ComplianceReport(models.Model):
     REPORT_STATUS = [
         ('DRAFT', 'Draft'),
@@ -264,6 +582,12 @@ class ComplianceReport(models.Model):
     status = models.CharField(max_length=12, choices=REPORT_STATUS)
     file_path = models.CharField(max_length=255)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['report_type', 'status'], name='compliance_type_status_idx'),
+            models.Index(fields=['status'], name='compliance_status_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -281,5 +605,88 @@ class Audit(models.Model):
     findings = models.TextField(blank=True)
     recommendations = models.TextField(blank=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'assigned_to'], name='audit_status_dept_idx'),
+        ]
+
     def __str__(self):
         return f"{self.audit_type} - {self.start_date}"
+
+class DashboardStatistics(models.Model):
+    """
+    Single-row snapshot of the counters served by the ``stats/`` endpoint.
+
+    Kept current by the receivers in core.signals and refreshed wholesale by
+    ``manage.py refresh_dashboard_stats`` after bulk loads.
+    """
+    total_students = models.IntegerField(default=0)
+    total_faculty = models.IntegerField(default=0)
+    total_departments = models.IntegerField(default=0)
+    active_courses = models.IntegerField(default=0)
+    library_resources = models.IntegerField(default=0)
+    housing_capacity = models.IntegerField(default=0)
+    housing_occupied = models.IntegerField(default=0)
+    research_projects = models.IntegerField(default=0)
+    compliance_score = models.IntegerField(default=0)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name_plural = 'dashboard statistics'
+
+    def __str__(self):
+        return f"Dashboard statistics at {self.refreshed_at}"
+
+    def as_dict(self):
+        return {
+            'total_students': self.total_students,
+            'total_faculty': self.total_faculty,
+            'total_departments': self.total_departments,
+            'active_courses': self.active_courses,
+            'library_resources': self.library_resources,
+            'housing_occupancy': {
+                'total_capacity': self.housing_capacity,
+                'total_occupied': self.housing_occupied,
+            },
+            'research_projects': self.research_projects,
+            'compliance_score': self.compliance_score,
+            'refreshed_at': self.refreshed_at.isoformat(),
+        }
+
+class ActivityEvent(models.Model):
+    """
+    Append-only feed of activity across modules, written by core.activity
+    when source rows are created. Descriptions are rendered at write time
+    so reading the feed never touches the source tables.
+    """
+    EVENT_TYPES = [
+        ('library', 'Library'),
+        ('housing', 'Housing'),
+        ('counseling', 'Counseling'),
+    ]
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPES)
+    description = models.CharField(max_length=255)
+    object_id = models.PositiveBigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='activity_created_idx'),
+            models.Index(fields=['event_type', '-created_at', '-id'], name='activity_type_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type}: {self.description}"
+
+class TableVersion(models.Model):
+    """
+    Per-table change counter bumped by core.signals on every write. It
+    backs the API's ETag/Last-Modified validators, covering tables that
+    have no timestamps as well as deletes, which ``updated_at`` cannot show.
+    """
+    table = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.table} v{self.version}"
@@ -0,0 +1,99 @@
+"""
+A student's record across modules in one response: courses, completions,
+open library loans, housing applications, upcoming counseling
+appointments and fitness enrollments.
+
+Each section is one indexed query on the student's rows, independent of
+the others, so they are read concurrently with core.parallel.
+"""
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from . import parallel
+from .models import (
+    AcademicYear, Course, CourseCompletion, CourseEnrollment, CounselingAppointment, FitnessClass,
+    FitnessEnrollment, Housing, HousingApplication, LibraryBorrowing, LibraryResource, Semester
+)
+
+User = get_user_model()
+
+SOURCE_MODELS = (
+    User, AcademicYear, Semester, Course, CourseEnrollment, CourseCompletion, LibraryBorrowing, LibraryResource,
+    Housing, HousingApplication, CounselingAppointment, FitnessClass, FitnessEnrollment,
+)
+
+
+def _enrollments(student):
+    return [
+        {'course': e.course_id, 'code': e.course.code, 'name': e.course.name, 'credits': e.course.credits,
+         'semester': e.semester_id, 'semester_name': str(e.semester)}
+        for e in CourseEnrollment.objects.filter(student=student).select_related(
+            'course', 'semester__academic_year'
+        ).order_by('-semester__start_date', 'course__code')
+    ]
+
+
+def _completions(student):
+    return [
+        {'course': c.course_id, 'code': c.course.code, 'credits': c.course.credits, 'grade': c.grade,
+         'completed_on': c.completed_on}
+        for c in CourseCompletion.objects.filter(student=student).select_related('course').order_by('completed_on')
+    ]
+
+
+def _library_loans(student, today):
+    return [
+        {'id': b.pk, 'resource': b.resource_id, 'title': b.resource.title, 'due_date': b.due_date,
+         'overdue': b.due_date < today}
+        for b in LibraryBorrowing.objects.filter(user=student, return_date__isnull=True).select_related(
+            'resource'
+        ).order_by('due_date')
+    ]
+
+
+def _housing(student):
+    return [
+        {'id': a.pk, 'semester': a.semester_id, 'status': a.status,
+         'assigned_housing': str(a.assigned_housing) if a.assigned_housing else None}
+        for a in HousingApplication.objects.filter(student=student).select_related('assigned_housing').order_by(
+            '-created_at'
+        )
+    ]
+
+
+def _counseling(student, now):
+    return [
+        {'id': a.pk, 'start': a.start, 'session_type': a.session_type, 'status': a.status,
+         'counselor_name': a.counselor.get_full_name()}
+        for a in CounselingAppointment.objects.filter(student=student, start__gte=now).select_related(
+            'counselor'
+        ).order_by('start')
+    ]
+
+
+def _fitness(student):
+    return [
+        {'id': e.pk, 'fitness_class': e.fitness_class_id, 'class_name': e.fitness_class.name,
+         'schedule': e.fitness_class.schedule, 'status': e.status}
+        for e in FitnessEnrollment.objects.filter(student=student).exclude(status='DROPPED').select_related(
+            'fitness_class'
+        ).order_by('created_at')
+    ]
+
+
+def student_overview(student):
+    now, today = timezone.now(), timezone.localdate()
+    sections = parallel.gather({
+        'enrollments': lambda: _enrollments(student),
+        'completions': lambda: _completions(student),
+        'library_loans': lambda: _library_loans(student, today),
+        'housing_applications': lambda: _housing(student),
+        'counseling_appointments': lambda: _counseling(student, now),
+        'fitness_enrollments': lambda: _fitness(student),
+    })
+    return {
+        'student': {'id': student.pk, 'username': student.username, 'name': student.get_full_name(),
+                    'email': student.email, 'role': student.role},
+        'credits_completed': sum(row['credits'] for row in sections['completions']),
+        **sections,
+    }
@@ -0,0 +1,54 @@
+"""
+Independent read queries run side by side.
+
+Aggregate endpoints (the dashboard refresh, a student's overview) issue
+several queries that do not depend on each other. ``gather()`` runs them on
+a shared thread pool, each thread on its own database connection, so the
+response waits for the slowest query rather than the sum of them. This
+serves the WSGI and ASGI entry points alike: DRF views are synchronous, and
+Django's async ORM runs every query on one thread, so awaiting it would
+not overlap them.
+
+Tasks must only read. Inside a transaction they run one after another on
+the calling thread, since other connections cannot see its uncommitted
+rows; likewise when ``AGGREGATE_QUERY_WORKERS`` is 1. Each task runs in a
+copy of the caller's context, so it reads from the same database (see
+core.routing).
+"""
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+WORKERS = settings.AGGREGATE_QUERY_WORKERS
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='aggregate-query')
+        return _executor
+
+
+def _run(task):
+    # Pool threads outlive requests, so their connections follow the
+    # request lifecycle rules (CONN_MAX_AGE, broken connections) here
+    close_old_connections()
+    try:
+        return task()
+    finally:
+        close_old_connections()
+
+
+def gather(tasks):
+    """Call every ``tasks`` value (name -> callable) and return name -> result."""
+    if WORKERS <= 1 or len(tasks) <= 1 or connection.in_atomic_block:
+        return {name: task() for name, task in tasks.items()}
+    futures = {name: _pool().submit(contextvars.copy_context().run, _run, task) for name, task in tasks.items()}
+    return {name: future.result() for name, future in futures.items()}
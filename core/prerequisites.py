@@ -0,0 +1,164 @@
+"""
+Transitive closure of ``Course.prerequisites``.
+
+PrerequisiteClosure holds a row for every course and each course it
+requires, directly or through a chain, with the shortest chain length as
+``depth``. Reading a course's whole prerequisite DAG, or checking many
+students against many courses, is then a fixed number of queries instead
+of one query per level.
+
+When a course's direct prerequisites change, only that course and the
+courses that (transitively) require it can gain or lose ancestors.
+``refresh()`` recomputes exactly that set, in topological order, from the
+direct edges of the set and the stored closure of everything outside it.
+A change that would make a course require itself raises
+PrerequisiteCycle and, inside a transaction, is rolled back.
+"""
+from collections import defaultdict, deque, namedtuple
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .models import Course, CourseCompletion, PrerequisiteClosure
+
+Eligibility = namedtuple('Eligibility', 'student course eligible missing')
+
+Edge = Course.prerequisites.through
+
+BATCH_SIZE = 1000
+
+# Upper bound on students x courses per eligibility request
+MAX_PAIRS = settings.COURSE_ELIGIBILITY_MAX_PAIRS
+
+
+class PrerequisiteCycle(ValidationError):
+    default_detail = 'A course cannot require itself, directly or through its prerequisites.'
+    default_code = 'prerequisite_cycle'
+
+
+def would_cycle(course_id, prerequisite_ids):
+    """Whether making ``prerequisite_ids`` direct prerequisites of ``course_id`` closes a loop."""
+    prerequisite_ids = set(prerequisite_ids)
+    if course_id is None or not prerequisite_ids:
+        return False
+    return course_id in prerequisite_ids or PrerequisiteClosure.objects.filter(
+        course_id__in=prerequisite_ids, prerequisite_id=course_id
+    ).exists()
+
+
+def dependents(course_ids):
+    """Ids of the courses that require any of ``course_ids``, directly or not."""
+    return set(PrerequisiteClosure.objects.filter(
+        prerequisite_id__in=course_ids
+    ).values_list('course_id', flat=True))
+
+
+def refresh(course_ids):
+    """
+    Recompute the closure of ``course_ids`` and every course that depends
+    on them, after their direct prerequisites changed. Returns the number
+    of closure rows written.
+    """
+    affected = set(course_ids) | dependents(course_ids)
+    if not affected:
+        return 0
+    direct = defaultdict(set)
+    for course_id, prerequisite_id in Edge.objects.filter(
+        from_course_id__in=affected
+    ).values_list('from_course_id', 'to_course_id'):
+        direct[course_id].add(prerequisite_id)
+
+    closure = defaultdict(dict)
+    outside = {p for prerequisites in direct.values() for p in prerequisites} - affected
+    for course_id, prerequisite_id, depth in PrerequisiteClosure.objects.filter(
+        course_id__in=outside
+    ).values_list('course_id', 'prerequisite_id', 'depth'):
+        closure[course_id][prerequisite_id] = depth
+
+    # Kahn's algorithm over the affected courses: a course is computed once
+    # all of its affected prerequisites have been
+    waiting = {course_id: len(direct[course_id] & affected) for course_id in affected}
+    required_by = defaultdict(list)
+    for course_id in affected:
+        for prerequisite_id in direct[course_id] & affected:
+            required_by[prerequisite_id].append(course_id)
+    ready = deque(course_id for course_id, count in waiting.items() if not count)
+    done = 0
+    while ready:
+        course_id = ready.popleft()
+        done += 1
+        ancestors = closure[course_id]
+        for prerequisite_id in direct[course_id]:
+            ancestors[prerequisite_id] = 1
+        for prerequisite_id in direct[course_id]:
+            for ancestor, depth in closure[prerequisite_id].items():
+                if depth + 1 < ancestors.get(ancestor, depth + 2):
+                    ancestors[ancestor] = depth + 1
+        for dependent in required_by[course_id]:
+            waiting[dependent] -= 1
+            if not waiting[dependent]:
+                ready.append(dependent)
+    if done < len(affected):
+        stuck = sorted(course_id for course_id, count in waiting.items() if count)
+        raise PrerequisiteCycle(f'Prerequisite cycle through courses {stuck}.')
+
+    rows = [
+        PrerequisiteClosure(course_id=course_id, prerequisite_id=prerequisite_id, depth=depth)
+        for course_id in affected
+        for prerequisite_id, depth in closure[course_id].items()
+    ]
+    with transaction.atomic(savepoint=False):
+        PrerequisiteClosure.objects.filter(course_id__in=affected).delete()
+        PrerequisiteClosure.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
+
+
+def rebuild():
+    """Recompute the whole closure table; returns the number of rows."""
+    with transaction.atomic():
+        PrerequisiteClosure.objects.all().delete()
+        return refresh(Course.objects.values_list('pk', flat=True))
+
+
+def prerequisite_tree(course):
+    """
+    Return ``(nodes, edges)`` for the prerequisite DAG of ``course``:
+    the closure rows (with their prerequisite course loaded), nearest
+    first, and the direct ``(course_id, prerequisite_id)`` edges among
+    ``course`` and its prerequisites.
+    """
+    nodes = list(PrerequisiteClosure.objects.filter(course=course).select_related(
+        'prerequisite__department'
+    ).order_by('depth', 'prerequisite__code'))
+    edges = sorted(Edge.objects.filter(
+        from_course_id__in=[course.pk] + [node.prerequisite_id for node in nodes]
+    ).values_list('from_course_id', 'to_course_id'))
+    return nodes, edges
+
+
+def check_eligibility(student_ids, course_ids):
+    """
+    Return an Eligibility per (student, course) pair: a student may take a
+    course once they have completed every course in its prerequisite
+    closure. ``missing`` lists the prerequisites still outstanding. Two
+    queries, whatever the number of students and courses.
+    """
+    required = defaultdict(set)
+    for course_id, prerequisite_id in PrerequisiteClosure.objects.filter(
+        course_id__in=course_ids
+    ).values_list('course_id', 'prerequisite_id'):
+        required[course_id].add(prerequisite_id)
+    completed = defaultdict(set)
+    wanted = set().union(*required.values())
+    if wanted:
+        for student_id, course_id in CourseCompletion.objects.filter(
+            student_id__in=student_ids, course_id__in=wanted
+        ).values_list('student_id', 'course_id'):
+            completed[student_id].add(course_id)
+    results = []
+    for student_id in student_ids:
+        for course_id in course_ids:
+            missing = sorted(required[course_id] - completed[student_id])
+            results.append(Eligibility(student_id, course_id, not missing, missing))
+    return results
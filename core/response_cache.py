@@ -0,0 +1,83 @@
+"""
+Rendered list and detail responses of read-heavy ViewSets.
+
+A ViewSet with ``cache_responses = True`` stores each rendered 200
+response in the ``API_RESPONSE_CACHE_ALIAS`` cache under its ETag, which
+already covers the path, query string, media type and the version counter
+of every table the response reads (see core.versioning), plus the
+caller's visibility scope. The post_save, post_delete and m2m_changed
+receivers in core.signals bump those counters, so a write changes the key
+of exactly the responses built from the written tables; the entries they
+replace are never read again and expire after ``API_RESPONSE_CACHE_SECONDS``.
+
+Hits and misses are counted per ViewSet in each process and served at
+``cache-stats/`` for monitoring. A timeout of 0 turns caching off.
+"""
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from rest_framework.response import Response
+
+
+class ResponseCache:
+    """Rendered responses by scope and validators, with hit and miss counts per label."""
+
+    def __init__(self, alias, timeout):
+        self.alias = alias
+        self.timeout = timeout
+        self.hits = Counter()
+        self.misses = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.timeout > 0
+
+    def key(self, scope, etag, timestamp=None):
+        # The timestamp separates responses whose counters coincide after the
+        # version table was reset, e.g. between test runs
+        return f'api-response:{scope}:{etag[3:-1]}:{timestamp or 0}'
+
+    def get(self, label, key):
+        """The cached response for ``key``, or None; counted under ``label``."""
+        entry = caches[self.alias].get(key)
+        with self._lock:
+            (self.hits if entry is not None else self.misses)[label] += 1
+        if entry is None:
+            return None
+        status, content_type, content = entry
+        response = HttpResponse(content, status=status, content_type=content_type)
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def store(self, key, response):
+        """Cache ``response`` under ``key`` once it is rendered, if it is a successful DRF response."""
+        if not isinstance(response, Response) or response.status_code != 200:
+            return
+        response['X-Cache'] = 'MISS'
+
+        def save(rendered):
+            caches[self.alias].set(
+                key, (rendered.status_code, rendered['Content-Type'], rendered.content), self.timeout
+            )
+        response.add_post_render_callback(save)
+
+    def stats(self):
+        with self._lock:
+            labels = sorted(set(self.hits) | set(self.misses))
+            return {
+                'hits': sum(self.hits.values()),
+                'misses': sum(self.misses.values()),
+                'views': {label: {'hits': self.hits[label], 'misses': self.misses[label]} for label in labels},
+            }
+
+    def reset(self):
+        with self._lock:
+            self.hits.clear()
+            self.misses.clear()
+
+
+response_cache = ResponseCache(settings.API_RESPONSE_CACHE_ALIAS, settings.API_RESPONSE_CACHE_SECONDS)
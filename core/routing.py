@@ -0,0 +1,115 @@
+"""
+Read/write routing between the primary database and a read replica.
+
+Reporting endpoints (dashboard stats, the activity feed, list exports,
+publication metrics, the collaboration graph) only read, and their
+queries are the long ones, so they run on ``DB_READ_ALIAS`` when a
+replica is configured (see erp4uni/database.py). Everything else, every
+write and every read inside a transaction stays on ``default``.
+
+A replica lags its primary, so a user who has just written would not see
+the write on a report. After a successful write request the user is
+pinned to the primary for ``DB_READ_YOUR_WRITES_SECONDS``. Pins live in
+the Django cache, so with several server processes the cache must be
+shared (memcached, Redis) for a pin to follow the user between them.
+
+Routing is per request: each request starts on the primary
+(``primary()``) and ``read_from_replica()`` moves its reads over.
+Threads started through core.parallel inherit the choice.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+READ_ALIAS = settings.DB_READ_ALIAS
+PIN_SECONDS = settings.DB_READ_YOUR_WRITES_SECONDS
+
+# Alias the current request reads from; None leaves reads on the primary
+_read_alias = ContextVar('core_read_alias', default=None)
+
+
+def replica_enabled():
+    return READ_ALIAS != DEFAULT_DB_ALIAS
+
+
+def _pin_key(user):
+    return f'read-your-writes:{user.pk}'
+
+
+def remember_write(user):
+    """Keep ``user``'s reads on the primary until their write has reached the replica."""
+    if replica_enabled() and user.is_authenticated and PIN_SECONDS > 0:
+        cache.set(_pin_key(user), True, PIN_SECONDS)
+
+
+def is_pinned(user):
+    return user.is_authenticated and cache.get(_pin_key(user)) is not None
+
+
+def read_alias():
+    """The alias reads are routed to right now, or None for the primary."""
+    return _read_alias.get()
+
+
+@contextmanager
+def primary():
+    """
+    Read from the primary inside the block and restore the routing after:
+    around each request, and around reads whose results are written back.
+    """
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def read_from_replica(request):
+    """
+    Send the rest of ``request``'s reads to the replica unless it writes
+    or its user is pinned. Call inside ``primary()``, which undoes it.
+    """
+    if replica_enabled() and request.method in SAFE_METHODS and not is_pinned(request.user):
+        _read_alias.set(READ_ALIAS)
+
+
+def replica_reads(view):
+    """Route a read-only function view's queries to the replica; apply below ``@api_view``."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with primary():
+            read_from_replica(request)
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReadReplicaRouter:
+    """Database router for ``DATABASE_ROUTERS``."""
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        # Reads inside a transaction must see its own uncommitted rows
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        # Explicit, or saving an instance read from the replica would write there
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, READ_ALIAS}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives its schema from the primary
+        if db == READ_ALIAS and replica_enabled():
+            return False
+        return None
@@ -0,0 +1,216 @@
+"""
+Counseling appointment slots.
+
+Counselors publish weekly availability windows (CounselorAvailability);
+each window is cut into fixed-length slots of ``SLOT_LENGTH`` starting at
+the window's start. An appointment occupies ``[start, end)``, derived from
+its ``date`` and ``time``, and must not overlap another live appointment
+of the same counselor. The overlap test is one indexed query over
+``(counselor, start, end)``. CounselingAppointment.save() derives the span
+and ``check_booking()`` is run for both the API and the admin.
+
+``free_slots()`` finds the earliest free slots across counselors. It
+loads the availability windows once, then walks forward in time ranges
+that double while they come up short, reading the bookings of each range
+with one ``(start, end)`` range scan. Ranges with no window slots cost no
+query, so a search takes a handful of queries however many counselors
+there are and however full the semester is.
+"""
+import bisect
+import datetime
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .models import CounselingAppointment, CounselorAvailability
+
+SLOT_LENGTH = datetime.timedelta(minutes=settings.COUNSELING_SLOT_MINUTES)
+SEARCH_DAYS = settings.COUNSELING_SEARCH_DAYS
+MAX_RESULTS = 100
+# First stretch of time free_slots() reads bookings for; doubled while short
+SEARCH_SPAN = datetime.timedelta(hours=2)
+
+# Appointments in these states free their slot
+RELEASED_STATUSES = ('CANCELLED',)
+
+Slot = namedtuple('Slot', 'counselor_id start end')
+
+
+class SlotConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The counselor already has an appointment at that time.'
+    default_code = 'conflict'
+
+
+def slot_bounds(date, time):
+    """Return the aware ``(start, end)`` of an appointment on ``date`` at ``time``."""
+    start = timezone.make_aware(datetime.datetime.combine(date, time), timezone.get_default_timezone())
+    return start, start + SLOT_LENGTH
+
+
+def live_appointments():
+    return CounselingAppointment.objects.exclude(status__in=RELEASED_STATUSES)
+
+
+def overlapping(counselor_id, start, end, exclude_pk=None):
+    """Live appointments of ``counselor_id`` that intersect ``[start, end)``."""
+    queryset = live_appointments().filter(counselor_id=counselor_id, start__lt=end, end__gt=start)
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    return queryset
+
+
+def check_free(counselor_id, start, end, exclude_pk=None):
+    """
+    Raise SlotConflict if ``[start, end)`` overlaps a live appointment of
+    the counselor. Inside a transaction the counselor's row is locked first,
+    so two bookings for one counselor cannot both pass the check; SQLite
+    serializes writers anyway and has no row locks.
+    """
+    if connection.features.has_select_for_update:
+        list(get_user_model().objects.select_for_update().filter(pk=counselor_id).values_list('pk'))
+    if overlapping(counselor_id, start, end, exclude_pk).exists():
+        raise SlotConflict()
+
+
+def check_booking(appointment, previous=None):
+    """
+    Derive the span of ``appointment``, saved or not, and check that it may
+    take it: one of the counselor's slots and free of their other live
+    appointments. ``previous`` is the stored row being changed, if any; an
+    appointment that is released, or keeps a slot it already held, is not
+    re-checked. Raises ValidationError or SlotConflict.
+    """
+    appointment.set_span()
+    if appointment.status in RELEASED_STATUSES:
+        return
+    if previous is not None and previous.status not in RELEASED_STATUSES and all(
+        getattr(appointment, name) == getattr(previous, name) for name in ('date', 'time', 'counselor_id')
+    ):
+        return
+    if not check_window(appointment.counselor_id, appointment.start):
+        raise ValidationError({'time': ["Not one of the counselor's available slots."]})
+    check_free(appointment.counselor_id, appointment.start, appointment.end, previous and previous.pk)
+
+
+def _valid_on(window, day):
+    return ((window.valid_from is None or window.valid_from <= day)
+            and (window.valid_until is None or day <= window.valid_until))
+
+
+def window_slots(day, start_time, end_time, lower=None, upper=None):
+    """Slot start times of a window on ``day``, optionally only those in ``[lower, upper)``."""
+    first, _ = slot_bounds(day, start_time)
+    last, _ = slot_bounds(day, end_time)
+    stop = (last - first) // SLOT_LENGTH
+    begin = 0
+    if lower is not None and lower > first:
+        begin = -((first - lower) // SLOT_LENGTH)
+    if upper is not None:
+        stop = min(stop, -((first - upper) // SLOT_LENGTH))
+    return [first + k * SLOT_LENGTH for k in range(begin, stop)]
+
+
+def check_window(counselor_id, start):
+    """
+    Whether an appointment at ``start`` is one of the counselor's slots.
+    Counselors who have published no availability take any time.
+    """
+    windows = list(CounselorAvailability.objects.filter(counselor_id=counselor_id))
+    if not windows:
+        return True
+    local = timezone.localtime(start, timezone.get_default_timezone())
+    day = local.date()
+    return any(
+        start in window_slots(day, window.start_time, window.end_time)
+        for window in windows
+        if window.weekday == day.weekday() and _valid_on(window, day)
+    )
+
+
+def free_slots(after=None, count=10, counselor_ids=None, days=None):
+    """
+    Return up to ``count`` free Slots starting at or after ``after``
+    (default now), earliest first and by counselor id within a start
+    time, looking at most ``days`` (default SEARCH_DAYS) ahead.
+    """
+    after = after or timezone.now()
+    limit = after + datetime.timedelta(days=SEARCH_DAYS if days is None else days)
+    windows = CounselorAvailability.objects.all()
+    if counselor_ids is not None:
+        windows = windows.filter(counselor_id__in=counselor_ids)
+    by_weekday = defaultdict(list)
+    fields = ('counselor_id', 'weekday', 'start_time', 'end_time', 'valid_from', 'valid_until')
+    for window in windows.order_by('counselor_id', 'start_time').values_list(*fields, named=True):
+        by_weekday[window.weekday].append(window)
+    if not by_weekday:
+        return []
+
+    found = []
+    cursor, span = after, SEARCH_SPAN
+    while cursor < limit and len(found) < count:
+        range_end = min(cursor + span, limit)
+        candidates = _candidates(by_weekday, cursor, range_end)
+        if candidates:
+            busy = _bookings(cursor, range_end, counselor_ids)
+            for start, counselor_id in candidates:
+                end = start + SLOT_LENGTH
+                if not _is_busy(busy.get(counselor_id), start, end):
+                    found.append(Slot(counselor_id, start, end))
+                    if len(found) == count:
+                        break
+            # Still short: a busy stretch, so read further ahead per query
+            span *= 2
+        cursor = range_end
+    return found
+
+
+def _candidates(by_weekday, range_start, range_end):
+    """Sorted ``(start, counselor_id)`` of every window slot starting in ``[range_start, range_end)``."""
+    zone = timezone.get_default_timezone()
+    day = timezone.localtime(range_start, zone).date()
+    last = timezone.localtime(range_end, zone).date()
+    candidates = []
+    while day <= last:
+        for window in by_weekday.get(day.weekday(), ()):
+            if _valid_on(window, day):
+                candidates.extend(
+                    (start, window.counselor_id)
+                    for start in window_slots(day, window.start_time, window.end_time, range_start, range_end)
+                )
+        day += datetime.timedelta(days=1)
+    candidates.sort()
+    return candidates
+
+
+def _bookings(range_start, range_end, counselor_ids):
+    """Live bookings that intersect ``[range_start, range_end)``, as sorted spans per counselor."""
+    # No appointment is longer than a day, which bounds the start range
+    queryset = live_appointments().filter(
+        start__gte=range_start - datetime.timedelta(days=1), start__lt=range_end, end__gt=range_start,
+    )
+    if counselor_ids is not None:
+        queryset = queryset.filter(counselor_id__in=counselor_ids)
+    busy = defaultdict(lambda: ([], []))
+    for counselor_id, start, end in queryset.order_by('start').values_list('counselor_id', 'start', 'end'):
+        starts, ends = busy[counselor_id]
+        starts.append(start)
+        ends.append(end)
+    return busy
+
+
+def _is_busy(spans, start, end):
+    if not spans:
+        return False
+    starts, ends = spans
+    # Spans of one counselor never overlap, so ends are sorted like starts:
+    # only the last span that begins before ``end`` can reach into the slot
+    i = bisect.bisect_left(starts, end)
+    return i > 0 and ends[i - 1] > start
+
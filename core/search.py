@@ -0,0 +1,255 @@
+"""
+Full-text search over the library catalogue.
+
+SQLite keeps an external-content FTS5 table in step with
+``core_libraryresource`` through triggers; PostgreSQL uses a GIN index on a
+weighted ``tsvector`` and MySQL ``FULLTEXT`` indexes. On every backend the
+search runs as one query together with the caller's other filters, ranks
+title matches above author matches, treats every word as a prefix and
+matches ISBNs in any hyphenation, as ISBN-10 or ISBN-13.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Lookup, Q, TextField, Value
+from django.db.models.expressions import RawSQL
+
+TABLE = 'core_libraryresource'
+FTS_TABLE = 'core_libraryresource_fts'
+SEARCH_INDEX = 'core_libraryresource_search_idx'
+MAX_TERMS = 10
+# Shorter words match whole words only; a one- or two-letter prefix matches
+# so much of a large catalogue that ranking it dominates the query
+MIN_PREFIX = 3
+
+# FTS5 bm25() column weights, and the PostgreSQL setweight() labels, for title and author
+TITLE_WEIGHT = 10.0
+AUTHOR_WEIGHT = 5.0
+_PG_LABELS = {'title': 'A', 'author': 'B'}
+
+_ISBN_QUERY = re.compile(r'^[\d\s-]{9,}[\dXx]$')
+_WORD = re.compile(r'\w+')
+
+_SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_insert': (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON {TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, title, author, isbn) VALUES (new.id, new.title, new.author, new.isbn); END"
+    ),
+    f'{FTS_TABLE}_delete': (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON {TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author, isbn) "
+        f"VALUES ('delete', old.id, old.title, old.author, old.isbn); END"
+    ),
+    f'{FTS_TABLE}_update': (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF title, author, isbn ON {TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author, isbn) "
+        f"VALUES ('delete', old.id, old.title, old.author, old.isbn); "
+        f"INSERT INTO {FTS_TABLE}(rowid, title, author, isbn) VALUES (new.id, new.title, new.author, new.isbn); END"
+    ),
+}
+
+_PG_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce({prefix}title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce({prefix}author, '')), 'B')"
+)
+
+_MYSQL_INDEXES = {
+    SEARCH_INDEX: '(title, author)',
+    f'{TABLE}_title_ft': '(title)',
+    f'{TABLE}_author_ft': '(author)',
+}
+
+
+class FullTextField(TextField):
+    """The hidden column an FTS5 table shares its name with; filter it with ``__match``."""
+
+
+@FullTextField.register_lookup
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+def _rank(sql, params=()):
+    return RawSQL(sql, params, output_field=FloatField())
+
+
+def normalize_isbn(value):
+    """Strip separators and upper-case the check digit: ``0-306-40615-x`` -> ``030640615X``."""
+    return re.sub(r'[^0-9Xx]', '', value or '').upper()
+
+
+def _isbn13_check(digits):
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits))
+    return str((10 - total % 10) % 10)
+
+
+def _isbn10_check(digits):
+    check = (11 - sum(int(d) * (10 - i) for i, d in enumerate(digits)) % 11) % 11
+    return 'X' if check == 10 else str(check)
+
+
+def isbn_variants(value):
+    """
+    Return the normalized ISBN and its ISBN-10/ISBN-13 counterpart, or an
+    empty list when ``value`` is not shaped like an ISBN.
+    """
+    isbn = normalize_isbn(value)
+    if re.fullmatch(r'\d{9}[\dX]', isbn):
+        prefixed = '978' + isbn[:9]
+        return [isbn, prefixed + _isbn13_check(prefixed)]
+    if re.fullmatch(r'\d{13}', isbn):
+        if isbn.startswith('978'):
+            return [isbn, isbn[3:12] + _isbn10_check(isbn[3:12])]
+        return [isbn]
+    return []
+
+
+def words(text):
+    return [word.lower() for word in _WORD.findall(text or '')][:MAX_TERMS]
+
+
+def _is_prefix(word):
+    return len(word) >= MIN_PREFIX
+
+
+def search_catalogue(queryset, q='', title='', author='', isbn=''):
+    """
+    Narrow a LibraryResource ``queryset`` to catalogue matches, best first.
+
+    ``q`` matches title and author, or is read as an ISBN when it looks
+    like one; ``title`` and ``author`` match only that column; ``isbn`` is
+    matched exactly after normalization. All given criteria must match.
+    Full-text matches are annotated with ``search_rank`` (lower is better).
+    """
+    if not isbn and _ISBN_QUERY.match(q or '') and isbn_variants(q):
+        isbn, q = q, ''
+    isbns = isbn_variants(isbn) if isbn else []
+    terms = {column: words(text) for column, text in ((None, q), ('title', title), ('author', author))}
+    terms = {column: found for column, found in terms.items() if found}
+    if (isbn and not isbns) or not (terms or isbns):
+        return queryset.none()
+    backend = _BACKENDS.get(connections[queryset.db].vendor, _fallback)
+    return backend(queryset, terms, isbns).order_by('search_rank', 'pk')
+
+
+def _exact_isbn(queryset, isbns):
+    return queryset.filter(isbn__in=isbns) if isbns else queryset
+
+
+def _sqlite(queryset, terms, isbns):
+    groups = []
+    for column, found in terms.items():
+        phrase = ' '.join(f'"{word}"*' if _is_prefix(word) else f'"{word}"' for word in found)
+        groups.append(f'{column} : ({phrase})' if column else f'{{title author}} : ({phrase})')
+    if isbns:
+        # ISBNs are indexed too, so an ISBN lookup takes the same MATCH-driven plan
+        groups.append('isbn : (' + ' OR '.join(f'"{value.lower()}"' for value in isbns) + ')')
+    # Joined through LibraryResourceSearchEntry, so the MATCH drives the query
+    # and catalogue rows are read by primary key
+    return queryset.filter(search_entry__document__match=' AND '.join(groups)).annotate(
+        search_rank=_rank(f'bm25("{FTS_TABLE}", {TITLE_WEIGHT}, {AUTHOR_WEIGHT})'),
+    )
+
+
+def _postgresql(queryset, terms, isbns):
+    queryset = _exact_isbn(queryset, isbns)
+    if not terms:
+        return queryset.annotate(search_rank=Value(0))
+    lexemes = []
+    for column, found in terms.items():
+        for word in found:
+            flags = ('*' if _is_prefix(word) else '') + _PG_LABELS.get(column, '')
+            lexemes.append(f'{word}:{flags}' if flags else word)
+    query = ' & '.join(lexemes)
+    vector = _PG_VECTOR.format(prefix=f'"{TABLE}".')
+    return queryset.filter(
+        RawSQL(f"({vector}) @@ to_tsquery('simple', %s)", [query], output_field=BooleanField())
+    ).annotate(search_rank=_rank(f"-ts_rank({vector}, to_tsquery('simple', %s))", [query]))
+
+
+def _mysql(queryset, terms, isbns):
+    queryset = _exact_isbn(queryset, isbns)
+    if not terms:
+        return queryset.annotate(search_rank=Value(0))
+    matches, params = [], []
+    for column, found in terms.items():
+        columns = f'`{TABLE}`.`{column}`' if column else f'`{TABLE}`.`title`, `{TABLE}`.`author`'
+        matches.append(f'MATCH ({columns}) AGAINST (%s IN BOOLEAN MODE)')
+        params.append(' '.join(f'+{word}*' if _is_prefix(word) else f'+{word}' for word in found))
+    for match, param in zip(matches, params):
+        queryset = queryset.filter(RawSQL(match, [param], output_field=BooleanField()))
+    return queryset.annotate(search_rank=_rank('-(' + ' + '.join(matches) + ')', params))
+
+
+def _fallback(queryset, terms, isbns):
+    # No full-text index on this backend: every word is a case-insensitive substring match
+    queryset = _exact_isbn(queryset, isbns)
+    for column, found in terms.items():
+        for word in found:
+            if column:
+                queryset = queryset.filter(**{f'{column}__icontains': word})
+            else:
+                queryset = queryset.filter(Q(title__icontains=word) | Q(author__icontains=word))
+    return queryset.annotate(search_rank=Value(0))
+
+
+_BACKENDS = {'sqlite': _sqlite, 'postgresql': _postgresql, 'mysql': _mysql}
+
+
+def install(connection):
+    """Create the catalogue's full-text index on ``connection``; safe to re-run."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"title, author, isbn, content='{TABLE}', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2', prefix='3')"
+            )
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [TABLE])
+            existing = {row[0] for row in cursor.fetchall()}
+            missing = [name for name in _SQLITE_TRIGGERS if name not in existing]
+            for name in missing:
+                cursor.execute(_SQLITE_TRIGGERS[name])
+            if missing:
+                # Rows written while the triggers were absent are not indexed yet
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {SEARCH_INDEX} ON {TABLE} "
+                f"USING GIN (({_PG_VECTOR.format(prefix='')}))"
+            )
+        elif connection.vendor == 'mysql':
+            existing = connection.introspection.get_constraints(cursor, TABLE)
+            for name, columns in _MYSQL_INDEXES.items():
+                if name not in existing:
+                    cursor.execute(f'CREATE FULLTEXT INDEX {name} ON {TABLE} {columns}')
+
+
+def uninstall(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for name in _SQLITE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {SEARCH_INDEX}')
+        elif connection.vendor == 'mysql':
+            existing = connection.introspection.get_constraints(cursor, TABLE)
+            for name in _MYSQL_INDEXES:
+                if name in existing:
+                    cursor.execute(f'DROP INDEX {name} ON {TABLE}')
+
+
+def repair_index(sender, using, **kwargs):
+    """
+    post_migrate receiver. SQLite migrations that alter core_libraryresource
+    rebuild the table, which drops its triggers; restore them and reindex.
+    """
+    connection = connections[using]
+    if connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names():
+        install(connection)
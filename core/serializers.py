@@ -1,49 +1,96 @@
+import copy
+
 from rest_framework import serializers
-from django.contrib.auth.models import User
+from django.contrib.auth import get_user_model
 from .models import (
-    Department, AcademicYear, Semester, Course, FacultyProfile, Publication,
-    ResearchGrant, ResearchProject, LibraryResource, LibraryBorrowing,
-    Housing, HousingApplication, CounselingAppointment, HealthRecord,
-    FitnessClass, ComplianceReport, Audit
+    Department, AcademicYear, Semester, Course, CourseCompletion, CourseEnrollment, Classroom,
+    TimetableSlot, TimetableEntry, FacultyProfile, Publication, ResearchGrant, ResearchProject,
+    LibraryResource, LibraryBorrowing,
+    Housing, HousingApplication, CounselingAppointment, CounselorAvailability, HealthRecord,
+    FitnessClass, FitnessEnrollment, ComplianceReport, Audit
 )
-
-class UserSerializer(serializers.ModelSerializer):
+from . import fitness, prerequisites, scheduling, timetabling
+from .fieldsets import full_name
+from .search import normalize_isbn
+
+User = get_user_model()
+
+class SparseFieldsMixin:
+    """
+    Applies the ``field_selection`` in the serializer context (see
+    core.fieldsets) to the top-level serializer, and leaves the nested
+    objects in ``Meta.expandable_fields`` out unless they are expanded.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expandable = set(getattr(self.Meta, 'expandable_fields', ()))
+        selection = self.context.get('field_selection') if self._is_top_level() else None
+        expand = set()
+        if selection is not None:
+            unknown_fields = (selection.fields or set()) - set(fields)
+            unknown_expand = selection.expand - expandable
+            if unknown_fields or unknown_expand:
+                raise serializers.ValidationError({
+                    key: [f'Unknown field: {name}.' for name in sorted(names)]
+                    for key, names in (('fields', unknown_fields), ('expand', unknown_expand)) if names
+                })
+            # Naming an expandable field in ?fields= expands it too
+            expand = selection.expand | ((selection.fields or set()) & expandable)
+        for name in expandable - expand:
+            del fields[name]
+        if selection is not None and selection.fields is not None:
+            for name in set(fields) - selection.fields - expand:
+                del fields[name]
+        return fields
+
+    def _is_top_level(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+class BaseModelSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    pass
+
+class UserSerializer(BaseModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(BaseModelSerializer):
     head_name = serializers.SerializerMethodField()
 
     class Meta:
         model = Department
         fields = '__all__'
+        field_sources = {'head_name': full_name('head')}
 
     def get_head_name(self, obj):
         return obj.head.get_full_name() if obj.head else None
 
-class AcademicYearSerializer(serializers.ModelSerializer):
+class AcademicYearSerializer(BaseModelSerializer):
     class Meta:
         model = AcademicYear
         fields = '__all__'
 
-class SemesterSerializer(serializers.ModelSerializer):
+class SemesterSerializer(BaseModelSerializer):
     academic_year_display = serializers.SerializerMethodField()
 
     class Meta:
         model = Semester
         fields = '__all__'
+        field_sources = {'academic_year_display': ('academic_year__year',)}
 
     def get_academic_year_display(self, obj):
         return str(obj.academic_year)
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(BaseModelSerializer):
     department_name = serializers.SerializerMethodField()
     instructor_name = serializers.SerializerMethodField()
 
     class Meta:
         model = Course
         fields = '__all__'
+        field_sources = {'department_name': ('department__name',), 'instructor_name': full_name('instructor')}
 
     def get_department_name(self, obj):
         return obj.department.name
@@ -51,39 +98,164 @@ class CourseSerializer(serializers.ModelSerializer):
     def get_instructor_name(self, obj):
         return obj.instructor.get_full_name() if obj.instructor else None
 
-class FacultyProfileSerializer(serializers.ModelSerializer):
+    def validate_prerequisites(self, value):
+        if self.instance is not None and prerequisites.would_cycle(self.instance.pk, [c.pk for c in value]):
+            raise serializers.ValidationError(prerequisites.PrerequisiteCycle.default_detail)
+        return value
+
+class CourseCompletionSerializer(BaseModelSerializer):
+    student_name = serializers.SerializerMethodField()
+    course_code = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CourseCompletion
+        fields = '__all__'
+        field_sources = {'student_name': full_name('student'), 'course_code': ('course__code',)}
+
+    def get_student_name(self, obj):
+        return obj.student.get_full_name()
+
+    def get_course_code(self, obj):
+        return obj.course.code
+
+class EligibilityRequestSerializer(serializers.Serializer):
+    students = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    courses = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+    def validate(self, attrs):
+        attrs['students'] = list(dict.fromkeys(attrs['students']))
+        attrs['courses'] = list(dict.fromkeys(attrs['courses']))
+        if len(attrs['students']) * len(attrs['courses']) > prerequisites.MAX_PAIRS:
+            raise serializers.ValidationError(
+                f'At most {prerequisites.MAX_PAIRS} student/course pairs may be checked in one request.'
+            )
+        return attrs
+
+class CourseEnrollmentSerializer(BaseModelSerializer):
+    student_name = serializers.SerializerMethodField()
+    course_code = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CourseEnrollment
+        fields = '__all__'
+        field_sources = {'student_name': full_name('student'), 'course_code': ('course__code',)}
+
+    def get_student_name(self, obj):
+        return obj.student.get_full_name()
+
+    def get_course_code(self, obj):
+        return obj.course.code
+
+class ClassroomSerializer(BaseModelSerializer):
+    class Meta:
+        model = Classroom
+        fields = '__all__'
+
+class TimetableSlotSerializer(BaseModelSerializer):
+    class Meta:
+        model = TimetableSlot
+        fields = '__all__'
+
+    def validate(self, attrs):
+        def current(name):
+            return attrs.get(name, getattr(self.instance, name, None))
+
+        kind, semester = current('kind'), current('semester')
+        start_time, end_time = current('start_time'), current('end_time')
+        if start_time >= end_time:
+            raise serializers.ValidationError({'end_time': ['End time must be after start time.']})
+        day = 'weekday' if kind == 'CLASS' else 'date'
+        if current(day) is None:
+            raise serializers.ValidationError({day: [f'{kind.title()} slots need a {day}.']})
+        # The solver treats slots as disjoint periods
+        overlapping = TimetableSlot.objects.filter(
+            semester=semester, kind=kind, start_time__lt=end_time, end_time__gt=start_time,
+            **{day: current(day)}
+        )
+        if self.instance is not None:
+            overlapping = overlapping.exclude(pk=self.instance.pk)
+        if overlapping.exists():
+            raise serializers.ValidationError('This slot overlaps another slot of the semester.')
+        return attrs
+
+class TimetableEntrySerializer(BaseModelSerializer):
+    course_code = serializers.SerializerMethodField()
+    slot_display = serializers.SerializerMethodField()
+    classroom_display = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TimetableEntry
+        fields = '__all__'
+        field_sources = {
+            'course_code': ('course__code',),
+            'slot_display': ('slot__kind', 'slot__date', 'slot__weekday', 'slot__start_time', 'slot__end_time'),
+            'classroom_display': ('classroom__building', 'classroom__room_number'),
+        }
+
+    def get_course_code(self, obj):
+        return obj.course.code
+
+    def get_slot_display(self, obj):
+        return str(obj.slot)
+
+    def get_classroom_display(self, obj):
+        return str(obj.classroom) if obj.classroom else None
+
+    def validate(self, attrs):
+        slot = attrs.get('slot', self.instance and self.instance.slot)
+        semester = attrs.get('semester', self.instance and self.instance.semester)
+        kind = attrs.get('kind', self.instance and self.instance.kind)
+        if slot.semester_id != semester.pk or slot.kind != kind:
+            raise serializers.ValidationError({'slot': ['The slot belongs to another semester or timetable.']})
+        return attrs
+
+class TimetableBuildSerializer(serializers.Serializer):
+    semester = serializers.PrimaryKeyRelatedField(queryset=Semester.objects.all())
+    kind = serializers.ChoiceField(choices=TimetableSlot.KIND_CHOICES, default='EXAM')
+    restarts = serializers.IntegerField(min_value=1, max_value=64, default=timetabling.RESTARTS)
+    seed = serializers.IntegerField(min_value=0, default=0)
+    dry_run = serializers.BooleanField(default=False)
+
+class FacultyProfileSerializer(BaseModelSerializer):
     user_details = UserSerializer(source='user', read_only=True)
     department_name = serializers.SerializerMethodField()
 
     class Meta:
         model = FacultyProfile
         fields = '__all__'
+        expandable_fields = ('user_details',)
+        field_sources = {'department_name': ('department__name',)}
 
     def get_department_name(self, obj):
         return obj.department.name if obj.department else None
 
-class PublicationSerializer(serializers.ModelSerializer):
+class PublicationSerializer(BaseModelSerializer):
     faculty_name = serializers.SerializerMethodField()
 
     class Meta:
         model = Publication
         fields = '__all__'
+        field_sources = {'faculty_name': full_name('faculty__user')}
 
     def get_faculty_name(self, obj):
         return obj.faculty.user.get_full_name()
 
-class ResearchGrantSerializer(serializers.ModelSerializer):
+class ResearchGrantSerializer(BaseModelSerializer):
     class Meta:
         model = ResearchGrant
         fields = '__all__'
 
-class ResearchProjectSerializer(serializers.ModelSerializer):
+class ResearchProjectSerializer(BaseModelSerializer):
     principal_investigator_name = serializers.SerializerMethodField()
     co_investigators_names = serializers.SerializerMethodField()
 
     class Meta:
         model = ResearchProject
         fields = '__all__'
+        field_sources = {
+            'principal_investigator_name': full_name('principal_investigator__user'),
+            'co_investigators_names': ('co_investigators',),
+        }
 
     def get_principal_investigator_name(self, obj):
         return obj.principal_investigator.user.get_full_name()
@@ -91,33 +263,51 @@ class ResearchProjectSerializer(serializers.ModelSerializer):
     def get_co_investigators_names(self, obj):
         return [inv.user.get_full_name() for inv in obj.co_investigators.all()]
 
-class LibraryResourceSerializer(serializers.ModelSerializer):
+class LibraryResourceSerializer(BaseModelSerializer):
     availability_status = serializers.SerializerMethodField()
+    # Accepts hyphenated input; stored without separators so search can match it exactly
+    isbn = serializers.CharField(max_length=17, required=False, allow_blank=True)
 
     class Meta:
         model = LibraryResource
         fields = '__all__'
+        field_sources = {'availability_status': ('available_copies',)}
+
+    def validate_isbn(self, value):
+        isbn = normalize_isbn(value)
+        if isbn and len(isbn) not in (10, 13):
+            raise serializers.ValidationError("Enter a valid ISBN-10 or ISBN-13.")
+        return isbn
 
     def get_availability_status(self, obj):
         return "Available" if obj.available_copies > 0 else "Checked Out"
 
-class LibraryBorrowingSerializer(serializers.ModelSerializer):
+class LibraryBorrowingSerializer(BaseModelSerializer):
     resource_details = LibraryResourceSerializer(source='resource', read_only=True)
     user_name = serializers.SerializerMethodField()
 
     class Meta:
         model = LibraryBorrowing
         fields = '__all__'
+        # Set by checkout, return and renew, which keep the resource's copy count in step
+        read_only_fields = ('resource', 'borrow_date', 'return_date', 'renewals')
+        expandable_fields = ('resource_details',)
+        field_sources = {'user_name': full_name('user')}
 
     def get_user_name(self, obj):
         return obj.user.get_full_name()
 
-class HousingSerializer(serializers.ModelSerializer):
+class LibraryCheckoutSerializer(serializers.Serializer):
+    resource = serializers.IntegerField()
+    user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), required=False)
+
+class HousingSerializer(BaseModelSerializer):
     availability = serializers.SerializerMethodField()
 
     class Meta:
         model = Housing
         fields = '__all__'
+        field_sources = {'availability': ('capacity', 'occupied')}
 
     def get_availability(self, obj):
         available = obj.capacity - obj.occupied
@@ -127,13 +317,17 @@ class HousingSerializer(serializers.ModelSerializer):
             return "Limited"
         return "Available"
 
-class HousingApplicationSerializer(serializers.ModelSerializer):
+class HousingApplicationSerializer(BaseModelSerializer):
     student_name = serializers.SerializerMethodField()
     semester_display = serializers.SerializerMethodField()
 
     class Meta:
         model = HousingApplication
         fields = '__all__'
+        field_sources = {
+            'student_name': full_name('student'),
+            'semester_display': ('semester__name', 'semester__academic_year__year'),
+        }
 
     def get_student_name(self, obj):
         return obj.student.get_full_name()
@@ -141,13 +335,18 @@ class HousingApplicationSerializer(serializers.ModelSerializer):
     def get_semester_display(self, obj):
         return str(obj.semester)
 
-class CounselingAppointmentSerializer(serializers.ModelSerializer):
+class HousingAllocationSerializer(serializers.Serializer):
+    semester = serializers.PrimaryKeyRelatedField(queryset=Semester.objects.all())
+    dry_run = serializers.BooleanField(default=False)
+
+class CounselingAppointmentSerializer(BaseModelSerializer):
     student_name = serializers.SerializerMethodField()
     counselor_name = serializers.SerializerMethodField()
 
     class Meta:
         model = CounselingAppointment
         fields = '__all__'
+        field_sources = {'student_name': full_name('student'), 'counselor_name': full_name('counselor')}
 
     def get_student_name(self, obj):
         return obj.student.get_full_name()
@@ -155,42 +354,99 @@ class CounselingAppointmentSerializer(serializers.ModelSerializer):
     def get_counselor_name(self, obj):
         return obj.counselor.get_full_name()
 
-class HealthRecordSerializer(serializers.ModelSerializer):
+    def validate(self, attrs):
+        appointment = copy.copy(self.instance) if self.instance else CounselingAppointment()
+        for name, value in attrs.items():
+            setattr(appointment, name, value)
+        scheduling.check_booking(appointment, self.instance)
+        return attrs
+
+class CounselorAvailabilitySerializer(BaseModelSerializer):
+    counselor_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CounselorAvailability
+        fields = '__all__'
+        field_sources = {'counselor_name': full_name('counselor')}
+
+    def get_counselor_name(self, obj):
+        return obj.counselor.get_full_name()
+
+    def validate(self, attrs):
+        start_time = attrs.get('start_time', self.instance and self.instance.start_time)
+        end_time = attrs.get('end_time', self.instance and self.instance.end_time)
+        if start_time >= end_time:
+            raise serializers.ValidationError({'end_time': ['End time must be after start time.']})
+        return attrs
+
+class FreeSlotQuerySerializer(serializers.Serializer):
+    after = serializers.DateTimeField(required=False)
+    count = serializers.IntegerField(min_value=1, max_value=scheduling.MAX_RESULTS, default=10)
+    counselor = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+class HealthRecordSerializer(BaseModelSerializer):
     student_name = serializers.SerializerMethodField()
 
     class Meta:
         model = HealthRecord
         fields = '__all__'
+        field_sources = {'student_name': full_name('student')}
 
     def get_student_name(self, obj):
         return obj.student.get_full_name()
 
-class FitnessClassSerializer(serializers.ModelSerializer):
+class FitnessClassSerializer(BaseModelSerializer):
     availability = serializers.SerializerMethodField()
 
     class Meta:
         model = FitnessClass
         fields = '__all__'
+        # Moved only by enroll, drop and promote, in step with the enrollments
+        read_only_fields = ('enrolled',)
+        field_sources = {'availability': ('capacity', 'enrolled')}
 
     def get_availability(self, obj):
         return obj.capacity - obj.enrolled
 
-class ComplianceReportSerializer(serializers.ModelSerializer):
+class FitnessEnrollmentSerializer(BaseModelSerializer):
+    student_name = serializers.SerializerMethodField()
+    waitlist_position = serializers.SerializerMethodField()
+
+    class Meta:
+        model = FitnessEnrollment
+        fields = '__all__'
+        field_sources = {
+            'student_name': full_name('student'),
+            'waitlist_position': ('status', 'fitness_class', 'created_at'),
+        }
+
+    def get_student_name(self, obj):
+        return obj.student.get_full_name()
+
+    def get_waitlist_position(self, obj):
+        return self.context.get('positions', {}).get(obj.pk) or fitness.waitlist_position(obj)
+
+class FitnessEnrollRequestSerializer(serializers.Serializer):
+    student = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), required=False)
+
+class ComplianceReportSerializer(BaseModelSerializer):
     generated_by_name = serializers.SerializerMethodField()
 
     class Meta:
         model = ComplianceReport
         fields = '__all__'
+        field_sources = {'generated_by_name': full_name('generated_by')}
 
     def get_generated_by_name(self, obj):
         return obj.generated_by.get_full_name()
 
-class AuditSerializer(serializers.ModelSerializer):
+class AuditSerializer(BaseModelSerializer):
     assigned_to_name = serializers.SerializerMethodField()
 
     class Meta:
         model = Audit
         fields = '__all__'
+        field_sources = {'assigned_to_name': ('assigned_to__name',)}
 
     def get_assigned_to_name(self, obj):
         return obj.assigned_to.name 
\ No newline at end of file
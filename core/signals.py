@@ -0,0 +1,230 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete, m2m_changed
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import activity, authentication, bibliometrics, prerequisites, stats, versioning
+from .models import Course, FacultyProfile, PrerequisiteClosure, Publication, ResearchProject
+
+User = get_user_model()
+
+# (tables, stat deltas) queued by coalesce_writes(); None outside of it
+_pending = ContextVar('core_pending_writes', default=None)
+
+
+def tables_written(models=(), stat_deltas=None):
+    """
+    Run the side effects of a write: bump the table versions of ``models``
+    and add ``stat_deltas`` to the dashboard counters. Inside
+    coalesce_writes() the work is queued instead.
+    """
+    models = [model for model in models if model in versioning.VERSIONED_MODELS]
+    pending = _pending.get()
+    if pending is not None:
+        pending[0].update(models)
+        pending[1].update(stat_deltas or {})
+        return
+    if models:
+        versioning.bump(*models)
+    if stat_deltas:
+        stats.apply(stat_deltas)
+
+
+@contextmanager
+def coalesce_writes():
+    """
+    Collapse per-row signal work into one version bump per table and one
+    snapshot update, applied when the block exits without error. Used by
+    bulk writes, which may also report tables that bypass signals.
+    """
+    pending = (set(), Counter())
+    token = _pending.set(pending)
+    try:
+        yield
+    finally:
+        _pending.reset(token)
+    tables_written(*pending)
+
+
+def _remember_stored(sender, instance, raw=False, **kwargs):
+    # Read before the save overwrites it; deleted rows count with the values they are deleted with
+    if not raw and instance.pk is not None and not instance._state.adding:
+        instance._stats_before = stats.stored(sender, instance.pk)
+
+
+def _row_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = None
+    if not created and sender in stats.CONTRIBUTIONS:
+        if stats.CONTRIBUTIONS[sender].fields:
+            before, instance._stats_before = getattr(instance, '_stats_before', None), None
+        else:
+            # The contribution reads no fields, so updates leave it as it was
+            before = instance
+    tables_written((sender,), stats.delta(before=() if before is None else [before], after=[instance]))
+
+
+def _row_deleted(sender, instance, **kwargs):
+    tables_written((sender,), stats.delta(before=[instance]))
+
+
+for _model in versioning.VERSIONED_MODELS:
+    post_save.connect(_row_saved, sender=_model, dispatch_uid=f'table_changed_save_{_model.__name__}')
+    post_delete.connect(_row_deleted, sender=_model, dispatch_uid=f'table_changed_delete_{_model.__name__}')
+
+for _model, _contribution in stats.CONTRIBUTIONS.items():
+    if _contribution.fields:
+        pre_save.connect(_remember_stored, sender=_model, dispatch_uid=f'dashboard_stats_pre_save_{_model.__name__}')
+
+
+def _student_memberships(instance, reverse, pk_set):
+    rows = User.groups.through.objects.filter(group__name=stats.STUDENTS_GROUP)
+    if reverse:
+        rows = rows.filter(group=instance) if pk_set is None else rows.filter(group=instance, user__in=pk_set)
+    else:
+        rows = rows.filter(user=instance) if pk_set is None else rows.filter(user=instance, group__in=pk_set)
+    return rows
+
+
+@receiver(m2m_changed, sender=User.groups.through, dispatch_uid='dashboard_stats_user_groups')
+def count_students(sender, instance, action, reverse, pk_set, **kwargs):
+    # Additions report only the new memberships; removals report what was asked
+    # for, so what will actually go is counted before
+    if action == 'post_add':
+        tables_written(stat_deltas={'total_students': _student_memberships(instance, reverse, pk_set).count()})
+    elif action in ('pre_remove', 'pre_clear'):
+        instance._students_removed = _student_memberships(instance, reverse, pk_set).count()
+    elif action in ('post_remove', 'post_clear'):
+        tables_written(stat_deltas={'total_students': -getattr(instance, '_students_removed', 0)})
+
+
+@receiver(pre_delete, sender=User, dispatch_uid='dashboard_stats_user_pre_delete')
+@receiver(pre_delete, sender=Group, dispatch_uid='dashboard_stats_group_pre_delete')
+def remember_student_memberships(sender, instance, **kwargs):
+    # Memberships are cascaded away without m2m_changed
+    instance._students_removed = _student_memberships(instance, sender is Group, None).count()
+
+
+@receiver(post_delete, sender=User, dispatch_uid='dashboard_stats_user_delete')
+@receiver(post_delete, sender=Group, dispatch_uid='dashboard_stats_group_delete')
+def uncount_student_memberships(sender, instance, **kwargs):
+    tables_written(stat_deltas={'total_students': -getattr(instance, '_students_removed', 0)})
+
+
+@receiver(m2m_changed, sender=Course.prerequisites.through, dispatch_uid='table_version_course_prerequisites')
+@receiver(m2m_changed, sender=ResearchProject.co_investigators.through, dispatch_uid='table_version_co_investigators')
+def bump_m2m_table_version(sender, instance, action, model, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        tables_written((type(instance), model))
+
+
+@receiver(m2m_changed, sender=Course.prerequisites.through, dispatch_uid='prerequisite_closure')
+def maintain_prerequisite_closure(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_add':
+        if not reverse and prerequisites.would_cycle(instance.pk, pk_set):
+            raise prerequisites.PrerequisiteCycle()
+        if reverse and any(prerequisites.would_cycle(pk, [instance.pk]) for pk in pk_set):
+            raise prerequisites.PrerequisiteCycle()
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            prerequisites.refresh([instance.pk])
+        elif pk_set:
+            prerequisites.refresh(pk_set)
+        else:
+            # Cleared from the prerequisite side: the closure still lists
+            # the former direct dependents
+            prerequisites.refresh(PrerequisiteClosure.objects.filter(
+                prerequisite=instance, depth=1
+            ).values_list('course_id', flat=True))
+
+
+@receiver(pre_delete, sender=Course, dispatch_uid='prerequisite_closure_pre_delete')
+def remember_dependents(sender, instance, **kwargs):
+    # The closure rows naming the course are cascaded away with it
+    instance._prerequisite_dependents = prerequisites.dependents([instance.pk])
+
+
+@receiver(post_delete, sender=Course, dispatch_uid='prerequisite_closure_post_delete')
+def refresh_dependents(sender, instance, **kwargs):
+    dependents = getattr(instance, '_prerequisite_dependents', set()) - {instance.pk}
+    if dependents:
+        prerequisites.refresh(dependents)
+
+
+@receiver(pre_save, sender=Publication, dispatch_uid='publication_metrics_pre_save')
+def remember_publication(sender, instance, raw=False, **kwargs):
+    if not raw and instance.pk is not None and not instance._state.adding:
+        instance._metrics_before = bibliometrics.stored_contribution(instance.pk)
+
+
+@receiver(post_save, sender=Publication, dispatch_uid='publication_metrics_post_save')
+def count_publication(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = None if created else getattr(instance, '_metrics_before', None)
+    if before is not None and before.faculty_id == instance.faculty_id:
+        department_id = before.department_id
+    else:
+        department_id = FacultyProfile.objects.filter(pk=instance.faculty_id).values_list(
+            'department_id', flat=True
+        ).first()
+    bibliometrics.apply(before, bibliometrics.contribution(
+        instance.faculty_id, department_id, instance.citation_count, instance.publication_date
+    ))
+    instance._metrics_before = None
+
+
+@receiver(pre_delete, sender=Publication, dispatch_uid='publication_metrics_pre_delete')
+def remember_deleted_publication(sender, instance, **kwargs):
+    # Read while the row exists, so the saved values are uncounted rather than unsaved edits
+    instance._metrics_before = bibliometrics.stored_contribution(instance.pk)
+
+
+@receiver(post_delete, sender=Publication, dispatch_uid='publication_metrics_post_delete')
+def uncount_publication(sender, instance, **kwargs):
+    bibliometrics.apply(getattr(instance, '_metrics_before', None), None)
+
+
+@receiver(pre_save, sender=FacultyProfile, dispatch_uid='publication_metrics_faculty_pre_save')
+def remember_department(sender, instance, raw=False, **kwargs):
+    if not raw and instance.pk is not None and not instance._state.adding:
+        instance._department_before = FacultyProfile.objects.filter(pk=instance.pk).values_list(
+            'department_id', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=FacultyProfile, dispatch_uid='publication_metrics_faculty_post_save')
+def move_publication_metrics(sender, instance, created, raw=False, **kwargs):
+    before = getattr(instance, '_department_before', None)
+    if raw or created or before == instance.department_id:
+        return
+    # Every publication of the faculty member changes department at once
+    bibliometrics.refresh([instance.pk], [before, instance.department_id])
+
+
+@receiver(post_save, sender=Token, dispatch_uid='token_cache_token_save')
+@receiver(post_delete, sender=Token, dispatch_uid='token_cache_token_delete')
+def evict_token(sender, instance, **kwargs):
+    authentication.token_cache.discard(instance.key)
+
+
+@receiver(post_save, sender=User, dispatch_uid='token_cache_user_save')
+@receiver(post_delete, sender=User, dispatch_uid='token_cache_user_delete')
+def evict_user_tokens(sender, instance, **kwargs):
+    # Deactivation, role and permission changes must not be served from the cache
+    authentication.token_cache.discard_user(instance.pk)
+
+
+def _record_activity(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        activity.record(instance)
+
+
+for _model in activity.ACTIVITY_SOURCES:
+    post_save.connect(_record_activity, sender=_model, dispatch_uid=f'activity_feed_{_model.__name__}')
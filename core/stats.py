@@ -0,0 +1,170 @@
+"""
+Dashboard statistics snapshot.
+
+Each counter group has a compute function. They run in full only to build
+the snapshot: on first use, for ``?refresh=true`` (staff only) and from
+``manage.py refresh_dashboard_stats``. In between, the receivers in
+core.signals move the counters by what each write changes. Every tracked
+row contributes to the counters (see CONTRIBUTIONS); a save or delete
+adds the difference it makes as one ``UPDATE ... SET counter = counter +
+delta`` on the snapshot row. No write re-counts a table, and concurrent
+writers cannot overwrite each other's counts. Serving ``stats/`` is a
+single-row read. Changes made behind the ORM's back (raw SQL, renaming
+the Students group) are picked up by the next full refresh.
+"""
+from collections import Counter, namedtuple
+
+from django.contrib.auth import get_user_model
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from . import parallel, routing
+from .models import (
+    Department, Course, FacultyProfile, ResearchProject, LibraryResource,
+    Housing, ComplianceReport, DashboardStatistics
+)
+
+User = get_user_model()
+
+SNAPSHOT_PK = 1
+STUDENTS_GROUP = 'Students'
+
+Contribution = namedtuple('Contribution', 'counters fields')
+
+
+def _students():
+    return {'total_students': User.objects.filter(groups__name=STUDENTS_GROUP).count()}
+
+
+def _faculty():
+    return {'total_faculty': FacultyProfile.objects.count()}
+
+
+def _departments():
+    return {'total_departments': Department.objects.count()}
+
+
+def _courses():
+    # Course has no semester relation, so every catalogued course counts as active
+    return {'active_courses': Course.objects.count()}
+
+
+def _library():
+    return {'library_resources': LibraryResource.objects.count()}
+
+
+def _housing():
+    totals = Housing.objects.aggregate(capacity=Sum('capacity'), occupied=Sum('occupied'))
+    return {
+        'housing_capacity': totals['capacity'] or 0,
+        'housing_occupied': totals['occupied'] or 0,
+    }
+
+
+def _research():
+    return {'research_projects': ResearchProject.objects.filter(status='IN_PROGRESS').count()}
+
+
+def _compliance():
+    return {'compliance_score': ComplianceReport.objects.filter(status='APPROVED').count()}
+
+
+STAT_GROUPS = {
+    'students': _students,
+    'faculty': _faculty,
+    'departments': _departments,
+    'courses': _courses,
+    'library': _library,
+    'housing': _housing,
+    'research': _research,
+    'compliance': _compliance,
+}
+
+# What one row adds to the counters, and the fields that decide it; student
+# membership is tracked separately through User.groups in core.signals
+CONTRIBUTIONS = {
+    FacultyProfile: Contribution(lambda row: {'total_faculty': 1}, ()),
+    Department: Contribution(lambda row: {'total_departments': 1}, ()),
+    Course: Contribution(lambda row: {'active_courses': 1}, ()),
+    LibraryResource: Contribution(lambda row: {'library_resources': 1}, ()),
+    Housing: Contribution(
+        lambda row: {'housing_capacity': row.capacity, 'housing_occupied': row.occupied}, ('capacity', 'occupied')
+    ),
+    ResearchProject: Contribution(lambda row: {'research_projects': int(row.status == 'IN_PROGRESS')}, ('status',)),
+    ComplianceReport: Contribution(lambda row: {'compliance_score': int(row.status == 'APPROVED')}, ('status',)),
+}
+
+
+def contributions(rows):
+    """The counters ``rows`` add up to, as a Counter; untracked models add nothing."""
+    total = Counter()
+    for row in rows:
+        contribution = CONTRIBUTIONS.get(type(row))
+        if contribution is not None:
+            total.update(contribution.counters(row))
+    return total
+
+
+def delta(before=(), after=()):
+    """The counter changes of replacing rows ``before`` with rows ``after``."""
+    changes = contributions(after)
+    changes.subtract(contributions(before))
+    return changes
+
+
+def stored(model, pk):
+    """
+    Row ``pk`` of ``model`` as stored, loading only the fields its
+    contribution reads, or None when there is no such row.
+    """
+    values = model.objects.filter(pk=pk).values(*CONTRIBUTIONS[model].fields).first()
+    return None if values is None else model(pk=pk, **values)
+
+
+def compute(groups=None):
+    """Run the compute functions for ``groups`` (default: all), concurrently, and merge the results."""
+    values = {}
+    for group_values in parallel.gather({name: STAT_GROUPS[name] for name in groups or STAT_GROUPS}).values():
+        values.update(group_values)
+    return values
+
+
+def refresh_snapshot(groups=None):
+    """
+    Recompute ``groups`` and store them on the snapshot row.
+
+    A missing snapshot is always rebuilt in full so untouched counters are
+    never left at their defaults. Counts are taken on the primary, even
+    from a request reading the replica, since they are written there.
+    """
+    with routing.primary():
+        values = compute(groups)
+        values['refreshed_at'] = timezone.now()
+        if groups and DashboardStatistics.objects.filter(pk=SNAPSHOT_PK).update(**values):
+            return
+        values.update(compute(set(STAT_GROUPS) - set(groups or ())))
+        DashboardStatistics.objects.update_or_create(pk=SNAPSHOT_PK, defaults=values)
+
+
+def apply(deltas):
+    """Add ``deltas`` to the snapshot's counters, building the snapshot if there is none."""
+    deltas = {name: value for name, value in deltas.items() if value}
+    if not deltas:
+        return
+    with routing.primary():
+        if DashboardStatistics.objects.filter(pk=SNAPSHOT_PK).update(
+            refreshed_at=timezone.now(), **{name: F(name) + value for name, value in deltas.items()}
+        ):
+            return
+    refresh_snapshot()
+
+
+def get_snapshot(force_refresh=False):
+    """Return the snapshot row, building it on first use or when forced."""
+    if not force_refresh:
+        snapshot = DashboardStatistics.objects.filter(pk=SNAPSHOT_PK).first()
+        if snapshot is not None:
+            return snapshot
+    refresh_snapshot()
+    with routing.primary():
+        return DashboardStatistics.objects.get(pk=SNAPSHOT_PK)
@@ -0,0 +1,231 @@
+"""
+Graph-colouring timetable solver.
+
+Plain Python with no Django imports, so attempts can run in worker
+processes. Courses are vertices and slots are colours: ``neighbours[c]``
+maps every course that shares students (or a lecturer) with course ``c``
+to the number shared, and two neighbours in one slot are a clash of that
+weight. A placed course also holds one room of at least ``sizes[c]``
+seats for its slot; with no rooms given, rooms are not constrained.
+
+An attempt is DSatur (place next the course whose neighbours already rule
+out the most distinct slots, then the one sharing the most students)
+choosing the clash-free slot with the best-fitting free room, followed by
+min-conflicts repair: a course that still clashes moves to the slot where
+it clashes least, never back to a slot it recently left. Attempts differ
+only in the seed that breaks ties, so restarts explore different
+colourings; the one with fewest unplaced courses, then fewest clashes,
+wins.
+"""
+import heapq
+import random
+from bisect import bisect_left, insort
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+Problem = namedtuple('Problem', 'sizes neighbours slot_count rooms')
+Solution = namedtuple('Solution', 'slots rooms clashes unplaced seed')
+
+# Repair moves per course in each attempt
+REPAIR_MOVES = 20
+# Moves during which a course may not return to the slot it left
+TABU_TENURE = 10
+
+
+def cost(solution):
+    return len(solution.unplaced), solution.clashes
+
+
+class _Attempt:
+    def __init__(self, problem, seed):
+        self.problem = problem
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.slot = [None] * len(problem.sizes)
+        self.room = [None] * len(problem.sizes)
+        # Free rooms per slot as sorted (capacity, room) pairs, for best-fit picks
+        self.free = [
+            sorted((capacity, room) for room, capacity in enumerate(problem.rooms))
+            for _ in range(problem.slot_count)
+        ]
+
+    def room_fit(self, slot, size):
+        """Seats in the smallest free room of ``slot`` that holds ``size``, or None."""
+        if not self.problem.rooms:
+            return 0
+        free = self.free[slot]
+        i = bisect_left(free, (size, -1))
+        return free[i][0] if i < len(free) else None
+
+    def place(self, course, slot):
+        self.slot[course] = slot
+        if self.problem.rooms:
+            free = self.free[slot]
+            _, self.room[course] = free.pop(bisect_left(free, (self.problem.sizes[course], -1)))
+
+    def unplace(self, course):
+        if self.room[course] is not None:
+            insort(self.free[self.slot[course]], (self.problem.rooms[self.room[course]], self.room[course]))
+        self.slot[course] = self.room[course] = None
+
+    def slot_weights(self, course):
+        """Clash weight ``course`` would have in each slot."""
+        weights = [0] * self.problem.slot_count
+        for neighbour, shared in self.problem.neighbours[course].items():
+            slot = self.slot[neighbour]
+            if slot is not None:
+                weights[slot] += shared
+        return weights
+
+    def clashes(self, course):
+        slot = self.slot[course]
+        return slot is not None and any(
+            self.slot[neighbour] == slot for neighbour in self.problem.neighbours[course]
+        )
+
+    def colour(self):
+        """DSatur placement; returns the courses no slot has a room for."""
+        sizes, neighbours, slot_count = self.problem.sizes, self.problem.neighbours, self.problem.slot_count
+        degree = [sum(shared.values()) for shared in neighbours]
+        tiebreak = [self.rng.random() for _ in sizes]
+        # Clash weight per slot from already placed neighbours; its size is the saturation
+        blocked = [{} for _ in sizes]
+        done = [False] * len(sizes)
+        heap = [(0, -degree[c], -sizes[c], tiebreak[c], c) for c in range(len(sizes))]
+        heapq.heapify(heap)
+        unplaced = []
+        while heap:
+            saturation, _, _, _, course = heapq.heappop(heap)
+            if done[course] or -saturation != len(blocked[course]):
+                continue  # placed, or an entry superseded by a higher saturation
+            done[course] = True
+            best = None
+            offset = self.rng.randrange(slot_count) if slot_count else 0
+            for k in range(slot_count):
+                slot = (offset + k) % slot_count
+                fit = self.room_fit(slot, sizes[course])
+                if fit is not None:
+                    key = (blocked[course].get(slot, 0), fit)
+                    if best is None or key < best[0]:
+                        best = (key, slot)
+            if best is None:
+                unplaced.append(course)
+                continue
+            slot = best[1]
+            self.place(course, slot)
+            for neighbour, shared in neighbours[course].items():
+                if done[neighbour]:
+                    continue
+                weights = blocked[neighbour]
+                if slot in weights:
+                    weights[slot] += shared
+                else:
+                    weights[slot] = shared
+                    heapq.heappush(heap, (-len(weights), -degree[neighbour], -sizes[neighbour],
+                                          tiebreak[neighbour], neighbour))
+        return unplaced
+
+    def repair(self, max_moves):
+        """Min-conflicts descent over the clashing courses; sideways moves allowed."""
+        sizes, neighbours = self.problem.sizes, self.problem.neighbours
+        clashing = {course for course in range(len(sizes)) if self.clashes(course)}
+        tabu = {}
+        for move in range(max_moves):
+            if not clashing:
+                break
+            course = self.rng.choice(tuple(clashing))
+            current = self.slot[course]
+            weights = self.slot_weights(course)
+            best = None
+            for slot in range(self.problem.slot_count):
+                if slot == current or tabu.get((course, slot), -1) > move:
+                    continue
+                if weights[slot] > weights[current] or self.room_fit(slot, sizes[course]) is None:
+                    continue
+                key = (weights[slot], self.rng.random())
+                if best is None or key < best[0]:
+                    best = (key, slot)
+            if best is None:
+                continue
+            tabu[course, current] = move + TABU_TENURE
+            self.unplace(course)
+            self.place(course, best[1])
+            for neighbour in neighbours[course]:
+                if self.slot[neighbour] in (current, best[1]):
+                    if self.clashes(neighbour):
+                        clashing.add(neighbour)
+                    else:
+                        clashing.discard(neighbour)
+            if weights[best[1]]:
+                clashing.add(course)
+            else:
+                clashing.discard(course)
+
+    def total_clashes(self):
+        return sum(
+            shared
+            for course, slot in enumerate(self.slot) if slot is not None
+            for neighbour, shared in self.problem.neighbours[course].items()
+            if neighbour > course and self.slot[neighbour] == slot
+        )
+
+
+def attempt(problem, seed, max_moves=None):
+    """One DSatur colouring plus repair, with ties broken by ``seed``."""
+    if max_moves is None:
+        max_moves = REPAIR_MOVES * len(problem.sizes)
+    state = _Attempt(problem, seed)
+    unplaced = state.colour()
+    state.repair(max_moves)
+    return Solution(state.slot, state.room, state.total_clashes(), unplaced, seed)
+
+
+_worker_problem = None
+
+
+def _init_worker(problem):
+    global _worker_problem
+    _worker_problem = problem
+
+
+def _worker_attempt(seed, max_moves):
+    return attempt(_worker_problem, seed, max_moves)
+
+
+def solve(problem, restarts=8, workers=1, seed=0, max_moves=None):
+    """
+    Run up to ``restarts`` attempts with seeds ``seed, seed + 1, ...`` on
+    ``workers`` processes and return ``(best, attempts_run)``. Stops early
+    once an attempt places every course without a clash.
+    """
+    seeds = [seed + i for i in range(max(1, restarts))]
+    best, run = None, 0
+
+    def better(solution):
+        return best is None or (cost(solution), solution.seed) < (cost(best), best.seed)
+
+    if workers <= 1 or len(seeds) == 1:
+        for attempt_seed in seeds:
+            solution = attempt(problem, attempt_seed, max_moves)
+            run += 1
+            if better(solution):
+                best = solution
+            if cost(best) == (0, 0):
+                break
+        return best, run
+
+    # The problem is shipped to each worker once, not with every attempt
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(seeds)),
+                               initializer=_init_worker, initargs=(problem,))
+    try:
+        futures = [pool.submit(_worker_attempt, attempt_seed, max_moves) for attempt_seed in seeds]
+        for future in as_completed(futures):
+            solution = future.result()
+            run += 1
+            if better(solution):
+                best = solution
+            if cost(best) == (0, 0):
+                break
+    finally:
+        pool.shutdown(cancel_futures=True)
+    return best, run
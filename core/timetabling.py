@@ -0,0 +1,139 @@
+"""
+Class and exam timetables built from a semester's enrollments.
+
+``build()`` turns the semester's CourseEnrollment rows into a conflict
+graph, in which two courses clash when a student takes both or, for the
+class timetable, one lecturer teaches both. It then colours the graph with
+core.timetable_solver: the semester's slots of the requested kind are the
+colours, and every course needs a Classroom that seats its enrolment, one
+course per room per slot. The best attempt replaces the semester's
+entries of that kind in one transaction.
+
+Loading is four queries; the graph is one pass over each student's
+courses. Courses nobody is enrolled in are left out of the timetable.
+"""
+import time
+from collections import Counter, defaultdict, namedtuple
+from itertools import combinations
+
+from django.conf import settings
+from django.db import transaction
+
+from . import timetable_solver
+from .models import Classroom, Course, CourseEnrollment, TimetableEntry, TimetableSlot
+from .signals import coalesce_writes, tables_written
+
+RESTARTS = settings.TIMETABLE_RESTARTS
+WORKERS = settings.TIMETABLE_WORKERS
+BATCH_SIZE = 1000
+
+TimetableResult = namedtuple(
+    'TimetableResult', 'entries courses clashes clashing_pairs unplaced attempts seed timings dry_run'
+)
+
+
+def conflict_graph(semester, kind):
+    """
+    Return ``(course_ids, sizes, neighbours)`` for the semester's enrolled
+    courses: enrolment per course and, per course, a mapping of the courses
+    it shares students with to the number shared (plus one for a shared
+    lecturer, for classes). Courses are numbered by position in ``course_ids``.
+    """
+    courses_of = defaultdict(list)
+    sizes = Counter()
+    for course_id, student_id in CourseEnrollment.objects.filter(semester=semester).values_list(
+        'course_id', 'student_id'
+    ):
+        courses_of[student_id].append(course_id)
+        sizes[course_id] += 1
+    course_ids = sorted(sizes)
+    index = {course_id: i for i, course_id in enumerate(course_ids)}
+    groups = list(courses_of.values())
+    if kind == 'CLASS':
+        taught = defaultdict(list)
+        for course_id, instructor_id in Course.objects.filter(
+            enrollments__semester=semester, instructor__isnull=False
+        ).values_list('pk', 'instructor_id').distinct():
+            taught[instructor_id].append(course_id)
+        groups.extend(taught.values())
+
+    neighbours = [defaultdict(int) for _ in course_ids]
+    for group in groups:
+        for a, b in combinations(sorted({index[course_id] for course_id in group}), 2):
+            neighbours[a][b] += 1
+            neighbours[b][a] += 1
+    return course_ids, [sizes[course_id] for course_id in course_ids], [dict(shared) for shared in neighbours]
+
+
+def build(semester, kind='EXAM', restarts=None, workers=None, seed=0, dry_run=False):
+    """
+    Timetable ``semester``'s ``kind`` ('CLASS' or 'EXAM') slots.
+
+    Runs ``restarts`` solver attempts on ``workers`` processes (defaults
+    from settings). ``clashes`` counts double-booked students (and
+    lecturers), ``clashing_pairs`` the pairs of courses sharing a slot
+    with them; ``unplaced`` lists courses for which no slot had a big
+    enough room. With ``dry_run`` nothing is written. ``timings`` holds
+    milliseconds per phase.
+    """
+    restarts = RESTARTS if restarts is None else restarts
+    workers = WORKERS if workers is None else workers
+    timings = {}
+
+    started = time.perf_counter()
+    course_ids, sizes, neighbours = conflict_graph(semester, kind)
+    slots = list(TimetableSlot.objects.filter(semester=semester, kind=kind).order_by(
+        'date', 'weekday', 'start_time', 'pk'
+    ))
+    rooms = list(Classroom.objects.order_by('capacity', 'pk'))
+    problem = timetable_solver.Problem(sizes, neighbours, len(slots), [room.capacity for room in rooms])
+    timings['load'] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    solution, attempts = timetable_solver.solve(problem, restarts=restarts, workers=workers, seed=seed)
+    timings['solve'] = (time.perf_counter() - started) * 1000
+
+    entries = [
+        TimetableEntry(
+            semester=semester, kind=kind, course_id=course_ids[course], slot=slots[slot],
+            classroom=rooms[solution.rooms[course]] if solution.rooms[course] is not None else None,
+        )
+        for course, slot in enumerate(solution.slots) if slot is not None
+    ]
+    clashing_pairs = sum(
+        1
+        for course, slot in enumerate(solution.slots) if slot is not None
+        for neighbour in problem.neighbours[course]
+        if neighbour > course and solution.slots[neighbour] == slot
+    )
+
+    started = time.perf_counter()
+    if not dry_run:
+        with transaction.atomic(), coalesce_writes():
+            TimetableEntry.objects.filter(semester=semester, kind=kind).delete()
+            TimetableEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+            tables_written((TimetableEntry,))
+    timings['save'] = (time.perf_counter() - started) * 1000
+
+    return TimetableResult(
+        entries=entries,
+        courses=len(course_ids),
+        clashes=solution.clashes,
+        clashing_pairs=clashing_pairs,
+        unplaced=[course_ids[course] for course in solution.unplaced],
+        attempts=attempts,
+        seed=solution.seed,
+        timings=timings,
+        dry_run=dry_run,
+    )
+
+
+def format_result(result):
+    """Summarise a TimetableResult for the management commands."""
+    placed = len(result.entries)
+    return '\n'.join([
+        f'courses      {result.courses} ({placed} placed, {len(result.unplaced)} without a room)',
+        f'clashes      {result.clashes} double-booked students or lecturers '
+        f'across {result.clashing_pairs} course pairs',
+        f'attempts     {result.attempts} (best seed {result.seed})',
+    ] + [f'{phase + ":":<12} {ms:.1f} ms' for phase, ms in result.timings.items()])
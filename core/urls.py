@@ -8,6 +8,11 @@ router.register(r'departments', views.DepartmentViewSet)
 router.register(r'academic-years', views.AcademicYearViewSet)
 router.register(r'semesters', views.SemesterViewSet)
 router.register(r'courses', views.CourseViewSet)
+router.register(r'course-completions', views.CourseCompletionViewSet)
+router.register(r'course-enrollments', views.CourseEnrollmentViewSet)
+router.register(r'classrooms', views.ClassroomViewSet)
+router.register(r'timetable-slots', views.TimetableSlotViewSet)
+router.register(r'timetable-entries', views.TimetableEntryViewSet)
 router.register(r'faculty-profiles', views.FacultyProfileViewSet)
 router.register(r'publications', views.PublicationViewSet)
 router.register(r'research-grants', views.ResearchGrantViewSet)
@@ -17,6 +22,7 @@ router.register(r'library-borrowings', views.LibraryBorrowingViewSet)
 router.register(r'housing', views.HousingViewSet)
 router.register(r'housing-applications', views.HousingApplicationViewSet)
 router.register(r'counseling-appointments', views.CounselingAppointmentViewSet)
+router.register(r'counselor-availability', views.CounselorAvailabilityViewSet)
 router.register(r'health-records', views.HealthRecordViewSet)
 router.register(r'fitness-classes', views.FitnessClassViewSet)
 router.register(r'compliance-reports', views.ComplianceReportViewSet)
@@ -27,5 +33,6 @@ urlpatterns = [
     path('login/', views.login, name='api-login'),
     path('stats/', views.dashboard_stats, name='dashboard-stats'),
     path('recent-activities/', views.recent_activities, name='recent-activities'),
+    path('cache-stats/', views.cache_stats, name='cache-stats'),
     path('api-auth/', include('rest_framework.urls', namespace='rest_framework')),
 ] 
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""
+Table version counters and the HTTP validators derived from them.
+
+Signal-driven writes are counted automatically by core.signals; code that
+writes through ``bulk_create``/``bulk_update``/``QuerySet.update`` must call
+``bump()`` for the models it touched.
+
+Each table has a single TableVersion row, so every writer to a table
+updates the same row. Inside a transaction ``bump()`` therefore waits for
+the commit: the counters are advanced afterwards, each in its own short
+autocommit UPDATE, instead of holding the row lock (and queueing concurrent
+writers to the same table behind it on PostgreSQL) for the rest of the
+writer's transaction. Readers see the new version only once the data it
+stands for is visible, so a response cached under it is never stale.
+"""
+import functools
+import hashlib
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import F, Prefetch
+from django.utils import timezone
+
+from .models import (
+    Department, AcademicYear, Semester, Course, CourseCompletion, CourseEnrollment, Classroom,
+    TimetableSlot, TimetableEntry, FacultyProfile, Publication, PublicationMetrics, ResearchGrant, ResearchProject,
+    LibraryResource, LibraryBorrowing,
+    Housing, HousingApplication, CounselingAppointment, CounselorAvailability, HealthRecord,
+    FitnessClass, FitnessEnrollment, ComplianceReport, Audit, TableVersion
+)
+
+User = get_user_model()
+
+VERSIONED_MODELS = (
+    User, Department, AcademicYear, Semester, Course, CourseCompletion, CourseEnrollment, Classroom,
+    TimetableSlot, TimetableEntry, FacultyProfile, Publication, PublicationMetrics, ResearchGrant, ResearchProject,
+    LibraryResource, LibraryBorrowing,
+    Housing, HousingApplication, CounselingAppointment, CounselorAvailability, HealthRecord,
+    FitnessClass, FitnessEnrollment, ComplianceReport, Audit,
+)
+
+
+def table_key(model):
+    return model._meta.label_lower
+
+
+def bump(*models):
+    """
+    Advance the version counter of each model's table, once the current
+    transaction commits (immediately in autocommit mode).
+    """
+    keys = sorted({table_key(model) for model in models})
+    if keys:
+        transaction.on_commit(functools.partial(_advance, keys))
+
+
+def _advance(keys):
+    now = timezone.now()
+    for key in keys:
+        if TableVersion.objects.filter(table=key).update(version=F('version') + 1, updated_at=now):
+            continue
+        try:
+            with transaction.atomic():
+                TableVersion.objects.create(table=key, version=1, updated_at=now)
+        except IntegrityError:
+            TableVersion.objects.filter(table=key).update(version=F('version') + 1, updated_at=now)
+
+
+def related_models(model, paths):
+    """Return ``model`` plus every model reached through select/prefetch ``paths``."""
+    found = {model}
+    for path in paths:
+        if isinstance(path, Prefetch):
+            path = path.prefetch_through
+        current = model
+        for part in path.split('__'):
+            current = current._meta.get_field(part).related_model
+            found.add(current)
+    return found
+
+
+def get_validators(models, variant=''):
+    """
+    Return ``(etag, last_modified)`` for a response built from ``models``.
+
+    ``variant`` distinguishes representations of the same tables (path,
+    query string, media type). Costs one primary-key ``IN`` query.
+    """
+    keys = sorted(table_key(model) for model in models)
+    rows = {row.table: row for row in TableVersion.objects.filter(table__in=keys)}
+    digest = hashlib.sha1(variant.encode('utf-8'))
+    for key in keys:
+        digest.update(f"|{key}:{rows[key].version if key in rows else 0}".encode('utf-8'))
+    last_modified = max((row.updated_at for row in rows.values()), default=None)
+    return f'W/"{digest.hexdigest()}"', last_modified
@@ -1,25 +1,44 @@
 from django.shortcuts import render, get_object_or_404
-from rest_framework import viewsets, permissions, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework import generics, viewsets, permissions, status
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import MethodNotAllowed, NotFound, PermissionDenied, ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate, get_user_model
-from django.db.models import Count, Sum, Q
+from django.db import transaction
+from django.db.models import Count, Sum, Q, F, Prefetch
 from django.contrib.auth.models import User
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from .models import (
-    Department, AcademicYear, Semester, Course, FacultyProfile, Publication,
-    ResearchGrant, ResearchProject, LibraryResource, LibraryBorrowing,
-    Housing, HousingApplication, CounselingAppointment, HealthRecord,
-    FitnessClass, ComplianceReport, Audit
+    Department, AcademicYear, Semester, Course, CourseCompletion, CourseEnrollment, Classroom,
+    TimetableSlot, TimetableEntry, FacultyProfile, Publication, PublicationMetrics, ResearchGrant, ResearchProject,
+    LibraryResource, LibraryBorrowing,
+    Housing, HousingApplication, CounselingAppointment, CounselorAvailability, HealthRecord,
+    FitnessClass, FitnessEnrollment, ComplianceReport, Audit, ActivityEvent
 )
+from . import (
+    authentication, bibliometrics, circulation, collaboration, exports, fieldsets, fitness, housing, overview,
+    prerequisites, routing, scheduling, stats, timetabling, versioning
+)
+from .bulk import BulkModelMixin
+from .response_cache import response_cache
+from .pagination import ActivityFeedPagination, KeysetPagination, SearchPagination, wants_keyset
+from .search import search_catalogue
 from .serializers import (
     UserSerializer, DepartmentSerializer, AcademicYearSerializer,
-    SemesterSerializer, CourseSerializer, FacultyProfileSerializer,
+    SemesterSerializer, CourseSerializer, CourseCompletionSerializer, EligibilityRequestSerializer,
+    CourseEnrollmentSerializer, ClassroomSerializer, TimetableSlotSerializer, TimetableEntrySerializer,
+    TimetableBuildSerializer,
+    FacultyProfileSerializer,
     PublicationSerializer, ResearchGrantSerializer, ResearchProjectSerializer,
-    LibraryResourceSerializer, LibraryBorrowingSerializer, HousingSerializer,
-    HousingApplicationSerializer, CounselingAppointmentSerializer,
-    HealthRecordSerializer, FitnessClassSerializer, ComplianceReportSerializer,
-    AuditSerializer
+    LibraryResourceSerializer, LibraryBorrowingSerializer, LibraryCheckoutSerializer, HousingSerializer,
+    HousingApplicationSerializer, HousingAllocationSerializer, CounselingAppointmentSerializer,
+    CounselorAvailabilitySerializer, FreeSlotQuerySerializer, HealthRecordSerializer, FitnessClassSerializer, FitnessEnrollmentSerializer,
+    FitnessEnrollRequestSerializer, ComplianceReportSerializer, AuditSerializer
 )
 
 User = get_user_model()
@@ -27,64 +46,487 @@ User = get_user_model()
 # Create your views here.
 
 # Base ViewSet with common functionality
-class BaseViewSet(viewsets.ModelViewSet):
+class BaseViewSet(BulkModelMixin, viewsets.ModelViewSet):
+    """
+    Common ViewSet behaviour.
+
+    Subclasses declare the relations their serializer walks in
+    ``select_related_fields`` / ``prefetch_related_fields`` so list,
+    detail and create endpoints run in a constant number of queries.
+    Unordered querysets fall back to primary-key order for stable paging.
+
+    ``pagination_mode`` picks page-number or keyset ('cursor') pagination
+    by default; clients override it with ``?paginate=page|cursor``. Keyset
+    pages are ordered by ``keyset_ordering``, which should be backed by an
+    index and end in a unique column.
+
+    List and detail responses carry ETag/Last-Modified validators built
+    from the version counters of every table the serializer reads, and
+    matching ``If-None-Match``/``If-Modified-Since`` requests get a 304
+    without running the main query.
+
+    Every ViewSet also gets list-payload bulk endpoints at ``<prefix>/bulk/``
+    (see core.bulk), and ``?format=csv|ndjson`` streams the full filtered
+    list (see core.exports).
+
+    Exports and the read-only reporting actions named in
+    ``replica_actions`` read from the replica when one is configured;
+    a successful write keeps its user on the primary for a few seconds
+    (see core.routing).
+
+    ``?fields=`` and ``?expand=`` pick the fields of each object, and list
+    and detail queries load only the joins and columns those fields read
+    (see core.fieldsets).
+
+    With ``cache_responses`` set, rendered list and detail responses are
+    cached under their validators and reused until a write to one of
+    ``response_tables()`` (see core.response_cache).
+    """
     permission_classes = [permissions.IsAuthenticated]
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    pagination_mode = 'page'
+    keyset_ordering = ('pk',)
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [exports.CSVRenderer, exports.NDJSONRenderer]
+    export_chunk_size = 2000
+    replica_actions = ()
+    cache_responses = False
+
+    def dispatch(self, request, *args, **kwargs):
+        with routing.primary():
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions or self.is_export(request):
+            routing.read_from_replica(request)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            routing.remember_write(request.user)
+        return response
+
+    def is_export(self, request):
+        return self.action == 'list' and isinstance(request.accepted_renderer, exports.ExportRenderer)
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.pagination_class is None:
+                self._paginator = None
+            elif wants_keyset(getattr(self, 'request', None), self.pagination_mode):
+                self._paginator = KeysetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_queryset(self):
+        queryset = self.load_relations(super().get_queryset())
+        if not queryset.ordered:
+            queryset = queryset.order_by('pk')
+        return queryset
+
+    def load_relations(self, queryset):
+        select_related, prefetch_related, columns = self.select_related_fields, self.prefetch_related_fields, None
+        if getattr(self, 'action', None) in ('list', 'retrieve'):
+            select_related, prefetch_related, columns = fieldsets.narrow(
+                self.get_serializer(), select_related, prefetch_related, ordering=self.keyset_ordering
+            )
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        if columns is not None:
+            queryset = queryset.only(*columns)
+        return queryset
+
+    def field_selection(self):
+        """
+        The request's ``?fields=``/``?expand=`` selection. Writes honour only
+        ``expand``, so no input field is dropped from the serializer.
+        """
+        request = getattr(self, 'request', None)
+        if request is None:
+            return None
+        selection = fieldsets.parse(request.query_params)
+        if request.method not in SAFE_METHODS:
+            selection = selection._replace(fields=None)
+        return selection
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'field_selection': self.field_selection()}
+
+    def list(self, request, *args, **kwargs):
+        if self.is_export(request):
+            return self.conditional_response(self.export, request, *args, **kwargs)
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def export(self, request, *args, **kwargs):
+        """Stream the whole filtered list as CSV or NDJSON, unpaginated."""
+        queryset = self.filter_queryset(self.get_queryset())
+        return exports.export_response(
+            # Rows are read after the view returns, so fix the alias now
+            queryset.using(queryset.db),
+            self.get_serializer(),
+            request.accepted_renderer,
+            filename=self.basename,
+            chunk_size=self.export_chunk_size,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def response_tables(self):
+        """The models whose version counters validate this view's responses."""
+        return versioning.related_models(
+            self.queryset.model, list(self.select_related_fields) + list(self.prefetch_related_fields)
+        )
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = versioning.get_validators(
+            self.response_tables(), variant=f'{request.get_full_path()}|{request.accepted_media_type}'
+        )
+        timestamp = last_modified.timestamp() if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = self.cached_response(handler, etag, timestamp, request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def cached_response(self, handler, etag, timestamp, request, *args, **kwargs):
+        # The browsable API page embeds the user and a CSRF token, so only data formats are shared
+        if not (self.cache_responses and response_cache.enabled and self.action in ('list', 'retrieve')
+                and not self.is_export(request) and not isinstance(request.accepted_renderer, BrowsableAPIRenderer)):
+            return handler(request, *args, **kwargs)
+        key = response_cache.key(self.response_cache_scope(request), etag, timestamp)
+        response = response_cache.get(self.basename, key)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            response_cache.store(key, response)
+        return response
+
+    def response_cache_scope(self, request):
+        """
+        Callers who see the same responses. Role and staff flag by default;
+        override when a queryset or serializer depends on the user.
+        """
+        return f'{request.user.role or "-"}:{int(request.user.is_staff)}'
+
+    def perform_create(self, serializer):
+        instance = serializer.save()
+        if not (self.select_related_fields or self.prefetch_related_fields):
+            return
+        # Re-read with the declared relations so the response does not lazy-load them
+        serializer.instance = self.load_relations(
+            type(instance).objects.filter(pk=instance.pk)
+        ).get()
 
 class UserViewSet(BaseViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
 
+    def response_tables(self):
+        if self.action == 'overview':
+            return set(overview.SOURCE_MODELS)
+        return super().response_tables()
+
+    @action(detail=True, methods=['get'])
+    def overview(self, request, *args, **kwargs):
+        """
+        The user's courses, completions, open loans, housing applications,
+        upcoming counseling appointments and fitness enrollments, read
+        concurrently (see core.overview). Users see their own; staff anyone's.
+        """
+        if kwargs['pk'] != str(request.user.pk) and not request.user.is_staff:
+            raise PermissionDenied('You can only view your own overview.')
+        return self.conditional_response(self._overview, request, *args, **kwargs)
+
+    def _overview(self, request, *args, **kwargs):
+        student = generics.get_object_or_404(User, pk=kwargs['pk'])
+        return Response(overview.student_overview(student))
+
+    def bulk_update(self, items):
+        response = super().bulk_update(items)
+        # Bulk writes skip the model signals, so cached tokens are evicted here
+        for row in response.data['results']:
+            authentication.token_cache.discard_user(row['id'])
+        return response
+
 class DepartmentViewSet(BaseViewSet):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
+    cache_responses = True
+    select_related_fields = ('head',)
 
 class AcademicYearViewSet(BaseViewSet):
     queryset = AcademicYear.objects.all()
     serializer_class = AcademicYearSerializer
+    cache_responses = True
 
 class SemesterViewSet(BaseViewSet):
     queryset = Semester.objects.all()
     serializer_class = SemesterSerializer
+    cache_responses = True
+    select_related_fields = ('academic_year',)
 
 class CourseViewSet(BaseViewSet):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
+    cache_responses = True
+    select_related_fields = ('department', 'instructor')
+    prefetch_related_fields = ('prerequisites',)
 
     def get_queryset(self):
-        queryset = Course.objects.all()
+        queryset = super().get_queryset()
         department = self.request.query_params.get('department', None)
         if department:
             queryset = queryset.filter(department__code=department)
         return queryset
 
+    @action(detail=True, methods=['get'], url_path='prerequisite-tree')
+    def prerequisite_tree(self, request, *args, **kwargs):
+        """
+        Every direct and indirect prerequisite of the course with its depth
+        (shortest chain), plus the direct edges between them.
+        """
+        return self.conditional_response(self._prerequisite_tree, request, *args, **kwargs)
+
+    def _prerequisite_tree(self, request, *args, **kwargs):
+        course = generics.get_object_or_404(Course.objects.only('pk', 'code', 'name'), pk=kwargs['pk'])
+        nodes, edges = prerequisites.prerequisite_tree(course)
+        return Response({
+            'course': {'id': course.pk, 'code': course.code, 'name': course.name},
+            'prerequisites': [
+                {'id': node.prerequisite.pk, 'code': node.prerequisite.code, 'name': node.prerequisite.name,
+                 'department_name': node.prerequisite.department.name, 'depth': node.depth}
+                for node in nodes
+            ],
+            'edges': [{'course': course_id, 'prerequisite': prerequisite_id} for course_id, prerequisite_id in edges],
+        })
+
+    @action(detail=False, methods=['post'])
+    def eligibility(self, request, *args, **kwargs):
+        """
+        Check ``{"students": [ids], "courses": [ids]}`` pairwise: a student
+        is eligible once every prerequisite in the course's closure is
+        completed. ``missing`` lists the outstanding prerequisite ids.
+        """
+        serializer = EligibilityRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = prerequisites.check_eligibility(serializer.validated_data['students'],
+                                                 serializer.validated_data['courses'])
+        return Response({'results': [result._asdict() for result in results]})
+
+    def _bulk_set_m2m(self, model, objects, m2m_values, replace=False):
+        super()._bulk_set_m2m(model, objects, m2m_values, replace)
+        # Bulk writes skip m2m_changed, so the closure is refreshed here
+        changed = [obj.pk for obj, values in zip(objects, m2m_values) if 'prerequisites' in values]
+        if changed:
+            prerequisites.refresh(changed)
+
+class CourseCompletionViewSet(BaseViewSet):
+    queryset = CourseCompletion.objects.all()
+    serializer_class = CourseCompletionSerializer
+    select_related_fields = ('student', 'course')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        student = self.request.query_params.get('student', None)
+        course = self.request.query_params.get('course', None)
+        if student:
+            queryset = queryset.filter(student__id=student)
+        if course:
+            queryset = queryset.filter(course__id=course)
+        return queryset
+
+class CourseEnrollmentViewSet(BaseViewSet):
+    queryset = CourseEnrollment.objects.all()
+    serializer_class = CourseEnrollmentSerializer
+    select_related_fields = ('student', 'course')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        semester = self.request.query_params.get('semester', None)
+        student = self.request.query_params.get('student', None)
+        course = self.request.query_params.get('course', None)
+        if semester:
+            queryset = queryset.filter(semester__id=semester)
+        if student:
+            queryset = queryset.filter(student__id=student)
+        if course:
+            queryset = queryset.filter(course__id=course)
+        return queryset
+
+class ClassroomViewSet(BaseViewSet):
+    queryset = Classroom.objects.all()
+    serializer_class = ClassroomSerializer
+
+class TimetableSlotViewSet(BaseViewSet):
+    queryset = TimetableSlot.objects.all()
+    serializer_class = TimetableSlotSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        semester = self.request.query_params.get('semester', None)
+        kind = self.request.query_params.get('kind', None)
+        if semester:
+            queryset = queryset.filter(semester__id=semester)
+        if kind:
+            queryset = queryset.filter(kind=kind)
+        return queryset
+
+class TimetableEntryViewSet(BaseViewSet):
+    queryset = TimetableEntry.objects.all()
+    serializer_class = TimetableEntrySerializer
+    select_related_fields = ('course', 'slot', 'classroom')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        semester = self.request.query_params.get('semester', None)
+        kind = self.request.query_params.get('kind', None)
+        course = self.request.query_params.get('course', None)
+        if semester:
+            queryset = queryset.filter(semester__id=semester)
+        if kind:
+            queryset = queryset.filter(kind=kind)
+        if course:
+            queryset = queryset.filter(course__id=course)
+        return queryset
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def build(self, request, *args, **kwargs):
+        """
+        Timetable the semester's enrolled courses into its slots and rooms
+        (see core.timetabling), replacing its entries of that kind. With
+        ``dry_run`` the proposed timetable is returned but not saved.
+        """
+        serializer = TimetableBuildSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = timetabling.build(**serializer.validated_data)
+        return Response({
+            'dry_run': result.dry_run,
+            'courses': result.courses,
+            'placed': len(result.entries),
+            'clashes': result.clashes,
+            'clashing_pairs': result.clashing_pairs,
+            'unplaced': result.unplaced,
+            'attempts': result.attempts,
+            'seed': result.seed,
+            'timings_ms': {phase: round(ms, 2) for phase, ms in result.timings.items()},
+            'entries': [
+                {'course': entry.course_id, 'slot': entry.slot.pk, 'classroom': entry.classroom_id}
+                for entry in result.entries
+            ],
+        })
+
 class FacultyProfileViewSet(BaseViewSet):
     queryset = FacultyProfile.objects.all()
     serializer_class = FacultyProfileSerializer
+    select_related_fields = ('user', 'department')
 
     def get_queryset(self):
-        queryset = FacultyProfile.objects.all()
+        queryset = super().get_queryset()
         department = self.request.query_params.get('department', None)
         if department:
             queryset = queryset.filter(department__code=department)
         return queryset
 
+    @transaction.atomic
+    def bulk_update(self, items):
+        ids = self._clean_ids(FacultyProfile, [item.get('id') for item in items if isinstance(item, dict)])
+        before = dict(FacultyProfile.objects.filter(pk__in=ids).values_list('pk', 'department_id'))
+        response = super().bulk_update(items)
+        # Bulk writes skip the model signals, so department moves are refreshed here
+        after = dict(FacultyProfile.objects.filter(pk__in=before).values_list('pk', 'department_id'))
+        moved = {pk for pk, department_id in after.items() if before[pk] != department_id}
+        if moved:
+            bibliometrics.refresh(moved, {before[pk] for pk in moved} | {after[pk] for pk in moved})
+        return response
+
 class PublicationViewSet(BaseViewSet):
     queryset = Publication.objects.all()
     serializer_class = PublicationSerializer
+    replica_actions = ('metrics',)
+    select_related_fields = ('faculty__user',)
 
     def get_queryset(self):
-        queryset = Publication.objects.all()
+        queryset = super().get_queryset()
         faculty = self.request.query_params.get('faculty', None)
         if faculty:
             queryset = queryset.filter(faculty__user__id=faculty)
         return queryset
 
+    def response_tables(self):
+        if self.action == 'metrics':
+            return {PublicationMetrics, FacultyProfile, User, Department}
+        return super().response_tables()
+
+    @action(detail=False, methods=['get'])
+    def metrics(self, request, *args, **kwargs):
+        """
+        Publication count (``total``), citations, h-index and publications
+        per year for the university, with a row per department.
+        ``?department=<code>`` narrows to one department with a row per
+        faculty member, ``?faculty=<user id>`` to one faculty member. Read
+        from PublicationMetrics (see core.bibliometrics).
+        """
+        return self.conditional_response(self._metrics, request, *args, **kwargs)
+
+    def _metrics(self, request, *args, **kwargs):
+        faculty = request.query_params.get('faculty', None)
+        department = request.query_params.get('department', None)
+        rows = PublicationMetrics.objects.select_related('faculty__user', 'department')
+        ranking = ('-h_index', '-citations', 'pk')
+        if faculty:
+            scope = rows.filter(scope=bibliometrics.FACULTY, faculty__user__id=faculty).first()
+            breakdown = {}
+        elif department:
+            scope = rows.filter(scope=bibliometrics.DEPARTMENT, department__code=department).first()
+            breakdown = {'faculty': [
+                {'id': row.faculty.user_id, 'name': row.faculty.user.get_full_name(), **self._metrics_data(row)}
+                for row in rows.filter(scope=bibliometrics.FACULTY, faculty__department__code=department).order_by(*ranking)
+            ]}
+        else:
+            scope = rows.filter(scope=bibliometrics.UNIVERSITY).first()
+            breakdown = {'departments': [
+                {'code': row.department.code, 'name': row.department.name, **self._metrics_data(row)}
+                for row in rows.filter(scope=bibliometrics.DEPARTMENT).order_by(*ranking)
+            ]}
+        return Response({**self._metrics_data(scope), **breakdown})
+
+    @staticmethod
+    def _metrics_data(row):
+        # No row yet means no publications
+        if row is None:
+            return {'total': 0, 'citations': 0, 'h_index': 0, 'per_year': {}}
+        return {'total': row.publications, 'citations': row.citations, 'h_index': row.h_index,
+                'per_year': row.per_year}
+
+    @transaction.atomic
+    def bulk_create(self, items):
+        response = super().bulk_create(items)
+        # Bulk writes skip the model signals, so the metrics are recomputed here
+        bibliometrics.refresh({row['faculty'] for row in response.data['results']})
+        return response
+
+    @transaction.atomic
+    def bulk_update(self, items):
+        ids = self._clean_ids(Publication, [item.get('id') for item in items if isinstance(item, dict)])
+        before = set(Publication.objects.filter(pk__in=ids).values_list('faculty_id', flat=True))
+        response = super().bulk_update(items)
+        bibliometrics.refresh(before | {row['faculty'] for row in response.data['results']})
+        return response
+
 class ResearchGrantViewSet(BaseViewSet):
     queryset = ResearchGrant.objects.all()
     serializer_class = ResearchGrantSerializer
 
     def get_queryset(self):
-        queryset = ResearchGrant.objects.all()
+        queryset = super().get_queryset()
         status = self.request.query_params.get('status', None)
         if status:
             queryset = queryset.filter(status=status)
@@ -93,26 +535,53 @@ class ResearchGrantViewSet(BaseViewSet):
 class ResearchProjectViewSet(BaseViewSet):
     queryset = ResearchProject.objects.all()
     serializer_class = ResearchProjectSerializer
+    select_related_fields = ('principal_investigator__user',)
+    prefetch_related_fields = (
+        Prefetch('co_investigators', queryset=FacultyProfile.objects.select_related('user')),
+    )
+    replica_actions = ('collaborations',)
 
     def get_queryset(self):
-        queryset = ResearchProject.objects.all()
+        queryset = super().get_queryset()
         status = self.request.query_params.get('status', None)
         investigator = self.request.query_params.get('investigator', None)
         if status:
             queryset = queryset.filter(status=status)
         if investigator:
+            # Two indexed IN subqueries instead of an OR across a join, which forces a scan
+            profiles = FacultyProfile.objects.filter(user__id=investigator).values('pk')
+            memberships = ResearchProject.co_investigators.through.objects.filter(
+                facultyprofile__in=profiles
+            ).values('researchproject_id')
             queryset = queryset.filter(
-                Q(principal_investigator__user__id=investigator) |
-                Q(co_investigators__user__id=investigator)
-            ).distinct()
+                Q(principal_investigator__in=profiles) | Q(pk__in=memberships)
+            )
         return queryset
 
+    def response_tables(self):
+        if self.action == 'collaborations':
+            return set(collaboration.SOURCE_MODELS)
+        return super().response_tables()
+
+    @action(detail=False, methods=['get'])
+    def collaborations(self, request, *args, **kwargs):
+        """
+        The faculty collaboration graph (see core.collaboration): weighted
+        edges in ``results``, per-faculty degree and centrality, and
+        per-department totals and links.
+        """
+        return self.conditional_response(self._collaborations, request, *args, **kwargs)
+
+    def _collaborations(self, request, *args, **kwargs):
+        return Response(collaboration.collaboration_graph())
+
 class LibraryResourceViewSet(BaseViewSet):
     queryset = LibraryResource.objects.all()
     serializer_class = LibraryResourceSerializer
+    cache_responses = True
 
     def get_queryset(self):
-        queryset = LibraryResource.objects.all()
+        queryset = super().get_queryset()
         resource_type = self.request.query_params.get('type', None)
         available = self.request.query_params.get('available', None)
         if resource_type:
@@ -121,37 +590,111 @@ class LibraryResourceViewSet(BaseViewSet):
             queryset = queryset.filter(available_copies__gt=0)
         return queryset
 
+    @action(detail=False, methods=['get'])
+    def search(self, request, *args, **kwargs):
+        """
+        Ranked catalogue search (see core.search). ``?q=`` matches title and
+        author, or an ISBN; ``?title=``, ``?author=`` and ``?isbn=`` narrow to
+        one field. Combines with the ``type`` and ``available`` filters.
+        """
+        return self.conditional_response(self._search, request, *args, **kwargs)
+
+    def _search(self, request, *args, **kwargs):
+        criteria = {name: request.query_params.get(name, '').strip() for name in ('q', 'title', 'author', 'isbn')}
+        if not any(criteria.values()):
+            raise ValidationError({'q': ['Enter a search term.']})
+        queryset = search_catalogue(self.get_queryset(), **criteria)
+        paginator = SearchPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response(self.get_serializer(page, many=True).data)
+
 class LibraryBorrowingViewSet(BaseViewSet):
     queryset = LibraryBorrowing.objects.all()
     serializer_class = LibraryBorrowingSerializer
+    select_related_fields = ('resource', 'user')
+    pagination_mode = 'cursor'
+    keyset_ordering = ('-borrow_date', '-id')
 
     def get_queryset(self):
-        queryset = LibraryBorrowing.objects.all()
+        queryset = super().get_queryset()
         user = self.request.query_params.get('user', None)
         if user:
             queryset = queryset.filter(user__id=user)
         return queryset
 
+    def create(self, request, *args, **kwargs):
+        # A loan takes a copy off the shelf; only checkout keeps available_copies in step
+        return self.checkout(request, *args, **kwargs)
+
+    def bulk_create(self, items):
+        raise MethodNotAllowed('POST', detail='Borrowings are created one at a time through checkout/.')
+
+    # Deleting a loan that is still open puts its copy back on the shelf
+    def perform_destroy(self, instance):
+        circulation.discard(LibraryBorrowing.objects.filter(pk=instance.pk))
+
+    def perform_bulk_destroy(self, queryset):
+        return circulation.discard(queryset)
+
+    @action(detail=False, methods=['post'])
+    def checkout(self, request, *args, **kwargs):
+        """
+        Lend one copy: ``{"resource": id}``. Staff may add ``"user": id`` to
+        lend on someone's behalf. 409 when no copy is on the shelf.
+        """
+        serializer = LibraryCheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data.get('user', request.user)
+        if user.pk != request.user.pk and not request.user.is_staff:
+            raise PermissionDenied('Only staff may check out on behalf of another user.')
+        borrowing = circulation.checkout(serializer.validated_data['resource'], user)
+        return Response(self.loan_data(borrowing), status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'], url_path='return')
+    def return_copy(self, request, *args, **kwargs):
+        borrowing = self.get_loan()
+        circulation.return_copy(borrowing)
+        return Response(self.loan_data(borrowing))
+
+    @action(detail=True, methods=['post'])
+    def renew(self, request, *args, **kwargs):
+        borrowing = self.get_loan()
+        circulation.renew(borrowing)
+        return Response(self.loan_data(borrowing))
+
+    def get_loan(self):
+        borrowing = self.get_object()
+        if borrowing.user_id != self.request.user.pk and not self.request.user.is_staff:
+            raise PermissionDenied('You can only return or renew your own loans.')
+        return borrowing
+
+    def loan_data(self, borrowing):
+        # Re-read: the counters were changed in SQL, not on the instance
+        return self.get_serializer(
+            self.load_relations(LibraryBorrowing.objects.filter(pk=borrowing.pk)).get()
+        ).data
+
 class HousingViewSet(BaseViewSet):
     queryset = Housing.objects.all()
     serializer_class = HousingSerializer
 
     def get_queryset(self):
-        queryset = Housing.objects.all()
+        queryset = super().get_queryset()
         room_type = self.request.query_params.get('room_type', None)
         available = self.request.query_params.get('available', None)
         if room_type:
             queryset = queryset.filter(room_type=room_type)
         if available:
-            queryset = queryset.filter(occupied__lt=models.F('capacity'))
+            queryset = queryset.filter(occupied__lt=F('capacity'))
         return queryset
 
 class HousingApplicationViewSet(BaseViewSet):
     queryset = HousingApplication.objects.all()
     serializer_class = HousingApplicationSerializer
+    select_related_fields = ('student', 'semester__academic_year')
 
     def get_queryset(self):
-        queryset = HousingApplication.objects.all()
+        queryset = super().get_queryset()
         status = self.request.query_params.get('status', None)
         student = self.request.query_params.get('student', None)
         if status:
@@ -160,12 +703,36 @@ class HousingApplicationViewSet(BaseViewSet):
             queryset = queryset.filter(student__id=student)
         return queryset
 
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def allocate(self, request, *args, **kwargs):
+        """
+        Match the semester's pending applications to rooms (see core.housing).
+        With ``dry_run`` the proposed assignments are returned but not saved.
+        """
+        serializer = HousingAllocationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = housing.allocate(**serializer.validated_data)
+        return Response({
+            'dry_run': result.dry_run,
+            'placed': len(result.assignments),
+            'preferred_building': sum(1 for a in result.assignments if a.preferred),
+            'unplaced': [application.pk for application in result.unplaced],
+            'skipped': [application.pk for application in result.skipped],
+            'timings_ms': {phase: round(ms, 2) for phase, ms in result.timings.items()},
+            'assignments': [
+                {'application': a.application.pk, 'housing': a.housing.pk} for a in result.assignments
+            ],
+        })
+
 class CounselingAppointmentViewSet(BaseViewSet):
     queryset = CounselingAppointment.objects.all()
     serializer_class = CounselingAppointmentSerializer
+    select_related_fields = ('student', 'counselor')
+    pagination_mode = 'cursor'
+    keyset_ordering = ('-date', '-id')
 
     def get_queryset(self):
-        queryset = CounselingAppointment.objects.all()
+        queryset = super().get_queryset()
         student = self.request.query_params.get('student', None)
         counselor = self.request.query_params.get('counselor', None)
         if student:
@@ -174,12 +741,68 @@ class CounselingAppointmentViewSet(BaseViewSet):
             queryset = queryset.filter(counselor__id=counselor)
         return queryset
 
+    # The slot check and the write share a transaction (see core.scheduling)
+    @transaction.atomic
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    @transaction.atomic
+    def update(self, request, *args, **kwargs):
+        return super().update(request, *args, **kwargs)
+
+    # A batch could book one slot twice, and a conflict is a 409, not an item error
+    def bulk_create(self, items):
+        raise MethodNotAllowed('POST', detail='Appointments are booked one at a time.')
+
+    def bulk_update(self, items):
+        raise MethodNotAllowed('PATCH', detail='Appointments are rescheduled one at a time.')
+
+    @action(detail=False, methods=['get'], url_path='free-slots')
+    def free_slots(self, request, *args, **kwargs):
+        """
+        The earliest free slots across counselors: ``?count=`` (default 10),
+        ``?after=`` (ISO datetime, default now) and ``?counselor=`` (repeatable).
+        """
+        params = FreeSlotQuerySerializer(data={
+            **{name: request.query_params[name] for name in ('after', 'count') if name in request.query_params},
+            **({'counselor': request.query_params.getlist('counselor')} if 'counselor' in request.query_params else {}),
+        })
+        params.is_valid(raise_exception=True)
+        slots = scheduling.free_slots(
+            after=params.validated_data.get('after'),
+            count=params.validated_data['count'],
+            counselor_ids=params.validated_data.get('counselor'),
+        )
+        names = {user.pk: user.get_full_name() for user in User.objects.filter(
+            pk__in={slot.counselor_id for slot in slots}
+        ).only('pk', 'first_name', 'last_name')}
+        return Response([
+            {'counselor': slot.counselor_id, 'counselor_name': names[slot.counselor_id],
+             'start': slot.start, 'end': slot.end}
+            for slot in slots
+        ])
+
+class CounselorAvailabilityViewSet(BaseViewSet):
+    queryset = CounselorAvailability.objects.all()
+    serializer_class = CounselorAvailabilitySerializer
+    select_related_fields = ('counselor',)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        counselor = self.request.query_params.get('counselor', None)
+        if counselor:
+            queryset = queryset.filter(counselor__id=counselor)
+        return queryset
+
 class HealthRecordViewSet(BaseViewSet):
     queryset = HealthRecord.objects.all()
     serializer_class = HealthRecordSerializer
+    select_related_fields = ('student',)
+    pagination_mode = 'cursor'
+    keyset_ordering = ('-visit_date', '-id')
 
     def get_queryset(self):
-        queryset = HealthRecord.objects.all()
+        queryset = super().get_queryset()
         student = self.request.query_params.get('student', None)
         if student:
             queryset = queryset.filter(student__id=student)
@@ -188,20 +811,81 @@ class HealthRecordViewSet(BaseViewSet):
 class FitnessClassViewSet(BaseViewSet):
     queryset = FitnessClass.objects.all()
     serializer_class = FitnessClassSerializer
+    cache_responses = True
 
     def get_queryset(self):
-        queryset = FitnessClass.objects.all()
+        queryset = super().get_queryset()
         available = self.request.query_params.get('available', None)
         if available:
-            queryset = queryset.filter(enrolled__lt=models.F('capacity'))
+            queryset = queryset.filter(enrolled__lt=F('capacity'))
         return queryset
 
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        # A raised capacity goes to the waitlist first
+        if fitness.promote(serializer.instance.pk):
+            serializer.instance.refresh_from_db(fields=['enrolled'])
+
+    def bulk_update(self, items):
+        response = super().bulk_update(items)
+        # Bulk updates skip perform_update, so raised capacities are filled here
+        ids = [row['id'] for row in response.data['results']]
+        changed = [pk for item, pk in zip(items, ids) if 'capacity' in item]
+        # One query finds the classes with anyone to promote
+        waiting = set(FitnessEnrollment.objects.filter(
+            fitness_class_id__in=changed, status='WAITLISTED'
+        ).values_list('fitness_class_id', flat=True)) if changed else set()
+        if sum(fitness.promote(pk) for pk in changed if pk in waiting):
+            response.data = self._bulk_results(FitnessClass, [FitnessClass(pk=pk) for pk in ids])
+        return response
+
+    @action(detail=True, methods=['post'])
+    def enroll(self, request, *args, **kwargs):
+        """
+        Take a seat, or a waitlist place when the class is full (see
+        core.fitness). Staff may pass ``"student": id`` to enroll someone else.
+        """
+        student = self.get_student()
+        enrollment = fitness.enroll(self.get_object().pk, student)
+        return Response(self.enrollment_data(enrollment), status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def drop(self, request, *args, **kwargs):
+        """Give up a seat or waitlist place; a freed seat goes to the waitlist head."""
+        student = self.get_student()
+        enrollment = FitnessEnrollment.objects.filter(
+            fitness_class=self.get_object(), student=student
+        ).exclude(status='DROPPED').first()
+        if enrollment is None:
+            raise NotFound('No enrollment in this class.')
+        fitness.drop(enrollment)
+        return Response(self.enrollment_data(enrollment))
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def waitlist(self, request, *args, **kwargs):
+        enrollments = list(fitness.waitlist(self.get_object().pk).select_related('student'))
+        positions = {enrollment.pk: position for position, enrollment in enumerate(enrollments, 1)}
+        return Response(FitnessEnrollmentSerializer(enrollments, many=True, context={'positions': positions}).data)
+
+    def get_student(self):
+        serializer = FitnessEnrollRequestSerializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        student = serializer.validated_data.get('student', self.request.user)
+        if student.pk != self.request.user.pk and not self.request.user.is_staff:
+            raise PermissionDenied('Only staff may enroll or drop another student.')
+        return student
+
+    def enrollment_data(self, enrollment):
+        enrollment = FitnessEnrollment.objects.select_related('student').get(pk=enrollment.pk)
+        return FitnessEnrollmentSerializer(enrollment).data
+
 class ComplianceReportViewSet(BaseViewSet):
     queryset = ComplianceReport.objects.all()
     serializer_class = ComplianceReportSerializer
+    select_related_fields = ('generated_by',)
 
     def get_queryset(self):
-        queryset = ComplianceReport.objects.all()
+        queryset = super().get_queryset()
         report_type = self.request.query_params.get('type', None)
         status = self.request.query_params.get('status', None)
         if report_type:
@@ -213,9 +897,10 @@ class ComplianceReportViewSet(BaseViewSet):
 class AuditViewSet(BaseViewSet):
     queryset = Audit.objects.all()
     serializer_class = AuditSerializer
+    select_related_fields = ('assigned_to',)
 
     def get_queryset(self):
-        queryset = Audit.objects.all()
+        queryset = super().get_queryset()
         status = self.request.query_params.get('status', None)
         department = self.request.query_params.get('department', None)
         if status:
@@ -227,40 +912,19 @@ class AuditViewSet(BaseViewSet):
 # Additional API endpoints for dashboard statistics
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@routing.replica_reads
 def dashboard_stats(request):
-    """Get statistics for the dashboard"""
+    """
+    Get statistics for the dashboard from the materialized snapshot.
+
+    Staff may pass ``?refresh=true`` to recompute every counter before
+    responding.
+    """
+    force_refresh = request.query_params.get('refresh', '').lower() in ('1', 'true', 'yes')
+    if force_refresh and not request.user.is_staff:
+        raise PermissionDenied('Only staff may recompute the statistics.')
     try:
-        # Get total students (handle case where Students group doesn't exist)
-        try:
-            total_students = User.objects.filter(groups__name='Students').count()
-        except:
-            total_students = 0
-        
-        # Get housing occupancy with safe aggregation
-        try:
-            housing_stats = Housing.objects.aggregate(
-                total_capacity=Sum('capacity') or 0,
-                total_occupied=Sum('occupied') or 0
-            )
-            housing_occupancy = {
-                'total_capacity': housing_stats.get('total_capacity', 0),
-                'total_occupied': housing_stats.get('total_occupied', 0)
-            }
-        except Exception:
-            housing_occupancy = {'total_capacity': 0, 'total_occupied': 0}
-        
-        # Build stats dictionary with safe counts and handle potential None values
-        stats = {
-            'total_students': total_students,
-            'total_faculty': FacultyProfile.objects.count() or 0,
-            'total_departments': Department.objects.count() or 0,
-            'active_courses': Course.objects.filter(semester__is_active=True).count() or 0,
-            'library_resources': LibraryResource.objects.count() or 0,
-            'housing_occupancy': housing_occupancy,
-            'research_projects': ResearchProject.objects.filter(status='IN_PROGRESS').count() or 0,
-            'compliance_score': ComplianceReport.objects.filter(status='APPROVED').count() or 0,
-        }
-        return Response(stats)
+        return Response(stats.get_snapshot(force_refresh=force_refresh).as_dict())
     except Exception as e:
         # Return a response with default values in case of error
         default_stats = {
@@ -278,56 +942,47 @@ def dashboard_stats(request):
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@routing.replica_reads
 def recent_activities(request):
-    """Get recent activities across all modules"""
+    """
+    Get recent activities across all modules from the activity feed.
+
+    ``?type=library,housing`` filters by event type; follow ``next`` to
+    load older events.
+    """
     try:
-        activities = []
-        
-        # Add recent library borrowings
-        try:
-            borrowings = LibraryBorrowing.objects.order_by('-borrow_date')[:5]
-            for b in borrowings:
-                activities.append({
-                    'type': 'library',
-                    'description': f"{b.user.get_full_name()} borrowed {b.resource.title}",
-                    'date': b.borrow_date.isoformat()
-                })
-        except Exception:
-            pass
-        
-        # Add recent housing applications
-        try:
-            applications = HousingApplication.objects.order_by('-created_at')[:5]
-            for a in applications:
-                activities.append({
-                    'type': 'housing',
-                    'description': f"New housing application from {a.student.get_full_name()}",
-                    'date': a.created_at.isoformat()
-                })
-        except Exception:
-            pass
-        
-        # Add recent counseling appointments
-        try:
-            appointments = CounselingAppointment.objects.order_by('-date')[:5]
-            for a in appointments:
-                activities.append({
-                    'type': 'counseling',
-                    'description': f"Counseling session scheduled for {a.student.get_full_name()}",
-                    'date': a.date.isoformat()
-                })
-        except Exception:
-            pass
-        
-        # Sort all activities by date
-        activities.sort(key=lambda x: x['date'], reverse=True)
-        return Response({'activities': activities[:10]})
+        queryset = ActivityEvent.objects.all()
+        event_types = request.query_params.get('type')
+        if event_types:
+            queryset = queryset.filter(event_type__in=event_types.split(','))
+        paginator = ActivityFeedPagination()
+        events = paginator.paginate_queryset(queryset, request)
+        activities = [
+            {'type': e.event_type, 'description': e.description, 'date': e.created_at.isoformat()}
+            for e in events
+        ]
+        return Response({'activities': activities, 'next': paginator.get_next_link()})
+    except NotFound:
+        raise
     except Exception as e:
         return Response(
             {'activities': [], 'error': str(e)},
             status=status.HTTP_200_OK
         )
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def cache_stats(request):
+    """Hit and miss counts of this process's response and token caches."""
+    return Response({
+        'responses': response_cache.stats(),
+        'tokens': {
+            'hits': authentication.token_cache.hits,
+            'misses': authentication.token_cache.misses,
+            'size': len(authentication.token_cache),
+        },
+    })
+
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
 def login(request):
@@ -3,6 +3,16 @@ ASGI config for erp4uni project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with any ASGI server, for example::
+
+    uvicorn erp4uni.asgi:application --workers 4
+    daphne erp4uni.asgi:application
+
+Each request's synchronous DRF view runs in its own thread, and aggregate
+endpoints spread their independent queries over AGGREGATE_QUERY_WORKERS
+threads (see core.parallel). ``manage.py benchmark_asgi`` compares this
+entry point with erp4uni.wsgi under concurrent load.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
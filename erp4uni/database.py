@@ -0,0 +1,122 @@
+"""
+Database settings built from the environment.
+
+DB_ENGINE            ``sqlite`` (default) or ``postgresql``
+DB_CONN_MAX_AGE      Seconds a connection is kept for reuse between requests;
+                     0 opens a fresh one per request. Reused connections are
+                     health-checked before each request. The default is 60
+                     under WSGI (erp4uni.wsgi sets it), where a fixed pool of
+                     worker threads reuses its connections, and 0 otherwise:
+                     under ASGI each request runs in a new thread, so
+                     persistent connections pile up instead of being reused.
+                     With DB_POOL_SIZE the pool manages connections and the
+                     setting is ignored.
+SQLITE_PATH          Database file (default ``db.sqlite3`` in the project)
+SQLITE_WAL           ``True`` (default) for WAL journaling with the pragmas
+                     below; ``False`` for SQLite's rollback journal
+SQLITE_BUSY_TIMEOUT  Seconds a writer waits for the write lock (default 20)
+DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+                     PostgreSQL connection
+DB_POOL_SIZE         PostgreSQL only: above 0, connections come from a
+                     psycopg pool of up to this many per process (needs
+                     ``psycopg[pool]``) instead of persistent connections
+SQLITE_REPLICA_PATH  A read replica for reporting endpoints (see
+DB_REPLICA_NAME,     core.routing): a second SQLite file, or a PostgreSQL
+DB_REPLICA_HOST,     database/server with the primary's credentials. Unset,
+DB_REPLICA_PORT      every query goes to the primary
+
+A local PostgreSQL profile, for example::
+
+    docker run -d -p 5432:5432 -e POSTGRES_USER=erp4uni -e POSTGRES_PASSWORD=erp4uni postgres:16
+    DB_ENGINE=postgresql DB_NAME=erp4uni DB_USER=erp4uni DB_PASSWORD=erp4uni DB_HOST=localhost
+
+and a local replica to route reports to, refreshed by ``manage.py
+sync_read_replica`` (SQLite) or, for PostgreSQL, a copy of the database
+(``createdb -T erp4uni erp4uni_replica``) or a streaming standby::
+
+    SQLITE_REPLICA_PATH=db-replica.sqlite3
+    DB_REPLICA_NAME=erp4uni_replica
+"""
+import os
+
+# Applied on every new SQLite connection in WAL mode. WAL lets readers
+# carry on while one writer commits; NORMAL sync is durable across crashes
+# of the application (not of the OS) and skips an fsync per commit.
+SQLITE_WAL_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-65536',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=268435456',
+)
+
+
+def sqlite_config(path, wal=True, busy_timeout=20, conn_max_age=0):
+    options = {'timeout': busy_timeout}
+    if wal:
+        options['init_command'] = ';'.join(SQLITE_WAL_PRAGMAS)
+        # Take the write lock at BEGIN, so two transactions that read and
+        # then write wait for each other instead of failing on the upgrade
+        options['transaction_mode'] = 'IMMEDIATE'
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'CONN_MAX_AGE': conn_max_age,
+        'CONN_HEALTH_CHECKS': conn_max_age > 0,
+        'OPTIONS': options,
+    }
+
+
+def postgres_config(name, user='', password='', host='', port='', conn_max_age=0, pool_size=0):
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': name,
+        'USER': user,
+        'PASSWORD': password,
+        'HOST': host,
+        'PORT': port,
+        'CONN_MAX_AGE': conn_max_age,
+        'CONN_HEALTH_CHECKS': conn_max_age > 0,
+        'OPTIONS': {},
+    }
+    if pool_size > 0:
+        # The pool owns connection lifetime; Django requires CONN_MAX_AGE 0 with it
+        config.update(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False)
+        config['OPTIONS']['pool'] = {'min_size': 1, 'max_size': pool_size, 'timeout': 10}
+    return config
+
+
+def database_config(base_dir, environ=os.environ):
+    """``DATABASES['default']`` for the environment ``environ``."""
+    conn_max_age = int(environ.get('DB_CONN_MAX_AGE', '0'))
+    if environ.get('DB_ENGINE', 'sqlite') == 'postgresql':
+        return postgres_config(
+            environ.get('DB_NAME', 'erp4uni'),
+            user=environ.get('DB_USER', ''),
+            password=environ.get('DB_PASSWORD', ''),
+            host=environ.get('DB_HOST', ''),
+            port=environ.get('DB_PORT', ''),
+            conn_max_age=conn_max_age,
+            pool_size=int(environ.get('DB_POOL_SIZE', '0')),
+        )
+    return sqlite_config(
+        environ.get('SQLITE_PATH', str(base_dir / 'db.sqlite3')),
+        wal=environ.get('SQLITE_WAL', 'True') == 'True',
+        busy_timeout=float(environ.get('SQLITE_BUSY_TIMEOUT', '20')),
+        conn_max_age=conn_max_age,
+    )
+
+
+def replica_config(base_dir, environ=os.environ):
+    """``DATABASES['replica']`` for ``environ``, or None without a replica configured."""
+    if environ.get('DB_ENGINE', 'sqlite') == 'postgresql':
+        overrides = {key: environ[f'DB_REPLICA_{key[3:]}'] for key in ('DB_NAME', 'DB_HOST', 'DB_PORT')
+                     if environ.get(f'DB_REPLICA_{key[3:]}')}
+    else:
+        overrides = {'SQLITE_PATH': environ['SQLITE_REPLICA_PATH']} if environ.get('SQLITE_REPLICA_PATH') else {}
+    if not overrides:
+        return None
+    config = database_config(base_dir, {**environ, **overrides})
+    # Tests read the replica through the test database
+    config['TEST'] = {'MIRROR': 'default'}
+    return config
@@ -14,6 +14,8 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 
+from .database import database_config, replica_config
+
 load_dotenv()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -57,6 +59,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -90,11 +93,33 @@ WSGI_APPLICATION = "erp4uni.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLite (WAL by default) or PostgreSQL, with persistent or pooled
+# connections; see erp4uni/database.py for the environment variables
+
 DATABASES = {
+    "default": database_config(BASE_DIR),
+}
+
+# Optional read replica for reporting endpoints, with reads routed by core.routing
+if replica_config(BASE_DIR):
+    DATABASES["replica"] = replica_config(BASE_DIR)
+
+DATABASE_ROUTERS = ['core.routing.ReadReplicaRouter']
+
+DB_READ_ALIAS = "replica" if "replica" in DATABASES else "default"
+
+
+# Caches: "responses" holds rendered API responses (see core/response_cache.py);
+# point it at Redis or memcached to share entries between server processes
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "responses": {
+        "BACKEND": os.getenv('API_RESPONSE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        "LOCATION": os.getenv('API_RESPONSE_CACHE_LOCATION', 'api-responses'),
+    },
 }
 
 
@@ -148,16 +173,66 @@ AUTH_USER_MODEL = 'core.User'
 # Rest Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'core.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.fastjson.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.fastjson.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.StandardPagination',
     'PAGE_SIZE': 10,
 }
 
+# Per-process cache of token -> user lookups: entry lifetime and entries kept (0 disables)
+API_TOKEN_CACHE_SECONDS = int(os.getenv('API_TOKEN_CACHE_SECONDS', '60'))
+API_TOKEN_CACHE_SIZE = int(os.getenv('API_TOKEN_CACHE_SIZE', '1024'))
+
+# Seconds a user's reads stay on the primary after they write, so reports show their changes
+DB_READ_YOUR_WRITES_SECONDS = int(os.getenv('DB_READ_YOUR_WRITES_SECONDS', '5'))
+
+# Cache alias and entry lifetime for responses of ViewSets with cache_responses (0 disables)
+API_RESPONSE_CACHE_ALIAS = os.getenv('API_RESPONSE_CACHE_ALIAS', 'responses')
+API_RESPONSE_CACHE_SECONDS = int(os.getenv('API_RESPONSE_CACHE_SECONDS', '300'))
+
+# Smallest response body, in bytes, that is gzip/brotli compressed for clients accepting it
+API_COMPRESSION_MIN_BYTES = int(os.getenv('API_COMPRESSION_MIN_BYTES', '1024'))
+
+# Upper bound for the ?page_size= parameter on paginated endpoints
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '100'))
+
+# Upper bound on items per request to the <resource>/bulk/ endpoints
+API_BULK_MAX_ITEMS = int(os.getenv('API_BULK_MAX_ITEMS', '5000'))
+
+# Threads per process for running an aggregate endpoint's independent queries side by side (1 disables)
+AGGREGATE_QUERY_WORKERS = int(os.getenv('AGGREGATE_QUERY_WORKERS', '4'))
+
+# Library loan period in days, and how many times a loan may be renewed
+LIBRARY_LOAN_DAYS = int(os.getenv('LIBRARY_LOAN_DAYS', '14'))
+LIBRARY_MAX_RENEWALS = int(os.getenv('LIBRARY_MAX_RENEWALS', '2'))
+
+# Length of a counseling appointment, and how far ahead free-slot searches look
+COUNSELING_SLOT_MINUTES = int(os.getenv('COUNSELING_SLOT_MINUTES', '30'))
+COUNSELING_SEARCH_DAYS = int(os.getenv('COUNSELING_SEARCH_DAYS', '120'))
+
+# Upper bound on students x courses in one eligibility check
+COURSE_ELIGIBILITY_MAX_PAIRS = int(os.getenv('COURSE_ELIGIBILITY_MAX_PAIRS', '50000'))
+
+# Randomised solver attempts per timetable build, and the processes that run them
+TIMETABLE_RESTARTS = int(os.getenv('TIMETABLE_RESTARTS', '8'))
+TIMETABLE_WORKERS = int(os.getenv('TIMETABLE_WORKERS', '1'))
+
+# Lifetime of a cached research collaboration graph; membership changes invalidate it sooner
+RESEARCH_GRAPH_CACHE_SECONDS = int(os.getenv('RESEARCH_GRAPH_CACHE_SECONDS', '3600'))
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = DEBUG  # Only for development
 CORS_ALLOWED_ORIGINS = [
@@ -12,5 +12,8 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "erp4uni.settings")
+# WSGI workers are long-lived threads, so their connections are worth keeping
+# (see erp4uni/database.py)
+os.environ.setdefault("DB_CONN_MAX_AGE", "60")
 
 application = get_wsgi_application()
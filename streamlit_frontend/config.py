@@ -40,6 +40,8 @@ ENDPOINTS = {
     # Library
     'library': f"{API_BASE_URL}/library/",
     'books': f"{API_BASE_URL}/books/",
+    'library_resources': f"{API_BASE_URL}/library-resources/",
+    'library_search': f"{API_BASE_URL}/library-resources/search/",
     'borrowings': f"{API_BASE_URL}/borrowings/",
     'ebooks': f"{API_BASE_URL}/ebooks/",
     'journals': f"{API_BASE_URL}/journals/",
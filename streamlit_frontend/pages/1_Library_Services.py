@@ -48,13 +48,16 @@ with tabs[0]:
                 'author': search_author,
                 'isbn': search_isbn,
                 'category': category if category != "All" else None,
-                'availability': availability if availability != "All" else None
+                'available': 1 if availability == "Available" else None
             }
             # Remove None values
             params = {k: v for k, v in params.items() if v}
             
-            # Fetch books from API
-            response = fetch_data(ENDPOINTS['books'], params=params)
+            # Ranked full-text search when a term is given, otherwise browse the catalogue
+            if search_title or search_author or search_isbn:
+                response = fetch_data(ENDPOINTS['library_search'], params=params)
+            else:
+                response = fetch_data(ENDPOINTS['library_resources'], params=params)
             if response and 'results' in response:
                 st.dataframe(pd.DataFrame(response['results']))
             else: